@@ -51,11 +51,12 @@ resource "aws_api_gateway_integration" "this" {
   http_method = aws_api_gateway_method.this.http_method
 
   integration_http_method = "POST"
-  type                    = "AWS"
-  request_parameters = var.async_lambda_invocation ? {
+  # proxy integrations pass the raw request body and all headers to the function unchanged
+  type = var.lambda_proxy_integration ? "AWS_PROXY" : "AWS"
+  request_parameters = var.async_lambda_invocation && !var.lambda_proxy_integration ? {
     "integration.request.header.X-Amz-Invocation-Type" = "'Event'"
   } : null
-  request_templates = { "application/json" = jsonencode({
+  request_templates = var.lambda_proxy_integration ? null : { "application/json" = jsonencode({
     "headers" = {
       "X-GitHub-Event"      = "$input.params('X-GitHub-Event')"
       "X-Hub-Signature-256" = "$input.params('X-Hub-Signature-256')"
@@ -63,7 +64,7 @@ resource "aws_api_gateway_integration" "this" {
     "body" = "$util.escapeJavaScript($input.json('$'))"
   }) }
 
-  uri = module.lambda_function.lambda_function_invoke_arn
+  uri = local.lambda_invoke_arn
 }
 
 resource "aws_api_gateway_model" "this" {
@@ -161,6 +162,74 @@ resource "aws_api_gateway_integration_response" "status_500" {
   ]
 }
 
+resource "aws_api_gateway_method_response" "status_503" {
+  rest_api_id = local.api_id
+  resource_id = aws_api_gateway_resource.this.id
+  http_method = aws_api_gateway_method.this.http_method
+  status_code = "503"
+  response_models = {
+    "application/json" = aws_api_gateway_model.this.name
+  }
+}
+
+resource "aws_api_gateway_integration_response" "status_503" {
+  rest_api_id = local.api_id
+  resource_id = aws_api_gateway_resource.this.id
+  http_method = aws_api_gateway_integration.this.http_method
+  status_code = "503"
+
+  response_templates = {
+    "application/json" = <<EOF
+    #set($inputRoot = $input.path('$'))
+    #set ($errorMessageObj = $util.parseJson($input.path('$.errorMessage')))
+    {
+        "isError" : true,
+        "message" : "$errorMessageObj.message",
+        "type": "$errorMessageObj.type"
+    }
+  EOF
+  }
+
+  selection_pattern = ".*\"type\"\\s*:\\s*\"DependencyUnavailableException\".*"
+  depends_on = [
+    aws_api_gateway_method_response.status_503
+  ]
+}
+
+resource "aws_api_gateway_method_response" "status_504" {
+  rest_api_id = local.api_id
+  resource_id = aws_api_gateway_resource.this.id
+  http_method = aws_api_gateway_method.this.http_method
+  status_code = "504"
+  response_models = {
+    "application/json" = aws_api_gateway_model.this.name
+  }
+}
+
+resource "aws_api_gateway_integration_response" "status_504" {
+  rest_api_id = local.api_id
+  resource_id = aws_api_gateway_resource.this.id
+  http_method = aws_api_gateway_integration.this.http_method
+  status_code = "504"
+
+  response_templates = {
+    "application/json" = <<EOF
+    #set($inputRoot = $input.path('$'))
+    #set ($errorMessageObj = $util.parseJson($input.path('$.errorMessage')))
+    {
+        "isError" : true,
+        "message" : "$errorMessageObj.message",
+        "type": "$errorMessageObj.type"
+    }
+  EOF
+  }
+
+  selection_pattern = ".*\"type\"\\s*:\\s*\"DeadlineExceededException\".*"
+  depends_on = [
+    aws_api_gateway_method_response.status_504
+  ]
+}
+
 resource "aws_api_gateway_method_response" "status_200" {
   rest_api_id = local.api_id
   resource_id = aws_api_gateway_resource.this.id
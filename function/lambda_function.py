@@ -1,70 +1,286 @@
 import json
+import base64
+import bisect
+import calendar
 import hmac
 import hashlib
 import logging
 import boto3
+import botocore.exceptions
 import github
+import requests
 import os
 import re
-from typing import List
+import fnmatch
+import time
+import random
+import zlib
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
 import sys
 from pprint import pformat
-from jsonpath_ng import parse
+from jsonpath_ng import parse, Child, Fields, Root
 
 
 log = logging.getLogger(__name__)
 stream = logging.StreamHandler(sys.stdout)
 log.addHandler(stream)
-log.setLevel(logging.DEBUG)
+log.setLevel(os.environ.get("LOG_LEVEL", "DEBUG"))
 
 ssm = boto3.client("ssm")
 
+# per-container caches that persist across warm invocations
+_ssm_cache = {}
+_github_clients = {}
+_secret_registry = None
+_config_store = None
+_filter_config = None
+_next_config_check = 0
+_rate_limit_governor = None
+_changed_files_cache = None
+_github_apps = None
+_coalescing_store = None
+_request_policy = None
+_circuit_breakers = {}
+# deadline of the current invocation (see `start_deadline()`)
+_deadline = None
+
 
 def lambda_handler(event, context):
     """
     Validates the request's sha256 digest value and checks if the GitHub payload passes atleast one of the filter groups.
 
     Requirements:
-        - Payload body must be mapped to the key `body`
-        - Payload headers must be mapped to the key `headers`
-        - Filter groups and events must be specified in /opt/filter_groups.json
+        - The event must be one of the following:
+            - API Gateway non-proxy integration event with the payload body mapped to the key `body`
+                and the payload headers mapped to the key `headers`
+            - API Gateway proxy integration or Lambda Function URL event
+        - Filter groups and events must be specified within the filter groups config store (see `get_config_store()`)
         - If private repositories are included, a pre-existing SSM Paramter Store value for the Github token mapped to the
             Lambda's env var: `GITHUB_TOKEN_SSM_KEY` is required.
+        - GitHub Apps within the Lambda's env var: `GITHUB_APPS` are used for the repositories they're installed
+            for (see `github_credentials()`)
+        - Warm-up events (`{"warm_up": true}`) only load the function's dependencies and are not validated
+        - Invocations slower than the profiling threshold emit a collapsed-stack profile (see `Profiler`)
+        - GitHub and SSM calls are bounded by the invocation's deadline (see `Deadline`)
     """
+    with profiled():
+        start_deadline(context)
+        try:
+            return handle(event, context)
+        finally:
+            global _deadline
+            _deadline = None
+
+
+def handle(event, context):
+    if is_warm_up_event(event):
+        log.info("Warm-up event -- loading function dependencies")
+        return warm_up()
 
     log.debug(f"Event:\n{pformat(event)}")
 
+    headers, body, is_proxy = normalize_event(event)
+
+    if not is_proxy:
+        return validate_request(headers, body)
+
+    # proxy integrations pass the function's response through to the client as-is
+    # so errors are returned as HTTP responses rather than raised
+    try:
+        return proxy_response(200, validate_request(headers, body))
+    except LambdaException as e:
+        error = json.loads(str(e))
+    except (ClientException, ServerException) as e:
+        error = {"isError": True, "type": e.__class__.__name__, "message": str(e)}
+
+    return proxy_response(ERROR_STATUS_CODES.get(error["type"], 500), error)
+
+
+# HTTP status codes of the error types returned by proxy integrations. Other error types are returned as 500.
+ERROR_STATUS_CODES = {
+    "ClientException": 400,
+    "DependencyUnavailableException": 503,
+    "DeadlineExceededException": 504,
+}
+
+
+def normalize_event(event: dict) -> Tuple[dict, str, bool]:
+    """
+    Returns the request's headers, body and whether the event came from a proxy integration.
+    Header names are lowercased given that API Gateway proxy integrations pass the header names as sent
+    by GitHub while Lambda Function URLs lowercase them.
+
+    :param event: API Gateway non-proxy integration, API Gateway proxy integration or Lambda Function URL event
+    """
+    is_proxy = "requestContext" in event
+    headers = {key.lower(): value for key, value in (event["headers"] or {}).items()}
+    body = event["body"]
+
+    # proxy integrations pass the raw request body which may be base64 encoded depending on the content type
+    if is_proxy and event.get("isBase64Encoded"):
+        body = base64.b64decode(body).decode("utf-8")
+
+    return headers, body, is_proxy
+
+
+def proxy_response(status_code: int, body: dict) -> dict:
+    """
+    Returns the response in the format expected by API Gateway proxy integrations and Lambda Function URLs
+
+    :param status_code: HTTP status code
+    :param body: Response body
+    """
+    return {
+        "statusCode": status_code,
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps(body),
+    }
+
+
+def validate_request(headers: dict, body: str) -> dict:
+    """
+    Validates the request's signature and checks if the payload passes atleast one of the repo's filter groups
+
+    :param headers: Request headers with lowercased names
+    :param body: Raw request body
+    """
+    trace = new_trace()
+    decision = new_decision()
+    try:
+        response = _validate_request(headers, body, trace, decision)
+    finally:
+        if trace:
+            log.info(f"Trace: {json.dumps(trace.to_dict())}")
+
+    if trace and os.environ.get("TRACE_IN_RESPONSE", "false").lower() == "true":
+        response = {**response, "trace": trace.to_dict()}
+
+    if decision:
+        response = {**response, **decision.encode()}
+
+    return response
+
+
+def _validate_request(
+    headers: dict,
+    body: str,
+    trace: Optional["Trace"],
+    decision: Optional["Decision"] = None,
+) -> dict:
+    event_header = headers.get("x-github-event")
+
+    # the config is loaded at most once so that every step of the request uses the same config version
+    config = load_filter_config() if payload_projection_enabled() else None
+
+    # the payload is parsed before the signature is validated so that requests that can't match any
+    # filter group are rejected without fetching the webhook secret or calling the GitHub API
+    try:
+        with traced(trace, "json.loads"):
+            payload = parse_payload(body, event_header, config)
+    except ValueError:
+        payload = None
+
+    repo_key = None
+    if payload is not None:
+        if config is None:
+            config = load_filter_config()
+        repo_key = get_repo_key(payload, config)
+        with traced(trace, "prefilter"):
+            passed = passes_prefilter(
+                event_header, payload, config.prefilter_groups.get(repo_key)
+            )
+        if not passed:
+            log.info("Payload was rejected by the filter groups pre-filter")
+            raise LambdaException(
+                json.dumps(
+                    {
+                        "isError": True,
+                        "type": ClientException.__name__,
+                        "message": "Payload does not fulfill trigger requirements",
+                    }
+                )
+            )
+
     try:
-        validate_sig(event["headers"]["X-Hub-Signature-256"], event["body"])
+        with traced(trace, "validate_sig"):
+            validate_sig(headers.get("x-hub-signature-256"), body, repo_key=repo_key)
     except Exception as e:
         logging.error(e, exc_info=True)
+        if isinstance(e, DeadlineExceededException):
+            emit_metric("DeadlineExceeded")
         api_exception_json = json.dumps(
             {"isError": True, "type": e.__class__.__name__, "message": str(e)}
         )
         raise LambdaException(api_exception_json)
 
-    payload = json.loads(event["body"])
-    event_header = event["headers"]["X-GitHub-Event"]
+    if payload is None:
+        payload = json.loads(body)
     log.info(f"GitHub Event: {event_header}")
 
     try:
         repo_name = payload["repository"]["name"]
+        repo_full_name = payload["repository"].get("full_name", repo_name)
     except KeyError:
         raise ClientException("Repository name could not be found in payload")
-    log.info(f"Triggered Repo: {repo_name}")
+    log.info(f"Triggered Repo: {repo_full_name}")
 
-    with open(f"{os.path.dirname(__file__)}/filter_groups.json") as f:
-        all_repos_filter_groups = json.load(f)
-        log.debug(f"All repos filter groups:\n{all_repos_filter_groups}")
-        filter_groups = all_repos_filter_groups[repo_name]
+    if config is None:
+        config = load_filter_config()
+    repo_key = config.repo_index.lookup(repo_full_name, repo_name)
+    log.debug(f"Repo filter groups key: {repo_key}")
+    filter_groups = config.filter_groups[repo_key] if repo_key is not None else None
     log.info(f"Filter Groups: {filter_groups}")
 
     if filter_groups is None:
-        raise ClientException(f"Filter groups were not defined for repo: {repo_name}")
+        raise ClientException(
+            f"Filter groups were not defined for repo: {repo_full_name}"
+        )
     else:
+        if decision:
+            decision.repo_key = repo_key
+            decision.config_version = config.version
         try:
+            if event_header == "push":
+                with traced(trace, "coalesce_push"):
+                    payload = coalesce_push(payload)
+                if payload is None:
+                    # the newer push is validated with this push's changed files so this delivery succeeds
+                    # without being validated
+                    return {
+                        "message": "Push was coalesced into a newer push",
+                        "coalesced": True,
+                    }
+
             log.info("Validating payload")
-            response = validate_payload(event_header, payload, filter_groups)
+            response = validate_payload(
+                event_header,
+                payload,
+                filter_groups,
+                trace=trace,
+                repo_key=repo_key,
+                matrix=config.matrices[repo_key],
+                decision=decision,
+            )
+        except DeadlineExceededException as e:
+            log.error(e, exc_info=True)
+            emit_metric("DeadlineExceeded")
+            # the signature is already validated so only the filter groups are skipped
+            if os.environ.get("DEADLINE_POLICY", "fail_closed") == "fail_open":
+                log.warning("Passing payload given the deadline policy is fail_open")
+                return {
+                    "message": "Payload was passed without evaluating every filter group before the deadline"
+                }
+            raise LambdaException(
+                json.dumps(
+                    {"isError": True, "type": e.__class__.__name__, "message": str(e)}
+                )
+            )
         except Exception as e:
             logging.error(e, exc_info=True)
             api_exception_json = json.dumps(
@@ -75,181 +291,3153 @@ def lambda_handler(event, context):
     return response
 
 
-def validate_sig(header_sig: str, payload: str) -> None:
+class Trace:
+    """
+    Records which filter group matched or failed, which filter decided each group, how many
+    target values each filter scanned and the time spent per filter and per data fetch
     """
-    Validates incoming request's sha256 value
 
-    :param header_sig: Github webhook's `X-Hub-Signature-256` header value
-    :param payload: Github webhook payload. Must be in string version in order to accurately generate the expected signature
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.groups = []
+        self.fetches = []
+
+    @contextmanager
+    def fetch(self, name: str):
+        """Times the data fetch within the context"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fetches.append({"name": name, "ms": _ms(start)})
+
+    def start_group(self, group: int) -> None:
+        """Records the start of the filter group's evaluation"""
+        self.groups.append({"group": group, "matched": False, "filters": []})
+
+    def add_filter(
+        self, filter_entry: dict, matched: bool, scanned: int, ms: float
+    ) -> None:
+        """Records the filter's outcome within the latest filter group"""
+        self.groups[-1]["filters"].append(
+            {
+                "type": filter_entry["type"],
+                "pattern": filter_entry["pattern"],
+                "matched": matched,
+                "scanned": scanned,
+                "ms": ms,
+            }
+        )
+
+    def end_group(self, matched: bool, decided_by: Optional[int]) -> None:
+        """Records the outcome of the latest filter group and the index of the filter that decided it"""
+        self.groups[-1]["matched"] = matched
+        self.groups[-1]["decided_by"] = decided_by
+
+    def to_dict(self) -> dict:
+        return {
+            "groups": self.groups,
+            "fetches": self.fetches,
+            "total_ms": _ms(self.start),
+        }
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def new_trace() -> Optional[Trace]:
+    """Returns a trace for the request if it's sampled based on the `TRACE_SAMPLE_RATE` (0 to 1) env var"""
+    sample_rate = float(os.environ.get("TRACE_SAMPLE_RATE", 0))
+    if sample_rate > 0 and random.random() < sample_rate:
+        return Trace()
+
+
+def traced(trace: Optional[Trace], name: str):
+    """Returns a context manager that times the data fetch if the request is traced"""
+    return trace.fetch(name) if trace else nullcontext()
+
+
+class Decision:
+    """
+    Details of a successful validation that downstream consumers (e.g. `lambda_destination_on_success`
+    targets) can use instead of calling the GitHub API again: the matched filter groups, the request's
+    normalized fields and the changed file paths if a filter fetched them. GitHub API fields that weren't
+    fetched given that the GitHub circuit was open are listed within `unavailable_fields`.
     """
-    try:
-        github_secret = ssm.get_parameter(
-            Name=os.environ["GITHUB_WEBHOOK_SECRET_SSM_KEY"], WithDecryption=True
-        )["Parameter"]["Value"]
-    except Exception:
-        raise ServerException("Internal server error")
-    try:
-        sha, sig = header_sig.split("=")
-    except ValueError:
-        raise ClientException("Signature not signed with sha256 (e.g. sha256=123456)")
 
-    if sha != "sha256":
-        raise ClientException("Signature not signed with sha256 (e.g. sha256=123456)")
+    def __init__(self):
+        self.repo_key = None
+        self.config_version = None
+        self.matched_groups = []
+        self.fields = {}
+        self.file_paths = None
+        self.unavailable_fields = []
 
-    # creates sha256 value using the Github secret associated with the repo's webhook  and the request payload
-    expected_sig = hmac.new(
-        bytes(str(github_secret), "utf-8"), bytes(str(payload), "utf-8"), hashlib.sha256
-    ).hexdigest()
+    def record(
+        self,
+        matched_groups: List[int],
+        request_mapping: dict,
+        evaluate: "FilterEvaluator",
+        unavailable: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Records the matched filter groups and the request fields that are available without calling
+        the GitHub API again
 
-    log.debug(f"Expected signature: {expected_sig}")
-    log.debug(f"Actual signature: {sig}")
+        :param matched_groups: Indices of the matched filter groups
+        :param request_mapping: Request mapping the filters were evaluated with
+        :param evaluate: Filter evaluator that resolved the GitHub API fields the filters needed
+        :param unavailable: GitHub API fields that resolved no values given that their dependency was unavailable
+        """
+        self.matched_groups = matched_groups
+        self.unavailable_fields = sorted(set(unavailable or []))
+        for field in DECISION_FIELDS:
+            if field in self.unavailable_fields:
+                continue
+            value = request_mapping.get(field, [])
+            if callable(value):
+                # GitHub API fields are only included if a filter already fetched them
+                value = evaluate.targets.get(field, [])
+                value = value[0] if len(value) == 1 else value
+            if value != []:
+                self.fields[field] = value
 
-    authorized = hmac.compare_digest(str(sig), str(expected_sig))
+        if (
+            "file_path" in evaluate.targets
+            and "file_path" not in self.unavailable_fields
+        ):
+            self.file_paths = evaluate.targets["file_path"]
 
-    if not authorized:
-        raise ClientException("Header signature and expected signature do not match")
+    def to_dict(self) -> dict:
+        return {
+            "repo_key": self.repo_key,
+            "config_version": self.config_version,
+            "matched_groups": self.matched_groups,
+            "fields": self.fields,
+            "file_paths": self.file_paths,
+            "unavailable_fields": self.unavailable_fields,
+        }
+
+    def encode(self) -> dict:
+        """
+        Returns the decision's response fields. The decision is zlib compressed and base64 encoded if
+        the `DECISION_COMPRESSION` env var is `zlib`. If the encoded decision is larger than the
+        `DECISION_MAX_BYTES` env var (defaults to 200000), the changed file paths are left out and
+        `file_paths_truncated` is set.
+        """
+        compress = os.environ.get("DECISION_COMPRESSION", "none") == "zlib"
+        max_bytes = int(os.environ.get("DECISION_MAX_BYTES", 200000))
+
+        decision = self.to_dict()
+        encoded = _encode_decision(decision, compress)
+        if len(encoded) > max_bytes and decision["file_paths"]:
+            log.warning(
+                f"Decision size ({len(encoded)} bytes) exceeds {max_bytes} bytes -- Leaving out file paths"
+            )
+            decision = {**decision, "file_paths": None, "file_paths_truncated": True}
+            encoded = _encode_decision(decision, compress)
+
+        if compress:
+            return {"decision": encoded, "decision_encoding": "zlib+base64"}
+        return {"decision": decision}
 
 
-def validate_payload(event: str, payload: dict, filter_groups: List[dict]) -> None:
+def _encode_decision(decision: dict, compress: bool) -> str:
+    encoded = json.dumps(decision, separators=(",", ":"))
+    if compress:
+        encoded = base64.b64encode(zlib.compress(encoded.encode("utf-8"))).decode(
+            "utf-8"
+        )
+    return encoded
+
+
+def new_decision() -> Optional[Decision]:
+    """Returns a decision for the request if the `DECISION_IN_RESPONSE` env var is `true`"""
+    if os.environ.get("DECISION_IN_RESPONSE", "false").lower() == "true":
+        return Decision()
+
+
+class Deadline:
     """
-    Checks if payload body passes atleast one filter group
+    Time budget of the invocation derived from the Lambda context's remaining time. The budget ends
+    `reserve_ms` before the function's timeout so that the function returns its decision before Lambda
+    stops the invocation. Calls made through `call()` are abandoned once the budget is spent.
 
-    :param payload: Github webhook payload
-    :param filter_groups: List of filters to check payload with
+    :param remaining_ms: Milliseconds until the function's timeout
+    :param reserve_ms: Milliseconds kept back for returning the decision
     """
 
-    token_ssm_keys = json.loads(os.environ["TOKEN_SSM_KEYS"])
-    log.debug(f"Token SSM Parameter keys:\n{pformat(token_ssm_keys)}")
-    repo_ssm_key = token_ssm_keys.get(payload["repository"]["name"], None)
-    if repo_ssm_key:
-        try:
-            github_token = ssm.get_parameter(Name=repo_ssm_key, WithDecryption=True)[
-                "Parameter"
-            ]["Value"]
-            gh = github.Github(github_token)
-        except Exception as e:
-            log.error(e, exc_info=True)
-            raise ServerException("Internal server error")
+    def __init__(self, remaining_ms: float, reserve_ms: float):
+        self.expires = time.monotonic() + (remaining_ms - reserve_ms) / 1000
+
+    def remaining(self) -> float:
+        """Returns the seconds left within the budget"""
+        return max(self.expires - time.monotonic(), 0)
+
+    def timeout(self, name: str, limit: float) -> float:
+        """
+        Returns the timeout of a call: the call's own limit capped by the remaining budget. Raises
+        DeadlineExceededException if the budget is spent.
+
+        :param name: Name of the call
+        :param limit: Call's own timeout in seconds
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededException(f"Deadline exceeded before {name}")
+
+        return min(limit, remaining)
+
+    def call(self, name: str, func: Callable, *args, **kwargs):
+        """
+        Returns the result of the function called within a separate thread that is abandoned if it
+        doesn't finish within the remaining budget
+
+        :param name: Name of the call used within the exception
+        :param func: Function to call
+        """
+        timeout = self.timeout(name, float("inf"))
+        outcome = {}
+
+        def run():
+            try:
+                outcome["result"] = func(*args, **kwargs)
+            except BaseException as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            raise DeadlineExceededException(f"Deadline exceeded during {name}")
+        if "error" in outcome:
+            raise outcome["error"]
+
+        return outcome["result"]
+
+
+def start_deadline(context) -> Optional[Deadline]:
+    """
+    Starts the invocation's deadline from the Lambda context's remaining time less `DEADLINE_RESERVE_MS`
+    milliseconds (defaults to 500). Contexts without the remaining time (e.g. local runs) have no deadline.
+
+    :param context: Lambda context
+    """
+    global _deadline
+    if hasattr(context, "get_remaining_time_in_millis"):
+        _deadline = Deadline(
+            context.get_remaining_time_in_millis(),
+            float(os.environ.get("DEADLINE_RESERVE_MS", 500)),
+        )
     else:
-        gh = github.Github()
+        _deadline = None
 
-    try:
-        repo = gh.get_repo(payload["repository"]["full_name"])
-    except github.UnknownObjectException as e:
-        log.error(e, exc_info=True)
-        raise ClientException(
-            """
-        Repository was not found -- If the repository is private, add a GitHub token with `repo` permissions
-        to the var.repo `github_token_ssm_value` attribute within the associated Terraform module.
+    return _deadline
+
+
+def within_deadline(name: str, func: Callable, *args, **kwargs):
+    """
+    Calls the function bounded by the invocation's deadline (see `Deadline.call()`). The function is
+    called directly if the invocation has no deadline.
+
+    :param name: Name of the call used within the exception
+    :param func: Function to call
+    """
+    if _deadline is None:
+        return func(*args, **kwargs)
+
+    return _deadline.call(name, func, *args, **kwargs)
+
+
+def call_timeout(name: str, limit: float) -> float:
+    """
+    Returns the call's timeout capped by the invocation's deadline (see `Deadline.timeout()`)
+
+    :param name: Name of the call
+    :param limit: Call's own timeout in seconds
+    """
+    if _deadline is None:
+        return limit
+
+    return _deadline.timeout(name, limit)
+
+
+def emit_metric(name: str, value: float = 1, unit: str = "Count") -> None:
+    """
+    Writes the metric to the function's logs in the CloudWatch embedded metric format if the
+    `METRICS_NAMESPACE` env var is defined
+
+    :param name: Metric name
+    :param value: Metric value
+    :param unit: CloudWatch metric unit
+    """
+    namespace = os.environ.get("METRICS_NAMESPACE")
+    if not namespace:
+        return
+
+    sys.stdout.write(
+        json.dumps(
+            {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": namespace,
+                            "Dimensions": [["FunctionName"]],
+                            "Metrics": [{"Name": name, "Unit": unit}],
+                        }
+                    ],
+                },
+                "FunctionName": os.environ.get("AWS_LAMBDA_FUNCTION_NAME", ""),
+                name: value,
+            }
+        )
+        + "\n"
+    )
+
+
+class CircuitBreaker:
+    """
+    Per-container circuit breaker of a dependency (e.g. GitHub or SSM). The circuit opens once
+    `failure_threshold` consecutive calls fail or take longer than `slow_call_seconds`. While open, calls
+    are rejected without reaching the dependency. Once `open_seconds` pass, the circuit is half-open and
+    lets up to `half_open_probes` calls through as probes: the circuit closes once every probe succeeds
+    and opens again if a probe fails.
+
+    :param name: Dependency name used within the logs and metrics
+    :param failure_threshold: Consecutive failures that open the circuit
+    :param slow_call_seconds: Duration after which a successful call counts as a failure. Disabled if 0.
+    :param open_seconds: Seconds the circuit stays open before it is probed
+    :param half_open_probes: Calls let through while the circuit is half-open
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        slow_call_seconds: float = 0,
+        open_seconds: float = 30,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(half_open_probes, 1)
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0
+        self.probes = 0
+        self.probe_successes = 0
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Returns True if a call may be made to the dependency"""
+        with self.lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                log.info(f"{self.name} circuit is half-open -- Probing {self.name}")
+                self.state = "half_open"
+                self.probes = 0
+                self.probe_successes = 0
+
+            if self.state == "half_open":
+                if self.probes >= self.half_open_probes:
+                    return False
+                self.probes += 1
+
+            return True
+
+    def record(self, failed: bool, duration: float) -> None:
         """
+        Records the outcome of a call
+
+        :param failed: Whether the call failed due to the dependency
+        :param duration: Call duration in seconds
+        """
+        failed = failed or bool(
+            self.slow_call_seconds and duration > self.slow_call_seconds
         )
+        with self.lock:
+            if failed:
+                self.failures += 1
+                if self.state == "half_open" or self.failures >= self.failure_threshold:
+                    self.open()
+            elif self.state == "half_open":
+                self.probe_successes += 1
+                if self.probe_successes >= self.half_open_probes:
+                    log.info(f"{self.name} circuit is closed")
+                    self.state = "closed"
+                    self.failures = 0
+            else:
+                self.failures = 0
 
-    request_mapping = {"event": event}
+    def open(self) -> None:
+        if self.state != "open":
+            log.error(
+                f"{self.name} circuit is open for {self.open_seconds}s -- Consecutive failures: {self.failures}"
+            )
+            emit_metric(f"{self.name}CircuitOpened")
+        self.state = "open"
+        self.opened_at = time.monotonic()
 
-    if event == "pull_request":
-        request_mapping = {
-            **{
-                "file_path": [
-                    path.filename
-                    for path in repo.compare(
-                        payload["pull_request"]["base"]["sha"],
-                        payload["pull_request"]["head"]["sha"],
-                    ).files
-                ],
-                "commit_message": repo.get_commit(
-                    sha=payload["pull_request"]["head"]["sha"]
-                ).commit.message,
-                "base_ref": payload["pull_request"]["base"]["ref"],
-                "head_ref": payload["pull_request"]["head"]["ref"],
-                "actor_account_id": payload["sender"]["id"],
-                "pr_action": payload["action"],
-            },
-            **request_mapping,
-        }
-    elif event == "push":
-        request_mapping = {
-            **{
-                "file_path": [
-                    path.filename
-                    for path in repo.compare(payload["before"], payload["after"]).files
-                ],
-                "commit_message": payload["head_commit"]["message"],
-                "base_ref": payload["ref"],
-                "actor_account_id": payload["sender"]["id"],
-            },
-            **request_mapping,
-        }
 
-    log.debug(f"Payload Target Values:\n{request_mapping}")
-    valid = False
+def is_dependency_failure(error: Exception) -> bool:
+    """Returns True if the call failed due to the dependency rather than due to the request (e.g. a 404)"""
+    if isinstance(error, DeadlineExceededException):
+        return True
+    if isinstance(error, botocore.exceptions.ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return "Throttl" in code or status >= 500
+    if isinstance(
+        error,
+        (
+            botocore.exceptions.ConnectionError,
+            botocore.exceptions.HTTPClientError,
+        ),
+    ):
+        return True
 
-    try:
-        for group in filter_groups:
-            valid_count = 0
-            for filter_entry in group:
-                log.debug(f"Filter: {filter_entry}")
+    return is_retryable(error)
 
-                if filter_entry["type"] not in list(request_mapping.keys()):
-                    log.info(
-                        "Filter type not found in request mapping -- Using JSON path"
-                    )
-                    target = [
-                        match.value
-                        for match in parse(filter_entry["type"]).find(payload)
-                    ]
-                else:
-                    # puts payload value into a list if value is not already a list
-                    # so they can be processed with list payload values
-                    target = (
-                        [request_mapping[filter_entry["type"]]]
-                        if not isinstance(request_mapping[filter_entry["type"]], list)
-                        else request_mapping[filter_entry["type"]]
-                    )
-                log.debug(f"Target values:\n{pformat(target)}")
-
-                for value in target:
-                    value = str(value)
-                    log.debug(f"Target value:\n{value}")
-                    if (
-                        re.search(filter_entry["pattern"], value)
-                        and not filter_entry["exclude_matched_filter"]
-                    ) or (
-                        not re.search(filter_entry["pattern"], value)
-                        and filter_entry["exclude_matched_filter"]
-                    ):
-                        log.debug("Matched")
-                        valid_count += 1
-                        # only one value out of the target needs to be matched for `file_path` filtering
-                        break
-                    else:
-                        log.debug("Not Matched")
-            log.debug(f"{valid_count}/{len(group)} filters succeeded")
-            if valid_count == len(group):
-                valid = True
-                break
+
+def get_circuit_breaker(name: str) -> Optional[CircuitBreaker]:
+    """
+    Returns the container's circuit breaker of the dependency or None if circuit breakers are disabled.
+    Circuit breakers are configured via the function's env vars:
+        - `CIRCUIT_BREAKER_FAILURE_THRESHOLD`: Consecutive failures that open a circuit (defaults to 0 which
+            disables circuit breakers)
+        - `CIRCUIT_BREAKER_SLOW_CALL_MS`: Duration after which a call counts as a failure (defaults to 0 which
+            disables the slow call check)
+        - `CIRCUIT_BREAKER_OPEN_SECONDS`: Seconds a circuit stays open before it is probed (defaults to 30)
+        - `CIRCUIT_BREAKER_HALF_OPEN_PROBES`: Calls let through while a circuit is half-open (defaults to 1)
+
+    :param name: Dependency name
+    """
+    failure_threshold = int(os.environ.get("CIRCUIT_BREAKER_FAILURE_THRESHOLD") or 0)
+    if failure_threshold <= 0:
+        return None
+
+    if name not in _circuit_breakers:
+        _circuit_breakers[name] = CircuitBreaker(
+            name,
+            failure_threshold,
+            slow_call_seconds=float(os.environ.get("CIRCUIT_BREAKER_SLOW_CALL_MS") or 0)
+            / 1000,
+            open_seconds=float(os.environ.get("CIRCUIT_BREAKER_OPEN_SECONDS", 30)),
+            half_open_probes=int(os.environ.get("CIRCUIT_BREAKER_HALF_OPEN_PROBES", 1)),
+        )
+
+    return _circuit_breakers[name]
+
+
+def guarded(dependency: str, func: Callable, *args, **kwargs):
+    """
+    Calls the function through the dependency's circuit breaker (see `CircuitBreaker`). Raises
+    DependencyUnavailableException without calling the function while the circuit is open.
+
+    :param dependency: Dependency name (`GitHub` or `SSM`)
+    :param func: Function that calls the dependency
+    """
+    breaker = get_circuit_breaker(dependency)
+    if breaker is None:
+        return func(*args, **kwargs)
+
+    if not breaker.allow():
+        emit_metric(f"{dependency}CircuitRejected")
+        raise DependencyUnavailableException(f"{dependency} circuit is open")
+
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
     except Exception as e:
-        logging.error(e, exc_info=True)
-        raise ServerException("Internal server error")
+        breaker.record(is_dependency_failure(e), time.perf_counter() - start)
+        raise
+    breaker.record(False, time.perf_counter() - start)
 
-    if valid:
-        return {"message": "Payload fulfills atleast one filter group"}
+    return result
+
+
+class Profiler:
+    """
+    Low overhead sampling profiler that records the invocation thread's call stack every
+    `PROFILE_INTERVAL_MS` milliseconds (defaults to 5) from a background thread. Samples are kept as
+    collapsed stacks (`frame;frame;frame count`) that flame graph tools can render.
+
+    :param thread_id: ID of the thread to sample
+    """
+
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.interval = float(os.environ.get("PROFILE_INTERVAL_MS", 5)) / 1000
+        self.stacks = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def _sample(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if frames:
+                stack = ";".join(reversed(frames))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def collapsed(self) -> str:
+        """Returns the samples in the collapsed-stack format"""
+        return "\n".join(
+            f"{stack} {count}"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1])
+        )
+
+
+# durations (ms) of the container's recent invocations used for the percentile profiling threshold
+_durations = deque(maxlen=200)
+
+
+def profile_threshold() -> Optional[float]:
+    """
+    Returns the duration (ms) above which the invocation's profile is emitted or None if profiling is disabled.
+    The threshold is the greater of `PROFILE_THRESHOLD_MS` and the `PROFILE_PERCENTILE` percentile of
+    the container's recent invocation durations. The percentile is only used once enough durations
+    are recorded to make it meaningful.
+    """
+    threshold_ms = float(os.environ.get("PROFILE_THRESHOLD_MS") or 0)
+    percentile = float(os.environ.get("PROFILE_PERCENTILE") or 0)
+    if not threshold_ms and not percentile:
+        return None
+
+    if percentile and len(_durations) >= 20:
+        durations = sorted(_durations)
+        index = min(int(len(durations) * percentile / 100), len(durations) - 1)
+        threshold_ms = max(threshold_ms, durations[index])
+
+    # no profile is emitted until the percentile threshold can be computed
+    return threshold_ms or None
+
+
+@contextmanager
+def profiled():
+    """
+    Profiles the invocation if profiling is enabled and emits the profile if the invocation is slower
+    than the profiling threshold. Profiles are logged or written to `PROFILE_OUTPUT_DIR` if defined
+    (e.g. `/tmp` for local runs).
+    """
+    if not (
+        float(os.environ.get("PROFILE_THRESHOLD_MS") or 0)
+        or float(os.environ.get("PROFILE_PERCENTILE") or 0)
+    ):
+        yield
+        return
+
+    profiler = Profiler(threading.get_ident())
+    profiler.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        duration_ms = _ms(start)
+        threshold_ms = profile_threshold()
+        _durations.append(duration_ms)
+
+        if threshold_ms is not None and duration_ms > threshold_ms:
+            emit_profile(profiler.collapsed(), duration_ms, threshold_ms)
+
+
+def emit_profile(collapsed: str, duration_ms: float, threshold_ms: float) -> None:
+    """
+    Logs the collapsed-stack profile or writes it to `PROFILE_OUTPUT_DIR`
+
+    :param collapsed: Collapsed-stack profile
+    :param duration_ms: Invocation duration
+    :param threshold_ms: Profiling threshold the invocation exceeded
+    """
+    output_dir = os.environ.get("PROFILE_OUTPUT_DIR")
+    if output_dir:
+        path = os.path.join(output_dir, f"profile-{time.time_ns()}.folded")
+        with open(path, "w") as f:
+            f.write(collapsed + "\n")
+        log.warning(
+            f"Invocation took {duration_ms}ms (threshold: {threshold_ms}ms) -- Profile: {path}"
+        )
     else:
-        raise ClientException("Payload does not fulfill trigger requirements")
+        log.warning(
+            f"Invocation took {duration_ms}ms (threshold: {threshold_ms}ms) -- Profile:\n{collapsed}"
+        )
 
 
-class ClientException(Exception):
-    """Wraps around client-related errors"""
+def is_warm_up_event(event) -> bool:
+    """Returns True if the event was sent by the scheduled warm-up rule or a keep-alive client"""
+    return isinstance(event, dict) and event.get("warm_up") is True
 
-    pass
 
+def warm_up() -> dict:
+    """
+    Loads everything the request path depends on without evaluating a payload so that the first
+    webhook request for the container doesn't pay for it:
+        - GitHub webhook secrets, GitHub token and GitHub App private key SSM values
+        - Filter groups config and the compiled regex and JSON path expressions within it
+        - GitHub API clients and their TLS connections
+    """
+    start = time.time()
 
-class LambdaException(Exception):
-    """Wraps around all function errors"""
+    get_secret_registry()
+    get_github_apps()
 
-    pass
+    # repos commonly share tokens so each distinct token is only loaded and warmed once
+    token_ssm_keys = sorted(
+        set(json.loads(os.environ.get("TOKEN_SSM_KEYS", "{}")).values())
+    )
+    tokens = sorted(set(get_ssm_values(token_ssm_keys).values()))
 
+    load_filter_config()
 
-class ServerException(Exception):
-    """Wraps around all server-related errors"""
+    def warm_client(token: Optional[str]) -> None:
+        # rate limit requests don't count against the rate limit quota and seed the container's budgets
+        core = get_github_client(token).get_rate_limit().core
+        get_rate_limit_governor().record(
+            rate_limit_key(token),
+            core.remaining,
+            calendar.timegm(core.reset.utctimetuple()),
+        )
 
-    pass
+    # clients are created up front given that the client cache isn't thread-safe
+    clients = [None] + tokens
+    for token in clients:
+        get_github_client(token)
+    with ThreadPoolExecutor(max_workers=min(len(clients), 8)) as executor:
+        list(executor.map(warm_client, clients))
+
+    log.info(f"Warm-up duration: {round(time.time() - start, 3)}s")
+    return {"message": "Function is warm"}
+
+
+def get_ssm_value(name: str) -> str:
+    """
+    Returns the decrypted SSM Parameter Store value. Values are cached within the container for
+    `SSM_CACHE_TTL` seconds (defaults to 300) so that warm invocations don't make a round trip to SSM.
+
+    :param name: SSM Parameter Store key
+    """
+    cached = _ssm_cache.get(name)
+    if cached and cached[1] > time.time():
+        return cached[0]
+
+    value = guarded(
+        "SSM",
+        within_deadline,
+        "ssm.get_parameter",
+        ssm.get_parameter,
+        Name=name,
+        WithDecryption=True,
+    )["Parameter"]["Value"]
+    _ssm_cache[name] = (value, time.time() + int(os.environ.get("SSM_CACHE_TTL", 300)))
+
+    return value
+
+
+def get_ssm_values(names: List[str]) -> dict:
+    """
+    Returns the decrypted SSM Parameter Store values of the keys that exist. Uncached values are loaded
+    within batches of 10 (the GetParameters API limit) and cached like `get_ssm_value()`.
+
+    :param names: SSM Parameter Store keys
+    """
+    values = {}
+    uncached = []
+    for name in names:
+        cached = _ssm_cache.get(name)
+        if cached and cached[1] > time.time():
+            values[name] = cached[0]
+        else:
+            uncached.append(name)
+
+    if len(uncached) == 1:
+        values[uncached[0]] = get_ssm_value(uncached[0])
+        return values
+
+    expires = time.time() + int(os.environ.get("SSM_CACHE_TTL", 300))
+    while uncached:
+        batch, uncached = uncached[:10], uncached[10:]
+        response = guarded(
+            "SSM",
+            within_deadline,
+            "ssm.get_parameters",
+            ssm.get_parameters,
+            Names=batch,
+            WithDecryption=True,
+        )
+        if response.get("InvalidParameters"):
+            log.error(f"SSM parameters not found: {response['InvalidParameters']}")
+        for parameter in response["Parameters"]:
+            values[parameter["Name"]] = parameter["Value"]
+            _ssm_cache[parameter["Name"]] = (parameter["Value"], expires)
+
+    return values
+
+
+def get_github_client(token: Optional[str] = None) -> github.Github:
+    """
+    Returns a GitHub client for the token. Clients are reused across invocations so that their
+    underlying HTTP session keeps the connection to the GitHub API open.
+
+    :param token: GitHub token. If None, an unauthenticated client is returned
+    """
+    if token not in _github_clients:
+        _github_clients[token] = github.Github(
+            token,
+            base_url=os.environ.get(
+                "GITHUB_API_URL", github.MainClass.DEFAULT_BASE_URL
+            ),
+        )
+
+    return _github_clients[token]
+
+
+def _newer_budget(
+    current: Optional[Tuple[int, int]], remaining: int, reset: int
+) -> bool:
+    """
+    Returns True if the observed budget supersedes the current budget. Concurrent containers report
+    their observations out of order so a higher remaining value within the same rate limit window is stale.
+    """
+    return (
+        current is None
+        or reset > current[1]
+        or (reset == current[1] and remaining < current[0])
+    )
+
+
+class LocalRateLimitStore:
+    """
+    Keeps the GitHub API rate limit budgets within the container. Used when no shared store is configured
+    and as a stand-in for the shared store within tests.
+    """
+
+    def __init__(self):
+        self.budgets = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[int, int]]:
+        """Returns the budget's remaining requests and reset epoch time or None if the budget is unknown"""
+        return self.budgets.get(key)
+
+    def put(self, key: str, remaining: int, reset: int) -> None:
+        """Records the budget unless a newer budget was already recorded"""
+        with self.lock:
+            if _newer_budget(self.budgets.get(key), remaining, reset):
+                self.budgets[key] = (remaining, reset)
+
+
+class DynamoDBRateLimitStore:
+    """
+    Shares the GitHub API rate limit budgets across containers via an AWS DynamoDB table with the
+    string partition key `budget`. Items expire via the table's `expires` TTL attribute once their
+    rate limit window resets.
+
+    :param table: AWS DynamoDB table name
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+        self.client = boto3.client("dynamodb")
+
+    def get(self, key: str) -> Optional[Tuple[int, int]]:
+        """Returns the budget's remaining requests and reset epoch time or None if the budget is unknown"""
+        item = self.client.get_item(
+            TableName=self.table, Key={"budget": {"S": key}}
+        ).get("Item")
+        if not item:
+            return None
+
+        return int(item["remaining"]["N"]), int(item["reset"]["N"])
+
+    def put(self, key: str, remaining: int, reset: int) -> None:
+        """Records the budget unless a newer budget was already recorded"""
+        try:
+            self.client.put_item(
+                TableName=self.table,
+                Item={
+                    "budget": {"S": key},
+                    "remaining": {"N": str(remaining)},
+                    "reset": {"N": str(reset)},
+                    "expires": {"N": str(reset + 60)},
+                },
+                ConditionExpression="attribute_not_exists(#budget) OR #reset < :reset OR (#reset = :reset AND #remaining > :remaining)",
+                ExpressionAttributeNames={
+                    "#budget": "budget",
+                    "#reset": "reset",
+                    "#remaining": "remaining",
+                },
+                ExpressionAttributeValues={
+                    ":reset": {"N": str(reset)},
+                    ":remaining": {"N": str(remaining)},
+                },
+            )
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+
+
+class RateLimitGovernor:
+    """
+    Shares the GitHub API rate limit budget of each credential across containers. Budgets are observed
+    from the `X-RateLimit-*` headers of GitHub responses and published to the store so that once the
+    quota is low, requests fail fast or are deferred until the budget resets instead of spending latency
+    on GitHub requests that are rejected.
+
+    :param store: Store the budgets are shared through (see `LocalRateLimitStore`)
+    :param reserve: Number of requests kept back from each budget
+    :param max_wait: Maximum seconds a request is deferred until its budget resets. Requests that would
+        need to wait longer fail fast.
+    :param sync_interval: Minimum seconds between reads of a budget from the store
+    :param publish_step: Number of requests a budget's remaining quota drops by between writes to the store.
+        Budgets are written whenever their rate limit window resets and on every observation once their
+        remaining quota is within `publish_step` of the reserve. Every observation is written if 0.
+    """
+
+    def __init__(
+        self,
+        store,
+        reserve: int = 0,
+        max_wait: float = 0,
+        sync_interval: float = 0,
+        publish_step: int = 0,
+    ):
+        self.store = store
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.sync_interval = sync_interval
+        self.publish_step = publish_step
+        self.budgets = {}
+        self.next_sync = {}
+        # latest budget of each key written to the store by the container
+        self.published = {}
+
+    def budget(self, key: str) -> Optional[Tuple[int, int]]:
+        """Returns the latest known budget of the key"""
+        if time.time() >= self.next_sync.get(key, 0):
+            self.next_sync[key] = time.time() + self.sync_interval
+            try:
+                shared = self.store.get(key)
+            except Exception as e:
+                # the container's own observations are used while the store is unavailable
+                log.error(e, exc_info=True)
+                shared = None
+            if shared and _newer_budget(self.budgets.get(key), *shared):
+                self.budgets[key] = shared
+
+        return self.budgets.get(key)
+
+    def acquire(self, key: str) -> None:
+        """
+        Returns once the budget allows a request. Raises ServerException if the budget is exhausted
+        and doesn't reset within `max_wait` seconds.
+
+        :param key: Budget key (see `rate_limit_key()`)
+        """
+        budget = self.budget(key)
+        if budget is None:
+            return
+
+        remaining, reset = budget
+        wait = reset - time.time()
+        if remaining > self.reserve or wait <= 0:
+            return
+
+        if wait > self.max_wait:
+            log.error(
+                f"GitHub API rate limit budget is exhausted -- Remaining: {remaining} Resets in: {round(wait)}s"
+            )
+            raise ServerException("GitHub API rate limit exceeded")
+
+        if _deadline is not None and wait >= _deadline.remaining():
+            raise DeadlineExceededException(
+                "Deadline exceeded before the GitHub API rate limit resets"
+            )
+
+        log.warning(
+            f"Deferring GitHub API request {round(wait, 3)}s until rate limit reset"
+        )
+        time.sleep(wait)
+
+    def observe(self, key: str, gh: github.Github) -> None:
+        """
+        Records the budget reported by the client's latest GitHub response
+
+        :param key: Budget key (see `rate_limit_key()`)
+        :param gh: GitHub client that made the request
+        """
+        try:
+            # the client requests the rate limit, which doesn't count against the quota, if no response had the headers
+            remaining, limit = gh.rate_limiting
+            reset = gh.rate_limiting_resettime
+        except Exception as e:
+            log.error(e, exc_info=True)
+            return
+        if limit < 0 or not reset:
+            return
+
+        self.record(key, remaining, reset)
+
+    def record(self, key: str, remaining: int, reset: int) -> None:
+        """
+        Records the budget and writes it to the store if it differs enough from the container's latest
+        written budget (see `publishable()`)
+
+        :param key: Budget key (see `rate_limit_key()`)
+        :param remaining: Remaining requests
+        :param reset: Epoch time the budget resets at
+        """
+        if _newer_budget(self.budgets.get(key), remaining, reset):
+            self.budgets[key] = (remaining, reset)
+            if self.publishable(key, remaining, reset):
+                try:
+                    self.store.put(key, remaining, reset)
+                    self.published[key] = (remaining, reset)
+                except Exception as e:
+                    log.error(e, exc_info=True)
+
+    def publishable(self, key: str, remaining: int, reset: int) -> bool:
+        """Returns True if the observed budget differs enough from the container's latest written budget"""
+        published = self.published.get(key)
+        return (
+            published is None
+            or reset != published[1]
+            or remaining <= self.reserve + self.publish_step
+            or published[0] - remaining >= self.publish_step
+        )
+
+
+def rate_limit_key(token: Optional[str] = None) -> str:
+    """
+    Returns the key of the token's rate limit budget. Tokens are hashed so that they aren't stored.
+    Unauthenticated requests are limited per IP address so their budget is only accurate across
+    containers that share an egress IP address (e.g. a VPC NAT gateway).
+
+    :param token: GitHub token. If None, the unauthenticated budget's key is returned
+    """
+    if token is None:
+        return "anonymous"
+
+    return "token:" + hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+def get_rate_limit_governor() -> RateLimitGovernor:
+    """
+    Returns the container's rate limit governor based on the function's env vars:
+        - `GITHUB_RATE_LIMIT_TABLE`: AWS DynamoDB table the budgets are shared through. Otherwise the
+            budgets are only known within the container.
+        - `GITHUB_RATE_LIMIT_RESERVE`: Number of requests kept back from each budget (defaults to 0)
+        - `GITHUB_RATE_LIMIT_MAX_WAIT`: Maximum seconds requests are deferred (defaults to 0)
+        - `GITHUB_RATE_LIMIT_SYNC_INTERVAL`: Minimum seconds between reads of the shared budgets (defaults to 5)
+        - `GITHUB_RATE_LIMIT_PUBLISH_STEP`: Number of requests a budget drops by between writes to the shared
+            budgets (defaults to 100)
+    """
+    global _rate_limit_governor
+    if _rate_limit_governor is None:
+        if os.environ.get("GITHUB_RATE_LIMIT_TABLE"):
+            store = DynamoDBRateLimitStore(os.environ["GITHUB_RATE_LIMIT_TABLE"])
+            sync_interval = float(os.environ.get("GITHUB_RATE_LIMIT_SYNC_INTERVAL", 5))
+            publish_step = int(os.environ.get("GITHUB_RATE_LIMIT_PUBLISH_STEP", 100))
+        else:
+            store = LocalRateLimitStore()
+            sync_interval = 0
+            publish_step = 0
+
+        _rate_limit_governor = RateLimitGovernor(
+            store,
+            reserve=int(os.environ.get("GITHUB_RATE_LIMIT_RESERVE", 0)),
+            max_wait=float(os.environ.get("GITHUB_RATE_LIMIT_MAX_WAIT", 0)),
+            sync_interval=sync_interval,
+            publish_step=publish_step,
+        )
+
+    return _rate_limit_governor
+
+
+@contextmanager
+def rate_limited(gh: github.Github, key: str):
+    """
+    Governs the GitHub API requests made within the context by the client's rate limit budget
+
+    :param gh: GitHub client that makes the requests
+    :param key: Budget key of the client's token (see `rate_limit_key()`)
+    """
+    governor = get_rate_limit_governor()
+    governor.acquire(key)
+    try:
+        yield
+    except github.RateLimitExceededException as e:
+        log.error(e, exc_info=True)
+        raise ServerException("GitHub API rate limit exceeded")
+    finally:
+        governor.observe(key, gh)
+
+
+# GitHub response statuses that are retried
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def is_retryable(error: Exception) -> bool:
+    """Returns True if the GitHub request failed with a transient error"""
+    if isinstance(error, github.RateLimitExceededException):
+        # exhausted budgets are handled by the rate limit governor
+        return False
+    if isinstance(error, github.GithubException):
+        return error.status in RETRYABLE_STATUSES
+
+    return isinstance(
+        error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    )
+
+
+class RequestPolicy:
+    """
+    Retries and hedges idempotent GitHub API calls:
+        - Calls that fail with a transient error (see `is_retryable()`) are retried up to `max_attempts`
+            times after a capped exponential backoff with full jitter
+        - Attempts that take longer than the `hedge_percentile` percentile of the call's recent latencies
+            are hedged with a duplicate attempt and whichever attempt succeeds first is used
+
+    Retries, hedges and hedges that won are counted within the function's metrics (see `emit_metric()`).
+
+    :param max_attempts: Maximum attempts per call
+    :param base_delay: Backoff ceiling in seconds before the first retry. The ceiling doubles per retry.
+    :param max_delay: Maximum backoff ceiling in seconds
+    :param hedge_percentile: Latency percentile after which attempts are hedged. Hedging is disabled if 0.
+    :param min_samples: Minimum latencies recorded for a call before its attempts are hedged
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 1,
+        base_delay: float = 0.1,
+        max_delay: float = 2,
+        hedge_percentile: float = 0,
+        min_samples: int = 20,
+    ):
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        # recent latencies (seconds) of each call name
+        self.latencies = {}
+        self.executor = None
+
+    def hedge_delay(self, name: str) -> Optional[float]:
+        """Returns the seconds after which the call's attempt is hedged or None if it isn't hedged"""
+        latencies = self.latencies.get(name)
+        if not self.hedge_percentile or not latencies:
+            return None
+        if len(latencies) < self.min_samples:
+            return None
+
+        ordered = sorted(latencies)
+        return ordered[
+            min(int(len(ordered) * self.hedge_percentile / 100), len(ordered) - 1)
+        ]
+
+    def timed(self, name: str, func: Callable, *args, **kwargs):
+        """Returns the function's result and records its latency"""
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.latencies.setdefault(name, deque(maxlen=200)).append(
+            time.perf_counter() - start
+        )
+
+        return result
+
+    def attempt(self, name: str, func: Callable, *args, **kwargs):
+        """
+        Returns the result of a single attempt that is hedged once it takes longer than the call's
+        hedge delay (see `hedge_delay()`)
+        """
+        delay = self.hedge_delay(name)
+        if delay is None:
+            return self.timed(name, func, *args, **kwargs)
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=8)
+        pending = {self.executor.submit(self.timed, name, func, *args, **kwargs)}
+        done, pending = wait(pending, timeout=delay)
+        hedge = None
+        if not done:
+            log.info(f"Hedging {name} after {round(delay * 1000, 3)}ms")
+            emit_metric("GitHubHedgedRequests")
+            hedge = self.executor.submit(self.timed, name, func, *args, **kwargs)
+            pending.add(hedge)
+
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        emit_metric("GitHubHedgeWins")
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    def call(self, name: str, func: Callable, *args, **kwargs):
+        """
+        Returns the function's result. Transient errors are retried within the invocation's deadline.
+
+        :param name: Name of the call that the latencies are recorded under
+        :param func: Function that makes the GitHub API call(s)
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return self.attempt(name, func, *args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_attempts or not is_retryable(e):
+                    raise
+                backoff = random.uniform(
+                    0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                )
+                if _deadline is not None and backoff >= _deadline.remaining():
+                    raise
+                log.warning(
+                    f"Retrying {name} in {round(backoff, 3)}s -- Attempt {attempt} failed: {e}"
+                )
+                emit_metric("GitHubRetries")
+                time.sleep(backoff)
+
+
+def get_request_policy() -> RequestPolicy:
+    """
+    Returns the container's GitHub request policy based on the function's env vars:
+        - `GITHUB_RETRY_MAX_ATTEMPTS`: Maximum attempts per GitHub API call (defaults to 1)
+        - `GITHUB_RETRY_BASE_DELAY`: Backoff ceiling in seconds before the first retry (defaults to 0.1)
+        - `GITHUB_RETRY_MAX_DELAY`: Maximum backoff ceiling in seconds (defaults to 2)
+        - `GITHUB_HEDGE_PERCENTILE`: Latency percentile after which calls are hedged (defaults to 0 which disables hedging)
+    """
+    global _request_policy
+    if _request_policy is None:
+        _request_policy = RequestPolicy(
+            max_attempts=int(os.environ.get("GITHUB_RETRY_MAX_ATTEMPTS", 1)),
+            base_delay=float(os.environ.get("GITHUB_RETRY_BASE_DELAY", 0.1)),
+            max_delay=float(os.environ.get("GITHUB_RETRY_MAX_DELAY", 2)),
+            hedge_percentile=float(os.environ.get("GITHUB_HEDGE_PERCENTILE") or 0),
+        )
+
+    return _request_policy
+
+
+def github_call(name: str, func: Callable, *args, **kwargs):
+    """
+    Calls the idempotent GitHub API function through the container's request policy (see `RequestPolicy`)
+    bounded by the invocation's deadline (see `within_deadline()`) and GitHub's circuit breaker (see `guarded()`)
+
+    :param name: Name of the call
+    :param func: Function that makes the GitHub API call(s)
+    """
+    return guarded(
+        "GitHub",
+        within_deadline,
+        name,
+        get_request_policy().call,
+        name,
+        func,
+        *args,
+        **kwargs,
+    )
+
+
+class GitHubApp:
+    """
+    GitHub App whose installation tokens are minted with the app's JWT and cached within the container
+    until shortly before they expire
+
+    :param app_id: GitHub App ID
+    :param private_key: GitHub App's PEM private key used to sign the app's JWT
+    """
+
+    def __init__(self, app_id: str, private_key: str):
+        self.app_id = app_id
+        self.base_url = os.environ.get(
+            "GITHUB_API_URL", github.MainClass.DEFAULT_BASE_URL
+        )
+        self.integration = github.GithubIntegration(
+            app_id, private_key, base_url=self.base_url
+        )
+        self.installations = {}
+        self.tokens = {}
+
+    def request(self, method: str, path: str) -> requests.Response:
+        """
+        Sends a request signed with the app's JWT. PyGithub's `GithubIntegration` requests have no timeout
+        and `get_installation()` doesn't check the response status so the requests are sent here instead.
+        Requests time out after `GITHUB_APP_REQUEST_TIMEOUT` seconds (defaults to 10) or once the invocation's
+        deadline passes.
+
+        :param method: HTTP method
+        :param path: Path of the GitHub API endpoint
+        """
+        return requests.request(
+            method,
+            f"{self.base_url}{path}",
+            headers={
+                "Authorization": f"Bearer {self.integration.create_jwt()}",
+                "Accept": "application/vnd.github.v3+json",
+                "User-Agent": "PyGithub/Python",
+            },
+            timeout=call_timeout(
+                f"{method} {path}",
+                float(os.environ.get("GITHUB_APP_REQUEST_TIMEOUT", 10)),
+            ),
+        )
+
+    def installation_id(self, full_name: str) -> Optional[int]:
+        """
+        Returns the ID of the app's installation that has access to the repository or None if the app
+        isn't installed for the repository. Lookups are signed with the app's JWT so they don't count
+        against any installation's rate limit. Only a 404 response is cached as not installed so that
+        other failures are retried on the next lookup.
+
+        :param full_name: Repository's full name
+        """
+        if full_name not in self.installations:
+            response = self.request("GET", f"/repos/{full_name}/installation")
+            if response.status_code == 404:
+                self.installations[full_name] = None
+            elif response.status_code == 200:
+                self.installations[full_name] = response.json()["id"]
+            else:
+                raise github.GithubException(response.status_code, response.text)
+
+        return self.installations[full_name]
+
+    def installation_token(self, installation_id: int) -> str:
+        """
+        Returns the installation's cached token. A new token is minted once the cached token expires
+        within `GITHUB_APP_TOKEN_REFRESH_MARGIN` seconds (defaults to 300).
+
+        :param installation_id: GitHub App installation ID
+        """
+        cached = self.tokens.get(installation_id)
+        margin = int(os.environ.get("GITHUB_APP_TOKEN_REFRESH_MARGIN", 300))
+        if cached and cached[1] - margin > time.time():
+            return cached[0]
+
+        response = self.request(
+            "POST", f"/app/installations/{installation_id}/access_tokens"
+        )
+        if response.status_code != 201:
+            raise github.GithubException(response.status_code, response.text)
+        authorization = response.json()
+        self.tokens[installation_id] = (
+            authorization["token"],
+            calendar.timegm(
+                time.strptime(authorization["expires_at"], "%Y-%m-%dT%H:%M:%SZ")
+            ),
+        )
+        if cached:
+            # the expired token's client can't be used again
+            _github_clients.pop(cached[0], None)
+
+        return authorization["token"]
+
+
+def get_github_apps() -> List[GitHubApp]:
+    """
+    Returns the GitHub Apps defined within the function's `GITHUB_APPS` env var. The env var is a JSON
+    list of objects with the app's `app_id` and the SSM Parameter Store key of the app's private key
+    (`private_key_ssm_key`).
+    """
+    global _github_apps
+    if _github_apps is None:
+        apps = json.loads(os.environ.get("GITHUB_APPS", "[]"))
+        private_keys = get_ssm_values([app["private_key_ssm_key"] for app in apps])
+        _github_apps = [
+            GitHubApp(app["app_id"], private_keys[app["private_key_ssm_key"]])
+            for app in apps
+        ]
+
+    return _github_apps
+
+
+def github_credentials(full_name: str, token_ssm_key: Optional[str] = None) -> list:
+    """
+    Returns the credentials that have access to the repository as a list of budget key (see
+    `rate_limit_key()`) and token pairs. The pool consists of the repository's token followed by the
+    installation tokens of the GitHub Apps installed for the repository. Credentials that can't be
+    loaded are left out of the pool.
+
+    :param full_name: Repository's full name
+    :param token_ssm_key: SSM Parameter Store key of the repository's GitHub token
+    """
+    credentials = []
+    if token_ssm_key:
+        token = get_ssm_value(token_ssm_key)
+        credentials.append((rate_limit_key(token), token))
+
+    for app in get_github_apps():
+        try:
+            installation_id = app.installation_id(full_name)
+            if installation_id is None:
+                continue
+            credentials.append(
+                (
+                    f"app:{app.app_id}:installation:{installation_id}",
+                    app.installation_token(installation_id),
+                )
+            )
+        except Exception as e:
+            log.error(e, exc_info=True)
+
+    return credentials
+
+
+def select_github_credential(credentials: list) -> Tuple[str, Optional[str]]:
+    """
+    Returns the budget key and token of the credential with the most remaining rate limit budget.
+    Credentials with an unknown budget are preferred so that every credential's budget is observed
+    and ties are broken by the credentials' order. If the pool is empty, the unauthenticated
+    credential is returned.
+
+    :param credentials: Pool of budget key and token pairs (see `github_credentials()`)
+    """
+    if not credentials:
+        return rate_limit_key(), None
+
+    governor = get_rate_limit_governor()
+
+    def remaining(credential):
+        budget = governor.budget(credential[0])
+        if budget is None or budget[1] <= time.time():
+            return float("inf")
+        return budget[0]
+
+    return max(credentials, key=remaining)
+
+
+class FileConfigStore:
+    """
+    Loads the filter groups from a local JSON file
+
+    :param path: Path to the JSON file
+    :param watch: Determines if the file is reloaded when its modification time changes. The file
+        packaged with the function can't change so it's only loaded once per container.
+    """
+
+    def __init__(self, path: str, watch: bool = False):
+        self.path = path
+        self.watch = watch
+
+    def fetch(self, version: Optional[str]) -> Optional[Tuple[dict, str]]:
+        """Returns the filter groups and their version or None if the version hasn't changed"""
+        if self.watch:
+            stat = os.stat(self.path)
+            latest_version = f"{stat.st_mtime_ns}-{stat.st_size}"
+        else:
+            latest_version = "package"
+
+        if latest_version == version:
+            return None
+
+        with open(self.path) as f:
+            return json.load(f), latest_version
+
+
+class S3ConfigStore:
+    """
+    Loads the filter groups from an AWS S3 object. Conditional requests are used so that unchanged
+    objects aren't downloaded again.
+
+    :param bucket: AWS S3 bucket name
+    :param key: AWS S3 object key
+    """
+
+    def __init__(self, bucket: str, key: str):
+        self.bucket = bucket
+        self.key = key
+        self.client = boto3.client("s3")
+
+    def fetch(self, version: Optional[str]) -> Optional[Tuple[dict, str]]:
+        """Returns the filter groups and the object's ETag or None if the ETag hasn't changed"""
+        kwargs = {"Bucket": self.bucket, "Key": self.key}
+        if version:
+            kwargs["IfNoneMatch"] = version
+        try:
+            response = self.client.get_object(**kwargs)
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ["304", "NotModified"]:
+                return None
+            raise
+
+        return json.loads(response["Body"].read()), response["ETag"]
+
+
+class SSMConfigStore:
+    """
+    Loads the filter groups from an AWS SSM Parameter Store value
+
+    :param name: SSM Parameter Store key
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def fetch(self, version: Optional[str]) -> Optional[Tuple[dict, str]]:
+        """Returns the filter groups and the parameter's version or None if the version hasn't changed"""
+        parameter = ssm.get_parameter(Name=self.name, WithDecryption=True)["Parameter"]
+        if str(parameter["Version"]) == version:
+            return None
+
+        return json.loads(parameter["Value"]), str(parameter["Version"])
+
+
+class RepoConfigStore:
+    """
+    Base of the stores that hold one artifact per repo so that a change to one repo's filter groups
+    only changes that repo's artifact. Each artifact is a JSON object with the repo's key (`key`) and
+    filter groups (`filter_groups`). The store's version is derived from the version of every artifact
+    and only the artifacts whose version changed are read again.
+
+    Subclasses define `list()` which returns the version of each artifact keyed by the artifact's ID
+    and `read()` which returns the artifact's content. Subclasses that can read several artifacts per
+    request override `read_many()`.
+    """
+
+    def __init__(self):
+        # version and content of each artifact read so far keyed by the artifact's ID
+        self.artifacts = {}
+
+    def fetch(self, version: Optional[str]) -> Optional[Tuple[dict, str]]:
+        """Returns the filter groups of every repo and the store's version or None if no artifact changed"""
+        listing = self.list()
+        latest_version = hashlib.sha1(
+            json.dumps(sorted(listing.items())).encode("utf-8")
+        ).hexdigest()
+        if latest_version == version:
+            return None
+
+        changed = [
+            artifact_id
+            for artifact_id, artifact_version in listing.items()
+            if self.artifacts.get(artifact_id, (None,))[0] != artifact_version
+        ]
+        contents = self.read_many(changed) if changed else {}
+
+        artifacts = {}
+        for artifact_id, artifact_version in listing.items():
+            if artifact_id in contents:
+                artifacts[artifact_id] = (artifact_version, contents[artifact_id])
+            else:
+                artifacts[artifact_id] = self.artifacts[artifact_id]
+        self.artifacts = artifacts
+
+        return {
+            artifact["key"]: artifact["filter_groups"]
+            for _, artifact in artifacts.values()
+        }, latest_version
+
+    def read_many(self, artifact_ids: List[str]) -> dict:
+        """Returns the content of each artifact keyed by the artifact's ID"""
+        return {artifact_id: self.read(artifact_id) for artifact_id in artifact_ids}
+
+
+class DirectoryConfigStore(RepoConfigStore):
+    """
+    Loads the filter groups from a local directory of per-repo JSON files (see `RepoConfigStore`)
+
+    :param path: Path to the directory
+    :param watch: Determines if files are reloaded when their modification time changes. The directory
+        packaged with the function can't change so each file is only loaded once per container.
+    """
+
+    def __init__(self, path: str, watch: bool = False):
+        super().__init__()
+        self.path = path
+        self.watch = watch
+
+    def list(self) -> dict:
+        listing = {}
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.path, name)
+            if self.watch:
+                stat = os.stat(path)
+                listing[path] = f"{stat.st_mtime_ns}-{stat.st_size}"
+            else:
+                listing[path] = "package"
+
+        return listing
+
+    def read(self, artifact_id: str) -> dict:
+        with open(artifact_id) as f:
+            return json.load(f)
+
+
+class S3PrefixConfigStore(RepoConfigStore):
+    """
+    Loads the filter groups from the per-repo AWS S3 objects under the prefix (see `RepoConfigStore`).
+    Objects are listed to find their ETags so that only changed objects are downloaded.
+
+    :param bucket: AWS S3 bucket name
+    :param prefix: AWS S3 key prefix of the objects
+    """
+
+    def __init__(self, bucket: str, prefix: str):
+        super().__init__()
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3")
+
+    def list(self) -> dict:
+        listing = {}
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                listing[item["Key"]] = item["ETag"]
+
+        return listing
+
+    def read(self, artifact_id: str) -> dict:
+        response = self.client.get_object(Bucket=self.bucket, Key=artifact_id)
+        return json.loads(response["Body"].read())
+
+
+class SSMPathConfigStore(RepoConfigStore):
+    """
+    Loads the filter groups from the per-repo AWS SSM Parameter Store values under the path
+    (see `RepoConfigStore`). The `manifest` value under the path maps each value's name to the hash
+    of its content so that checking for a new version only reads the manifest and only the changed
+    values are read within batches of 10 (the GetParameters API limit).
+
+    :param path: SSM Parameter Store path of the values
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def list(self) -> dict:
+        manifest = ssm.get_parameter(Name=f"{self.path}manifest")["Parameter"]
+        return {
+            f"{self.path}{name}": version
+            for name, version in json.loads(manifest["Value"]).items()
+        }
+
+    def read(self, artifact_id: str) -> dict:
+        return self.read_many([artifact_id])[artifact_id]
+
+    def read_many(self, artifact_ids: List[str]) -> dict:
+        contents = {}
+        remaining = list(artifact_ids)
+        while remaining:
+            batch, remaining = remaining[:10], remaining[10:]
+            response = ssm.get_parameters(Names=batch, WithDecryption=True)
+            if response.get("InvalidParameters"):
+                raise ServerException(
+                    f"Filter groups parameters not found: {response['InvalidParameters']}"
+                )
+            for parameter in response["Parameters"]:
+                contents[parameter["Name"]] = json.loads(parameter["Value"])
+
+        return contents
+
+
+def get_config_store():
+    """
+    Returns the store the filter groups are loaded from based on the function's env vars:
+        - `FILTER_GROUPS_S3_BUCKET` and `FILTER_GROUPS_S3_PREFIX`: Per-repo AWS S3 objects under the prefix
+        - `FILTER_GROUPS_S3_BUCKET` and `FILTER_GROUPS_S3_KEY`: AWS S3 object
+        - `FILTER_GROUPS_SSM_PATH`: Per-repo AWS SSM Parameter Store values under the path
+        - `FILTER_GROUPS_SSM_KEY`: AWS SSM Parameter Store value
+        - `FILTER_GROUPS_PATH`: Local JSON file or directory of per-repo JSON files that is reloaded when modified
+        - Otherwise, the filter_groups directory or filter_groups.json file packaged with the function
+    """
+    global _config_store
+    if _config_store is None:
+        packaged = os.path.join(os.path.dirname(__file__), "filter_groups")
+        if os.environ.get("FILTER_GROUPS_S3_PREFIX"):
+            _config_store = S3PrefixConfigStore(
+                os.environ["FILTER_GROUPS_S3_BUCKET"],
+                os.environ["FILTER_GROUPS_S3_PREFIX"],
+            )
+        elif os.environ.get("FILTER_GROUPS_S3_BUCKET"):
+            _config_store = S3ConfigStore(
+                os.environ["FILTER_GROUPS_S3_BUCKET"],
+                os.environ["FILTER_GROUPS_S3_KEY"],
+            )
+        elif os.environ.get("FILTER_GROUPS_SSM_PATH"):
+            _config_store = SSMPathConfigStore(os.environ["FILTER_GROUPS_SSM_PATH"])
+        elif os.environ.get("FILTER_GROUPS_SSM_KEY"):
+            _config_store = SSMConfigStore(os.environ["FILTER_GROUPS_SSM_KEY"])
+        elif os.environ.get("FILTER_GROUPS_PATH"):
+            if os.path.isdir(os.environ["FILTER_GROUPS_PATH"]):
+                _config_store = DirectoryConfigStore(
+                    os.environ["FILTER_GROUPS_PATH"], watch=True
+                )
+            else:
+                _config_store = FileConfigStore(
+                    os.environ["FILTER_GROUPS_PATH"], watch=True
+                )
+        elif os.path.isdir(packaged):
+            _config_store = DirectoryConfigStore(packaged)
+        else:
+            _config_store = FileConfigStore(f"{packaged}.json")
+
+    return _config_store
+
+
+def load_filter_config() -> "FilterConfig":
+    """
+    Returns the compiled filter groups config. The store's version is checked at most once every
+    `FILTER_GROUPS_TTL` seconds (defaults to 60) and a changed config is compiled before it replaces
+    the current one so that in-flight requests keep using a consistent config.
+    """
+    global _filter_config, _next_config_check
+    if _filter_config is not None and time.time() < _next_config_check:
+        return _filter_config
+
+    try:
+        latest = get_config_store().fetch(
+            _filter_config.version if _filter_config else None
+        )
+    except Exception as e:
+        if _filter_config is None:
+            raise
+        # a stale config is preferred over failing every request while the store is unavailable
+        log.error(e, exc_info=True)
+        latest = None
+
+    if latest is not None:
+        filter_groups, version = latest
+        log.info(f"Loading filter groups version: {version}")
+        log.debug(f"All repos filter groups:\n{filter_groups}")
+        _filter_config = FilterConfig(filter_groups, version)
+
+    _next_config_check = time.time() + int(os.environ.get("FILTER_GROUPS_TTL", 60))
+    return _filter_config
+
+
+class RepoIndex:
+    """
+    Resolves a repository to the key of its filter groups within filter_groups.json. Keys are either:
+        - Exact repository full names (e.g. `owner/repo`) or names (e.g. `repo`)
+        - Glob patterns prefixed with `glob:` (e.g. `glob:owner/service-*`)
+        - Regex patterns prefixed with `regex:` (e.g. `regex:owner/(api|web)-.+`)
+
+    Exact keys are looked up within a dict first. Patterns are matched against the repository's full name
+    in the order they're defined via a single precompiled regex so the lookup cost doesn't grow with the
+    number of exact keys.
+    """
+
+    def __init__(self, keys: List[str]):
+        self.exact = {}
+        self.pattern_keys = []
+        patterns = []
+        for key in keys:
+            kind, _, pattern = key.partition(":")
+            if kind == "glob":
+                patterns.append(fnmatch.translate(pattern))
+            elif kind == "regex":
+                patterns.append(f"(?:{pattern})\\Z")
+            else:
+                # GitHub repository names are case insensitive
+                self.exact[key.lower()] = key
+                continue
+            self.pattern_keys.append(key)
+
+        # each pattern is wrapped within a named group so the matched key can be found via the outermost matched group
+        self.pattern = (
+            re.compile(
+                "|".join(
+                    f"(?P<_repo_pattern_{i}>{pattern})"
+                    for i, pattern in enumerate(patterns)
+                ),
+                re.IGNORECASE,
+            )
+            if patterns
+            else None
+        )
+
+    def lookup(self, full_name: str, name: Optional[str] = None) -> Optional[str]:
+        """
+        Returns the filter groups key for the repository or None if no key matches
+
+        :param full_name: Repository full name (e.g. `owner/repo`)
+        :param name: Repository name (e.g. `repo`)
+        """
+        for candidate in (full_name, name):
+            if candidate is not None and candidate.lower() in self.exact:
+                return self.exact[candidate.lower()]
+
+        if self.pattern and full_name:
+            match = self.pattern.match(full_name)
+            if match:
+                return self.pattern_keys[int(match.lastgroup.split("_")[-1])]
+
+
+# compiled expressions are shared by every filter that uses the same pattern or JSON path
+compile_pattern = lru_cache(maxsize=None)(re.compile)
+compile_json_path = lru_cache(maxsize=None)(parse)
+
+
+def compile_filter_groups(filter_groups: List[List[dict]]) -> None:
+    """
+    Compiles the regex patterns and JSON path expressions used within the filter groups
+
+    :param filter_groups: List of filter groups
+    """
+    for group in filter_groups:
+        for filter_entry in group:
+            compile_pattern(filter_entry["pattern"])
+            if filter_entry["type"] not in REQUEST_MAPPING_TYPES:
+                compile_json_path(filter_entry["type"])
+
+
+def validate_sig(header_sig: str, payload: str, repo_key: Optional[str] = None) -> None:
+    """
+    Validates incoming request's sha256 value against every active secret of the repo
+
+    :param header_sig: Github webhook's `X-Hub-Signature-256` header value
+    :param payload: Github webhook payload. Must be in string version in order to accurately generate the expected signature
+    :param repo_key: Key of the repository within the secret registry. Defaults to the default secrets
+    """
+    if not header_sig:
+        raise ClientException("Request is missing the X-Hub-Signature-256 header")
+
+    try:
+        sha, sig = header_sig.split("=")
+    except ValueError:
+        raise ClientException("Signature not signed with sha256 (e.g. sha256=123456)")
+
+    if sha != "sha256":
+        raise ClientException("Signature not signed with sha256 (e.g. sha256=123456)")
+
+    log.debug(f"Actual signature: {sig}")
+    body = bytes(str(payload), "utf-8")
+
+    try:
+        registry = get_secret_registry()
+        authorized = registry.verify(str(sig), body, repo_key)
+        # the secret may have been rotated since the registry was loaded
+        if not authorized and registry.refreshable():
+            log.info("Signature did not match any secret -- Reloading secrets")
+            authorized = get_secret_registry(refresh=True).verify(
+                str(sig), body, repo_key
+            )
+    except (DeadlineExceededException, DependencyUnavailableException):
+        raise
+    except Exception as e:
+        log.error(e, exc_info=True)
+        raise ServerException("Internal server error")
+
+    if not authorized:
+        raise ClientException("Header signature and expected signature do not match")
+
+
+class SecretRegistry:
+    """
+    Webhook secrets indexed by repo key. Each secret is held as a prepared HMAC-SHA256 state so that
+    verifying a signature only hashes the request body once per candidate secret. Repos that aren't
+    within the registry use the default secrets.
+
+    The secrets' SSM Parameter Store keys are defined within the `GITHUB_WEBHOOK_SECRET_SSM_KEYS` env var as
+    `{"default": [<key>, ...], "repos": {<repo key>: [<key>, ...]}}` where each list holds the current
+    secret followed by any previous secrets that remain valid while the secret is rotated. If the env var
+    isn't defined, `GITHUB_WEBHOOK_SECRET_SSM_KEY` is the only default secret.
+    """
+
+    def __init__(self):
+        config = json.loads(
+            os.environ.get("GITHUB_WEBHOOK_SECRET_SSM_KEYS")
+            or json.dumps({"default": [os.environ["GITHUB_WEBHOOK_SECRET_SSM_KEY"]]})
+        )
+        self.default_keys = config.get("default", [])
+        self.repo_keys = config.get("repos", {})
+        self.loaded = time.time()
+
+        names = list(
+            dict.fromkeys(
+                self.default_keys
+                + [key for keys in self.repo_keys.values() for key in keys]
+            )
+        )
+        self.states = {
+            name: hmac.new(bytes(str(secret), "utf-8"), digestmod=hashlib.sha256)
+            for name, secret in get_ssm_values(names).items()
+        }
+        self.expires = self.loaded + int(os.environ.get("SSM_CACHE_TTL", 300))
+
+    def candidates(self, repo_key: Optional[str] = None) -> list:
+        """Returns the prepared HMAC states of the repo's active secrets"""
+        names = self.repo_keys.get(repo_key, self.default_keys)
+        states = [self.states[name] for name in names if name in self.states]
+        if not states:
+            raise ServerException(f"No webhook secrets could be loaded from: {names}")
+
+        return states
+
+    def verify(self, sig: str, body: bytes, repo_key: Optional[str] = None) -> bool:
+        """
+        Returns True if the signature matches the body's digest for any of the repo's active secrets
+
+        :param sig: Hex digest from the `X-Hub-Signature-256` header
+        :param body: Raw request body
+        :param repo_key: Key of the repository within the registry
+        """
+        for state in self.candidates(repo_key):
+            digest = state.copy()
+            digest.update(body)
+            if hmac.compare_digest(sig, digest.hexdigest()):
+                return True
+
+        return False
+
+    def refreshable(self) -> bool:
+        """Returns True if the registry is old enough to be reloaded after a signature mismatch"""
+        return time.time() - self.loaded >= int(
+            os.environ.get("SECRET_REFRESH_INTERVAL", 30)
+        )
+
+
+def get_secret_registry(refresh: bool = False) -> SecretRegistry:
+    """
+    Returns the container's secret registry. The registry is reloaded every `SSM_CACHE_TTL` seconds or
+    when `refresh` is True.
+
+    :param refresh: Determines if the secrets are reloaded from SSM rather than the SSM value cache
+    """
+    global _secret_registry
+
+    if refresh or _secret_registry is None or _secret_registry.expires <= time.time():
+        if refresh and _secret_registry is not None:
+            for name in _secret_registry.states:
+                _ssm_cache.pop(name, None)
+        _secret_registry = SecretRegistry()
+
+    return _secret_registry
+
+
+def _pull_request_fields(payload: dict) -> dict:
+    return {
+        "base_ref": lambda: payload["pull_request"]["base"]["ref"],
+        "head_ref": lambda: payload["pull_request"]["head"]["ref"],
+        "head_sha": lambda: payload["pull_request"]["head"]["sha"],
+    }
+
+
+# Target values of each event extracted from the payload. Events that aren't defined only have the
+# fields within COMMON_FIELD_EXTRACTORS and the remaining filter types are resolved via JSON path.
+EVENT_FIELD_EXTRACTORS = {
+    "push": lambda payload: {
+        "ref": lambda: payload["ref"],
+        "base_ref": lambda: payload["ref"],
+        "head_sha": lambda: payload["after"],
+        "commit_message": lambda: payload["head_commit"]["message"],
+    },
+    "pull_request": lambda payload: {
+        **_pull_request_fields(payload),
+        "pr_action": lambda: payload["action"],
+    },
+    "pull_request_review": _pull_request_fields,
+    "release": lambda payload: {
+        "ref": lambda: payload["release"]["tag_name"],
+        "base_ref": lambda: payload["release"]["target_commitish"],
+    },
+    "workflow_run": lambda payload: {
+        "ref": lambda: payload["workflow_run"]["head_branch"],
+        "head_ref": lambda: payload["workflow_run"]["head_branch"],
+        "head_sha": lambda: payload["workflow_run"]["head_sha"],
+        "commit_message": lambda: payload["workflow_run"]["head_commit"]["message"],
+    },
+    # issue comment payloads have no git refs so only the common fields are extracted
+    "issue_comment": lambda payload: {},
+    "create": lambda payload: {"ref": lambda: payload["ref"]},
+    "delete": lambda payload: {"ref": lambda: payload["ref"]},
+    "merge_group": lambda payload: {
+        "ref": lambda: payload["merge_group"]["head_ref"],
+        "base_ref": lambda: payload["merge_group"]["base_ref"],
+        "head_ref": lambda: payload["merge_group"]["head_ref"],
+        "head_sha": lambda: payload["merge_group"]["head_sha"],
+        "commit_message": lambda: payload["merge_group"]["head_commit"]["message"],
+    },
+}
+
+COMMON_FIELD_EXTRACTORS = {
+    "actor_account_id": lambda payload: payload["sender"]["id"],
+    "action": lambda payload: payload["action"],
+}
+
+
+# Payload paths read by the function for every event and for each event's field extractors. Paths
+# must be kept in sync with the extractors given that payload projections only include these paths
+# (see `project_json()`). Events that aren't defined read the common paths and `action`.
+COMMON_PAYLOAD_PATHS = ["repository.name", "repository.full_name", "sender.id"]
+EVENT_PAYLOAD_PATHS = {
+    "push": ["ref", "before", "after", "deleted", "head_commit.message"],
+    "pull_request": [
+        "action",
+        "pull_request.base.ref",
+        "pull_request.base.sha",
+        "pull_request.head.ref",
+        "pull_request.head.sha",
+    ],
+    "release": ["action", "release.tag_name", "release.target_commitish"],
+    "workflow_run": [
+        "action",
+        "workflow_run.head_branch",
+        "workflow_run.head_sha",
+        "workflow_run.head_commit.message",
+    ],
+    "issue_comment": ["action"],
+    "create": ["ref"],
+    "delete": ["ref"],
+    "merge_group": [
+        "action",
+        "merge_group.base_ref",
+        "merge_group.base_sha",
+        "merge_group.head_ref",
+        "merge_group.head_sha",
+        "merge_group.head_commit.message",
+    ],
+}
+EVENT_PAYLOAD_PATHS["pull_request_review"] = EVENT_PAYLOAD_PATHS["pull_request"]
+
+
+def _compare_file_paths(repo, base: str, head: str) -> List[str]:
+    return sorted({path.filename for path in repo.compare(base, head).files})
+
+
+# Commit range each event's `file_path` values are compared within. The changed files of a range
+# are immutable so they're cached across containers (see `get_changed_files_cache()`).
+# payload key of the commit ranges of the pushes coalesced into the payload's push (see `coalesce_push()`)
+COALESCED_RANGES_KEY = "coalesced_ranges"
+
+COMMIT_RANGE_EXTRACTORS = {
+    "push": lambda payload: (payload["before"], payload["after"]),
+    "pull_request": lambda payload: (
+        payload["pull_request"]["base"]["sha"],
+        payload["pull_request"]["head"]["sha"],
+    ),
+    "merge_group": lambda payload: (
+        payload["merge_group"]["base_sha"],
+        payload["merge_group"]["head_sha"],
+    ),
+}
+COMMIT_RANGE_EXTRACTORS["pull_request_review"] = COMMIT_RANGE_EXTRACTORS["pull_request"]
+
+# Target values of each event that require the GitHub API along with the name of the data fetch.
+# Values are only fetched if a filter needs them.
+REMOTE_FIELD_EXTRACTORS = {
+    "pull_request": {
+        "commit_message": (
+            "github.get_commit",
+            lambda repo, payload: repo.get_commit(
+                sha=payload["pull_request"]["head"]["sha"]
+            ).commit.message,
+        ),
+    },
+}
+REMOTE_FIELD_EXTRACTORS["pull_request_review"] = REMOTE_FIELD_EXTRACTORS["pull_request"]
+
+
+def changed_files_key(full_name: str, base: str, head: str) -> str:
+    """
+    Returns the content address of the repository's changed files within the commit range
+
+    :param full_name: Repository's full name
+    :param base: Base commit SHA
+    :param head: Head commit SHA
+    """
+    return hashlib.sha256(f"{full_name}:{base}...{head}".encode("utf-8")).hexdigest()
+
+
+def encode_paths(paths: List[str]) -> bytes:
+    """
+    Returns the compact form of the file paths. The paths are sorted and front coded (each path is
+    stored as the length of the prefix it shares with the previous path followed by the rest of the
+    path) before being zlib compressed.
+
+    :param paths: File paths
+    """
+    entries = []
+    previous = ""
+    for path in sorted(set(paths)):
+        shared = len(os.path.commonprefix([previous, path]))
+        entries.append([shared, path[shared:]])
+        previous = path
+
+    return zlib.compress(json.dumps(entries, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_paths(blob: bytes) -> List[str]:
+    """
+    Returns the sorted file paths of the compact form created by `encode_paths()`
+
+    :param blob: Compact form of the file paths
+    """
+    paths = []
+    previous = ""
+    for shared, suffix in json.loads(zlib.decompress(blob)):
+        previous = previous[:shared] + suffix
+        paths.append(previous)
+
+    return paths
+
+
+class LocalChangedFilesStore:
+    """
+    Keeps the changed files within the container. Used when no shared store is configured and as a
+    stand-in for the shared stores within tests.
+
+    :param max_entries: Maximum number of entries kept. The oldest entry is evicted first.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the entry's compact file paths or None if the entry doesn't exist"""
+        return self.entries.get(key)
+
+    def put(self, key: str, blob: bytes) -> None:
+        """Stores the entry's compact file paths"""
+        if len(self.entries) >= self.max_entries:
+            self.entries.pop(next(iter(self.entries)))
+        self.entries[key] = blob
+
+
+class DynamoDBChangedFilesStore:
+    """
+    Shares the changed files across containers via an AWS DynamoDB table with the string partition
+    key `range`. Items expire via the table's `expires` TTL attribute.
+
+    :param table: AWS DynamoDB table name
+    :param ttl: Seconds the entries are kept
+    """
+
+    def __init__(self, table: str, ttl: int):
+        self.table = table
+        self.ttl = ttl
+        self.client = boto3.client("dynamodb")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the entry's compact file paths or None if the entry doesn't exist"""
+        item = self.client.get_item(
+            TableName=self.table,
+            Key={"range": {"S": key}},
+            ProjectionExpression="#paths",
+            ExpressionAttributeNames={"#paths": "paths"},
+        ).get("Item")
+
+        return item["paths"]["B"] if item else None
+
+    def put(self, key: str, blob: bytes) -> None:
+        """Stores the entry's compact file paths"""
+        self.client.put_item(
+            TableName=self.table,
+            Item={
+                "range": {"S": key},
+                "paths": {"B": blob},
+                "expires": {"N": str(int(time.time()) + self.ttl)},
+            },
+        )
+
+
+class S3ChangedFilesStore:
+    """
+    Shares the changed files across containers via AWS S3 objects. Entries can be expired via the
+    bucket's lifecycle rules.
+
+    :param bucket: AWS S3 bucket name
+    :param prefix: AWS S3 key prefix of the entries
+    """
+
+    def __init__(self, bucket: str, prefix: str):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the entry's compact file paths or None if the entry doesn't exist"""
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ["404", "NoSuchKey"]:
+                return None
+            raise
+
+        return response["Body"].read()
+
+    def put(self, key: str, blob: bytes) -> None:
+        """Stores the entry's compact file paths"""
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=blob)
+
+
+class ChangedFilesCache:
+    """
+    Content-addressed cache of the file paths changed within commit ranges. Errors of the store are
+    logged and treated as cache misses so that an unavailable store only costs the GitHub API request.
+
+    :param store: Store the entries are kept within (see `LocalChangedFilesStore`)
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Returns the cached file paths or None if the entry doesn't exist"""
+        try:
+            blob = self.store.get(key)
+            return decode_paths(blob) if blob is not None else None
+        except Exception as e:
+            log.error(e, exc_info=True)
+            return None
+
+    def put(self, key: str, paths: List[str]) -> None:
+        """Caches the file paths"""
+        try:
+            self.store.put(key, encode_paths(paths))
+        except Exception as e:
+            log.error(e, exc_info=True)
+
+
+def get_changed_files_cache() -> ChangedFilesCache:
+    """
+    Returns the changed files cache based on the function's env vars:
+        - `CHANGED_FILES_CACHE_TABLE`: AWS DynamoDB table whose items expire after
+            `CHANGED_FILES_CACHE_TTL` seconds (defaults to 604800)
+        - `CHANGED_FILES_CACHE_S3_BUCKET` and `CHANGED_FILES_CACHE_S3_PREFIX`: AWS S3 objects
+        - Otherwise, the entries are only kept within the container
+    """
+    global _changed_files_cache
+    if _changed_files_cache is None:
+        if os.environ.get("CHANGED_FILES_CACHE_TABLE"):
+            store = DynamoDBChangedFilesStore(
+                os.environ["CHANGED_FILES_CACHE_TABLE"],
+                int(os.environ.get("CHANGED_FILES_CACHE_TTL", 604800)),
+            )
+        elif os.environ.get("CHANGED_FILES_CACHE_S3_BUCKET"):
+            store = S3ChangedFilesStore(
+                os.environ["CHANGED_FILES_CACHE_S3_BUCKET"],
+                os.environ.get("CHANGED_FILES_CACHE_S3_PREFIX", ""),
+            )
+        else:
+            store = LocalChangedFilesStore()
+        _changed_files_cache = ChangedFilesCache(store)
+
+    return _changed_files_cache
+
+
+class LocalCoalescingStore:
+    """
+    Keeps the push coalescing windows within the process. Lambda containers handle one request at a time
+    so concurrent deliveries are only coalesced by the shared store and this store is used as its
+    stand-in within tests.
+    """
+
+    def __init__(self):
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def join(
+        self, key: str, before: str, after: str, token: str, now: float, window: float
+    ) -> dict:
+        """Adds the push to the key's open window or opens a new window and returns the window's state"""
+        with self.lock:
+            state = self.windows.get(key)
+            if state is None or state["expires"] <= now:
+                state = {"before": before, "ranges": [], "expires": now + window}
+            state = {
+                **state,
+                "after": after,
+                "token": token,
+                "ranges": state["ranges"] + [[before, after]],
+            }
+            self.windows[key] = state
+            return state
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the state of the key's latest window"""
+        return self.windows.get(key)
+
+
+class DynamoDBCoalescingStore:
+    """
+    Shares the push coalescing windows across containers via an AWS DynamoDB table with the string
+    partition key `branch`. Items expire via the table's `ttl` TTL attribute once their window closes.
+
+    :param table: AWS DynamoDB table name
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+        self.client = boto3.client("dynamodb")
+
+    def join(
+        self, key: str, before: str, after: str, token: str, now: float, window: float
+    ) -> dict:
+        """Adds the push to the key's open window or opens a new window and returns the window's state"""
+        names = {"#branch": "branch", "#expires": "expires"}
+        while True:
+            try:
+                item = self.client.update_item(
+                    TableName=self.table,
+                    Key={"branch": {"S": key}},
+                    UpdateExpression="SET #after = :after, #token = :token, #ranges = list_append(#ranges, :range)",
+                    ConditionExpression="#expires > :now",
+                    ExpressionAttributeNames={
+                        **names,
+                        "#after": "after",
+                        "#token": "token",
+                        "#ranges": "ranges",
+                    },
+                    ExpressionAttributeValues={
+                        ":after": {"S": after},
+                        ":token": {"S": token},
+                        ":range": {"L": [self._range(before, after)]},
+                        ":now": {"N": str(now)},
+                    },
+                    ReturnValues="ALL_NEW",
+                )["Attributes"]
+                return self._state(item)
+            except botocore.exceptions.ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+
+            item = {
+                "branch": {"S": key},
+                "before": {"S": before},
+                "after": {"S": after},
+                "token": {"S": token},
+                "ranges": {"L": [self._range(before, after)]},
+                "expires": {"N": str(now + window)},
+                "ttl": {"N": str(int(now + window) + 60)},
+            }
+            try:
+                self.client.put_item(
+                    TableName=self.table,
+                    Item=item,
+                    ConditionExpression="attribute_not_exists(#branch) OR #expires <= :now",
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues={":now": {"N": str(now)}},
+                )
+                return self._state(item)
+            except botocore.exceptions.ClientError as e:
+                # another container opened a new window first so the push joins it
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the state of the key's latest window"""
+        item = self.client.get_item(
+            TableName=self.table, Key={"branch": {"S": key}}, ConsistentRead=True
+        ).get("Item")
+
+        return self._state(item) if item else None
+
+    @staticmethod
+    def _range(before: str, after: str) -> dict:
+        return {"L": [{"S": before}, {"S": after}]}
+
+    @staticmethod
+    def _state(item: dict) -> dict:
+        return {
+            "before": item["before"]["S"],
+            "after": item["after"]["S"],
+            "token": item["token"]["S"],
+            "ranges": [
+                [sha["S"] for sha in commit_range["L"]]
+                for commit_range in item["ranges"]["L"]
+            ],
+            "expires": float(item["expires"]["N"]),
+        }
+
+
+def get_coalescing_store():
+    """
+    Returns the push coalescing store based on the function's `PUSH_COALESCING_TABLE` env var (AWS DynamoDB
+    table). Otherwise, the windows are only kept within the container.
+    """
+    global _coalescing_store
+    if _coalescing_store is None:
+        if os.environ.get("PUSH_COALESCING_TABLE"):
+            _coalescing_store = DynamoDBCoalescingStore(
+                os.environ["PUSH_COALESCING_TABLE"]
+            )
+        else:
+            _coalescing_store = LocalCoalescingStore()
+
+    return _coalescing_store
+
+
+def coalesce_push(payload: dict) -> Optional[dict]:
+    """
+    Coalesces pushes to the same branch that are delivered within `PUSH_COALESCING_WINDOW` seconds of the
+    window's first push. Each delivery waits for its window to close or until `PUSH_COALESCING_RESERVE_MS`
+    milliseconds (defaults to 2000) are left within the invocation's deadline for the GitHub API. The newest
+    delivery is returned with the commit range of every coalesced push under `COALESCED_RANGES_KEY` so that
+    its changed files are the union of each push's changed files and the older deliveries return None.
+    Deliveries are passed through as-is if the store is unavailable.
+
+    :param payload: Github push webhook payload
+    """
+    window = float(os.environ.get("PUSH_COALESCING_WINDOW", 0))
+    if window <= 0 or payload.get("deleted"):
+        return payload
+
+    store = get_coalescing_store()
+    key = f"{payload['repository']['full_name']}:{payload['ref']}"
+    token = uuid.uuid4().hex
+    try:
+        state = store.join(
+            key, payload["before"], payload["after"], token, time.time(), window
+        )
+        wait = state["expires"] - time.time()
+        if _deadline is not None:
+            reserve = float(os.environ.get("PUSH_COALESCING_RESERVE_MS", 2000)) / 1000
+            if _deadline.remaining() - reserve < wait:
+                log.warning(
+                    f"Push coalescing window of {key} is cut short by the deadline"
+                )
+                wait = _deadline.remaining() - reserve
+        time.sleep(max(wait, 0))
+        latest = store.get(key)
+    except Exception as e:
+        log.error(e, exc_info=True)
+        return payload
+
+    if latest is not None and latest["token"] != token:
+        log.info(f"Push was superseded by a newer push to {key}")
+        return None
+
+    if latest is not None and len(latest["ranges"]) > 1:
+        log.info(
+            f"Coalesced {len(latest['ranges'])} pushes to {key} -- Range: {latest['before']}...{latest['after']}"
+        )
+        return {**payload, COALESCED_RANGES_KEY: latest["ranges"]}
+
+    return payload
+
+
+def json_path_prefix(expression: str) -> List[str]:
+    """
+    Returns the field names the JSON path starts with. The JSON path only selects values within the
+    prefix's value so an empty prefix means the JSON path may select any value of the payload.
+
+    :param expression: JSON path
+    """
+    nodes = [compile_json_path(expression)]
+    while isinstance(nodes[0], Child):
+        nodes[:1] = [nodes[0].left, nodes[0].right]
+
+    prefix = []
+    for node in nodes:
+        if isinstance(node, Root):
+            continue
+        if (
+            not isinstance(node, Fields)
+            or len(node.fields) != 1
+            or node.fields[0] == "*"
+        ):
+            break
+        prefix.append(node.fields[0])
+
+    return prefix
+
+
+def build_projection(paths: List[List[str]]) -> Optional[dict]:
+    """
+    Returns the projection of the paths as a nested dictionary of field names where `True` includes
+    the field's entire value or None if a path includes the entire payload
+
+    :param paths: Paths as lists of field names
+    """
+    projection = {}
+    for path in paths:
+        if not path:
+            return None
+        node = projection
+        for field in path[:-1]:
+            child = node.setdefault(field, {})
+            if child is True:
+                break
+            node = child
+        else:
+            node[path[-1]] = True
+
+    return projection
+
+
+def _project(value: dict, projection: dict) -> dict:
+    result = {}
+    for key, child in projection.items():
+        if key not in value:
+            continue
+        if isinstance(child, dict) and isinstance(value[key], dict):
+            result[key] = _project(value[key], child)
+        else:
+            result[key] = value[key]
+
+    return result
+
+
+def project_json(text: str, projection: dict) -> dict:
+    """
+    Returns the JSON object's values within the projection (see `build_projection()`). The object is
+    parsed via `json.loads()` given that the C decoder is faster than skipping the unused values in
+    Python, and only the projected values are kept once the object is parsed.
+
+    :param text: JSON object
+    :param projection: Projection of the values to return
+    """
+    value = json.loads(text)
+    if not isinstance(value, dict):
+        return value
+
+    return _project(value, projection)
+
+
+def payload_projection_enabled() -> bool:
+    """Returns True if the `PAYLOAD_PROJECTION` env var is `true`"""
+    return os.environ.get("PAYLOAD_PROJECTION", "false").lower() == "true"
+
+
+def parse_payload(
+    body: str, event: str, config: Optional["FilterConfig"] = None
+) -> dict:
+    """
+    Returns the parsed payload. If payload projections are enabled (see `payload_projection_enabled()`), the
+    payload only includes the paths the function and the filter groups config's JSON path filters read
+    (see `FilterConfig.projection()`).
+
+    :param body: Raw request body
+    :param event: GitHub event
+    :param config: Filter groups config of the request. Required for payload projections.
+    """
+    if config is not None and payload_projection_enabled():
+        projection = config.projection(event)
+        if projection is not None:
+            return project_json(body, projection)
+
+    return json.loads(body)
+
+
+def payload_request_mapping(event: str, payload: dict) -> dict:
+    """
+    Returns the request mapping target values that are available within the request itself.
+    Target values that require the GitHub API (e.g. `file_path`) are not included. Fields that the
+    payload doesn't have are mapped to no values so that their filters aren't matched.
+
+    :param event: GitHub event
+    :param payload: Github webhook payload
+    """
+    request_mapping = {"event": event}
+
+    extractors = {
+        **{
+            field: (lambda extract=extract: extract(payload))
+            for field, extract in COMMON_FIELD_EXTRACTORS.items()
+        },
+        **EVENT_FIELD_EXTRACTORS.get(event, lambda payload: {})(payload),
+    }
+    for field, extract in extractors.items():
+        try:
+            request_mapping[field] = extract()
+        except (KeyError, TypeError):
+            request_mapping[field] = []
+
+    return request_mapping
+
+
+def get_repo_key(payload: dict, config: "FilterConfig") -> Optional[str]:
+    """
+    Returns the repository's filter groups key or None if the payload has no repository or no key matches
+
+    :param payload: Github webhook payload
+    :param config: Filter groups config
+    """
+    try:
+        repo_name = payload["repository"]["name"]
+        return config.repo_index.lookup(
+            payload["repository"].get("full_name", repo_name), repo_name
+        )
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+
+def passes_prefilter(
+    event: str, payload: dict, prefilter_groups: Optional[List[List[dict]]]
+) -> bool:
+    """
+    Returns False if the payload can't fulfill any of the repo's filter groups based on the filters that
+    only need the request itself (see `FilterConfig.prefilter_groups`). The check is conservative: filters
+    that need the GitHub API are treated as matched and requests the pre-filter can't evaluate are passed
+    on to the full validation.
+
+    :param event: GitHub event
+    :param payload: Github webhook payload
+    :param prefilter_groups: Repo's pre-filter groups. If None, the request is passed on
+    """
+    if prefilter_groups is None:
+        return True
+
+    try:
+        request_mapping = payload_request_mapping(event, payload)
+        evaluate = FilterEvaluator(request_mapping, payload)
+        # types that the event resolves via the GitHub API or that the request mapping doesn't have
+        # for the event can't be evaluated here
+        remote_fields = REMOTE_FIELD_EXTRACTORS.get(event, {})
+        return any(
+            all(
+                filter_entry["type"] in remote_fields
+                or filter_entry["type"] not in request_mapping
+                or evaluate(filter_entry)[0]
+                for filter_entry in group
+            )
+            for group in prefilter_groups
+        )
+    except Exception as e:
+        log.debug(f"Pre-filter could not evaluate the payload: {e}")
+        return True
+
+
+def validate_payload(
+    event: str,
+    payload: dict,
+    filter_groups: List[dict],
+    trace: Optional[Trace] = None,
+    repo_key: Optional[str] = None,
+    matrix: Optional["FilterGroupMatrix"] = None,
+    decision: Optional[Decision] = None,
+) -> None:
+    """
+    Checks if payload body passes atleast one filter group
+
+    :param payload: Github webhook payload
+    :param filter_groups: List of filters to check payload with
+    :param trace: Trace used to record the filter outcomes and data fetch timings
+    :param repo_key: Key of the repository within filter_groups.json and $TOKEN_SSM_KEYS. Defaults to the repository name
+    :param matrix: Precomputed filter group matrix of the filter groups (see `FilterConfig`)
+    :param decision: Decision used to record the matched filter groups and the resolved request fields
+    """
+    if match_filter_groups(
+        event,
+        payload,
+        filter_groups,
+        trace=trace,
+        repo_key=repo_key,
+        matrix=matrix,
+        decision=decision,
+    ):
+        return {"message": "Payload fulfills atleast one filter group"}
+    else:
+        raise ClientException("Payload does not fulfill trigger requirements")
+
+
+def match_filter_groups(
+    event: str,
+    payload: dict,
+    filter_groups: List[dict],
+    trace: Optional[Trace] = None,
+    repo_key: Optional[str] = None,
+    matrix: Optional["FilterGroupMatrix"] = None,
+    decision: Optional[Decision] = None,
+) -> List[int]:
+    """
+    Returns the indices of every filter group the payload fulfills
+
+    :param event: GitHub event
+    :param payload: Github webhook payload
+    :param filter_groups: List of filters to check payload with
+    :param trace: Trace used to record the filter outcomes and data fetch timings
+    :param repo_key: Key of the repository within filter_groups.json and $TOKEN_SSM_KEYS. Defaults to the repository name
+    :param matrix: Precomputed filter group matrix of the filter groups. Built from `filter_groups` if not defined
+    :param decision: Decision used to record the matched filter groups and the resolved request fields
+    """
+
+    repo = None
+    gh = None
+    budget_key = None
+
+    def get_repo():
+        """Returns the repository's GitHub API object. Only called if a filter needs the GitHub API."""
+        nonlocal repo, gh, budget_key
+        if repo is not None:
+            return repo
+
+        token_ssm_keys = json.loads(os.environ["TOKEN_SSM_KEYS"])
+        log.debug(f"Token SSM Parameter keys:\n{pformat(token_ssm_keys)}")
+        repo_ssm_key = token_ssm_keys.get(
+            repo_key or payload["repository"]["name"], None
+        )
+        try:
+            with traced(trace, "github.credentials"):
+                credentials = github_credentials(
+                    payload["repository"]["full_name"], repo_ssm_key
+                )
+        except (DeadlineExceededException, DependencyUnavailableException):
+            raise
+        except Exception as e:
+            log.error(e, exc_info=True)
+            raise ServerException("Internal server error")
+        budget_key, token = select_github_credential(credentials)
+        gh = get_github_client(token)
+
+        try:
+            with traced(trace, "github.get_repo"), rate_limited(gh, budget_key):
+                repo = github_call(
+                    "github.get_repo", gh.get_repo, payload["repository"]["full_name"]
+                )
+        except github.UnknownObjectException as e:
+            log.error(e, exc_info=True)
+            raise ClientException(
+                """
+            Repository was not found -- If the repository is private, add a GitHub token with `repo` permissions
+            to the var.repo `github_token_ssm_value` attribute within the associated Terraform module.
+            """
+            )
+
+        return repo
+
+    def remote_field(fetch_name: str, extract: Callable):
+        def resolve():
+            repository = get_repo()
+            with traced(trace, fetch_name), rate_limited(gh, budget_key):
+                return github_call(fetch_name, extract, repository, payload)
+
+        return resolve
+
+    def range_file_paths(base: str, head: str) -> List[str]:
+        cache = get_changed_files_cache()
+        key = changed_files_key(payload["repository"]["full_name"], base, head)
+        with traced(trace, "changed_files_cache.get"):
+            paths = cache.get(key)
+        if paths is not None:
+            return paths
+
+        repository = get_repo()
+        with traced(trace, "github.compare"), rate_limited(gh, budget_key):
+            paths = github_call(
+                "github.compare", _compare_file_paths, repository, base, head
+            )
+        with traced(trace, "changed_files_cache.put"):
+            cache.put(key, paths)
+
+        return paths
+
+    def changed_file_paths(commit_range: Callable):
+        def resolve():
+            # coalesced pushes include files that a later push within the window reverted
+            ranges = payload.get(COALESCED_RANGES_KEY) or [commit_range(payload)]
+            paths = {}
+            for base, head in ranges:
+                paths.update(dict.fromkeys(range_file_paths(base, head)))
+
+            return list(paths)
+
+        return resolve
+
+    # remote fields that weren't resolved given that a dependency's circuit is open
+    unavailable = []
+
+    def local_only(field: str, resolve: Callable):
+        """
+        Resolves the field or, if the `CIRCUIT_BREAKER_POLICY` env var is `local_only`, resolves no values
+        while a dependency's circuit is open so that only filter groups without the field can match
+        """
+
+        def resolve_or_skip():
+            try:
+                return resolve()
+            except DependencyUnavailableException as e:
+                if (
+                    os.environ.get("CIRCUIT_BREAKER_POLICY", "fail_fast")
+                    != "local_only"
+                ):
+                    raise
+                log.warning(f"Filters of type {field} are not matched -- {e}")
+                unavailable.append(field)
+                return []
+
+        return resolve_or_skip
+
+    request_mapping = payload_request_mapping(event, payload)
+    if event in COMMIT_RANGE_EXTRACTORS:
+        request_mapping["file_path"] = local_only(
+            "file_path", changed_file_paths(COMMIT_RANGE_EXTRACTORS[event])
+        )
+    for field, (fetch_name, extract) in REMOTE_FIELD_EXTRACTORS.get(event, {}).items():
+        request_mapping[field] = local_only(field, remote_field(fetch_name, extract))
+
+    log.debug(f"Payload Target Values:\n{request_mapping}")
+
+    try:
+        matrix = matrix or FilterGroupMatrix(filter_groups)
+        evaluate = FilterEvaluator(request_mapping, payload)
+        matched_groups, results = matrix.match(evaluate)
+    except (
+        ClientException,
+        ServerException,
+        DeadlineExceededException,
+        DependencyUnavailableException,
+    ):
+        raise
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        raise ServerException("Internal server error")
+
+    if unavailable:
+        emit_metric("LocalOnlyDecisions")
+        # groups that need the unavailable fields may have matched so the payload isn't rejected
+        if not matched_groups:
+            raise DependencyUnavailableException(
+                f"Filter groups could not be evaluated without: {', '.join(unavailable)}"
+            )
+
+    log.debug(f"Matched filter groups: {matched_groups}")
+    if trace:
+        matrix.record(trace, matched_groups, results)
+    if decision:
+        decision.record(matched_groups, request_mapping, evaluate, unavailable)
+
+    return matched_groups
+
+
+# literal character of a regex pattern: an unescaped non-special character or an escaped symbol
+_LITERAL_CHARACTER = re.compile(r"[^\\.^$*+?{}\[\]|()]|\\([^A-Za-z0-9])")
+
+
+@lru_cache(maxsize=None)
+def literal_prefix(pattern: str) -> Optional[str]:
+    """
+    Returns the literal text that every match of the anchored pattern starts with (e.g. `services/payments/`
+    for `^services/payments/.*\\.py$`) or None if the pattern isn't anchored or starts with a non-literal.
+    Patterns with an alternation are treated as unanchored given that each alternative has its own anchor.
+    Case-insensitive and verbose patterns have no literal prefix.
+
+    :param pattern: Regex pattern
+    """
+    if not pattern.startswith("^") or "|" in pattern:
+        return None
+    if compile_pattern(pattern).flags & (re.IGNORECASE | re.VERBOSE):
+        return None
+
+    characters = []
+    pos = 1
+    while True:
+        match = _LITERAL_CHARACTER.match(pattern, pos)
+        if match is None:
+            break
+        characters.append(match.group(1) or match.group())
+        pos = match.end()
+
+    # a quantifier applies to the last literal character so that character is optional
+    if characters and pattern.startswith(("*", "+", "?", "{"), pos):
+        characters.pop()
+
+    return "".join(characters) or None
+
+
+class PathPrefixIndex:
+    """
+    File paths kept in sorted order so that the paths under any prefix (a node of the paths' prefix trie)
+    form a contiguous range that is found with a binary search instead of a scan of every path
+
+    :param paths: File paths
+    """
+
+    def __init__(self, paths: List[str]):
+        # the changed file paths are usually sorted already which sorts in linear time
+        self.paths = sorted(paths)
+
+    def with_prefix(self, prefix: str) -> Tuple[int, int]:
+        """
+        Returns the start and end indices of the paths that start with the prefix
+
+        :param prefix: Literal path prefix
+        """
+        return (
+            bisect.bisect_left(self.paths, prefix),
+            bisect.bisect_left(self.paths, prefix + "\U0010ffff"),
+        )
+
+
+class FilterEvaluator:
+    """
+    Evaluates filters against the request while memoising work that filters with the same type or the
+    same type and pattern share:
+        - Target values are resolved (and JSON paths are searched) once per filter type
+        - Pattern search results are computed once per target value and shared by the filter's include
+            and exclude (`exclude_matched_filter`) variants
+        - `file_path` filters with an anchored literal prefix (e.g. `^services/payments/`) only search
+            the paths under the prefix (see `PathPrefixIndex`)
+
+    :param request_mapping: Target values of the request mapping filter types
+    :param payload: Github webhook payload used for JSON path filter types
+    """
+
+    def __init__(self, request_mapping: dict, payload: dict):
+        self.request_mapping = request_mapping
+        self.payload = payload
+        self.targets = {}
+        # search result of each scanned target value keyed by (type, pattern)
+        self.hits = {}
+        self.indexes = {}
+
+    def target(self, filter_type: str) -> List[str]:
+        """Returns the filter type's target values"""
+        if filter_type not in self.targets:
+            if filter_type not in self.request_mapping:
+                log.info("Filter type not found in request mapping -- Using JSON path")
+                target = [
+                    match.value
+                    for match in compile_json_path(filter_type).find(self.payload)
+                ]
+            else:
+                target = self.request_mapping[filter_type]
+                # values that require the GitHub API are fetched on first use
+                if callable(target):
+                    target = target()
+                # puts payload value into a list if value is not already a list
+                # so they can be processed with list payload values
+                if not isinstance(target, list):
+                    target = [target]
+            log.debug(f"Target values:\n{pformat(target)}")
+            self.targets[filter_type] = [str(value) for value in target]
+
+        return self.targets[filter_type]
+
+    def __call__(self, filter_entry: dict) -> Tuple[bool, int]:
+        """
+        Returns whether the filter matched and the number of target values scanned
+
+        :param filter_entry: Filter
+        """
+        log.debug(f"Filter: {filter_entry}")
+        target = self.target(filter_entry["type"])
+        pattern = compile_pattern(filter_entry["pattern"])
+        exclude = bool(filter_entry["exclude_matched_filter"])
+
+        if filter_entry["type"] == "file_path":
+            prefix = literal_prefix(filter_entry["pattern"])
+            if prefix is not None:
+                return self.match_prefix(target, prefix, pattern, exclude)
+
+        hits = self.hits.setdefault((filter_entry["type"], filter_entry["pattern"]), [])
+
+        for scanned, value in enumerate(target, start=1):
+            if scanned > len(hits):
+                hits.append(bool(pattern.search(value)))
+            if hits[scanned - 1] != exclude:
+                log.debug(f"Matched target value:\n{value}")
+                # only one value out of the target needs to be matched for `file_path` filtering
+                return True, scanned
+
+        log.debug("Not Matched")
+        return False, len(target)
+
+    def match_prefix(
+        self, target: List[str], prefix: str, pattern: re.Pattern, exclude: bool
+    ) -> Tuple[bool, int]:
+        """
+        Returns whether the `file_path` filter matched and the number of paths searched. Only paths under the
+        pattern's literal prefix can match the pattern.
+
+        :param target: File paths
+        :param prefix: Pattern's literal prefix (see `literal_prefix()`)
+        :param pattern: Compiled pattern
+        :param exclude: Whether the filter is matched by paths that don't match the pattern
+        """
+        if "file_path" not in self.indexes:
+            self.indexes["file_path"] = PathPrefixIndex(target)
+        index = self.indexes["file_path"]
+        start, end = index.with_prefix(prefix)
+
+        # paths outside of the prefix don't match the pattern
+        if exclude and end - start < len(index.paths):
+            log.debug("Matched a target value outside of the pattern's prefix")
+            return True, 0
+
+        for scanned, position in enumerate(range(start, end), start=1):
+            value = index.paths[position]
+            if bool(pattern.search(value)) != exclude:
+                log.debug(f"Matched target value:\n{value}")
+                return True, scanned
+
+        log.debug("Not Matched")
+        return False, end - start
+
+
+def _bit_indices(bits: int) -> List[int]:
+    """Returns the indices of the set bits in ascending order"""
+    indices = []
+    while bits:
+        lowest = bits & -bits
+        indices.append(lowest.bit_length() - 1)
+        bits ^= lowest
+    return indices
+
+
+class FilterGroupMatrix:
+    """
+    Group x filter incidence of the filter groups. Each distinct filter is stored once along with an
+    int bitset of the groups that contain it so that a failed filter rules out all of its groups with
+    a single bitwise operation and every filter is evaluated at most once per request.
+
+    :param filter_groups: List of filter groups
+    :param registry: Mapping of filter keys to their filter shared across matrices so that duplicate
+        filters across repos are stored once
+    """
+
+    def __init__(
+        self, filter_groups: List[List[dict]], registry: Optional[dict] = None
+    ):
+        self.filter_groups = filter_groups
+        self.filters = []
+        self.group_masks = []
+        # distinct filter indices of each group in the group's order
+        self.group_filters = []
+
+        index = {}
+        for group_index, group in enumerate(filter_groups):
+            filter_indices = []
+            for filter_entry in group:
+                key = (
+                    filter_entry["type"],
+                    filter_entry["pattern"],
+                    bool(filter_entry.get("exclude_matched_filter")),
+                )
+                if key not in index:
+                    index[key] = len(self.filters)
+                    self.filters.append(
+                        filter_entry
+                        if registry is None
+                        else registry.setdefault(key, filter_entry)
+                    )
+                    self.group_masks.append(0)
+                self.group_masks[index[key]] |= 1 << group_index
+                filter_indices.append(index[key])
+            self.group_filters.append(filter_indices)
+
+        self.all_groups = (1 << len(filter_groups)) - 1
+        # cheapest filters are evaluated first so that they rule out groups before costlier filters are evaluated
+        self.order = sorted(
+            range(len(self.filters)), key=lambda i: filter_cost(self.filters[i])
+        )
+
+    def match(
+        self, evaluate: Callable[[dict], Tuple[bool, int]]
+    ) -> Tuple[List[int], dict]:
+        """
+        Returns the indices of the matched filter groups and the results of the evaluated filters.
+        Filters whose groups have all been ruled out are not evaluated.
+
+        :param evaluate: Returns whether the filter matched and the number of target values scanned
+        """
+        alive = self.all_groups
+        results = {}
+        for filter_index in self.order:
+            if not self.group_masks[filter_index] & alive:
+                continue
+            start = time.perf_counter()
+            matched, scanned = evaluate(self.filters[filter_index])
+            results[filter_index] = (matched, scanned, _ms(start))
+            if not matched:
+                alive &= ~self.group_masks[filter_index]
+                if not alive:
+                    break
+
+        return _bit_indices(alive), results
+
+    def record(self, trace: "Trace", matched_groups: List[int], results: dict) -> None:
+        """
+        Records the outcome of every filter group within the trace along with the group's evaluated
+        filters up to the filter that decided the group
+
+        :param trace: Request trace
+        :param matched_groups: Indices of the matched filter groups
+        :param results: Results of the evaluated filters returned by `match()`
+        """
+        matched_groups = set(matched_groups)
+        for group_index, filter_indices in enumerate(self.group_filters):
+            trace.start_group(group_index)
+            decided_by = len(filter_indices) - 1 if filter_indices else None
+            for position, filter_index in enumerate(filter_indices):
+                if filter_index not in results:
+                    continue
+                matched, scanned, ms = results[filter_index]
+                trace.add_filter(self.filters[filter_index], matched, scanned, ms)
+                if not matched:
+                    decided_by = position
+                    break
+            trace.end_group(group_index in matched_groups, decided_by)
+
+
+def filter_cost(filter_entry: dict) -> int:
+    """Returns the relative cost of evaluating the filter based on the size of its target values"""
+    if filter_entry["type"] == "file_path":
+        return 3
+    # may require the GitHub API depending on the event
+    if filter_entry["type"] == "commit_message":
+        return 2
+    if filter_entry["type"] in REQUEST_MAPPING_TYPES:
+        return 0
+    return 1
+
+
+# filter types that are resolved from the request mapping rather than a JSON path
+REQUEST_MAPPING_TYPES = [
+    "event",
+    "file_path",
+    "commit_message",
+    "ref",
+    "base_ref",
+    "head_ref",
+    "head_sha",
+    "actor_account_id",
+    "action",
+    "pr_action",
+]
+
+# Normalized request fields included within the decision (see `Decision`)
+DECISION_FIELDS = [
+    "event",
+    "ref",
+    "base_ref",
+    "head_ref",
+    "head_sha",
+    "actor_account_id",
+    "action",
+    "pr_action",
+    "commit_message",
+]
+
+# request mapping filter types whose target values are available within the request itself
+PREFILTER_TYPES = [
+    "event",
+    "commit_message",
+    "ref",
+    "base_ref",
+    "head_ref",
+    "head_sha",
+    "actor_account_id",
+    "action",
+    "pr_action",
+]
+
+
+class FilterConfig:
+    """
+    Filter groups for all repos along with the repo index and compiled expressions built from them
+
+    :param filter_groups: Mapping of repo keys to their filter groups
+    :param version: Version of the filter groups within the config store
+    """
+
+    def __init__(self, filter_groups: dict, version: Optional[str] = None):
+        self.filter_groups = filter_groups
+        self.version = version
+        self.repo_index = RepoIndex(list(filter_groups.keys()))
+        # distinct filters across every repo keyed by (type, pattern, exclude_matched_filter)
+        self.filters = {}
+        self.matrices = {
+            key: FilterGroupMatrix(groups or [], registry=self.filters)
+            for key, groups in filter_groups.items()
+        }
+        compile_filter_groups([list(self.filters.values())])
+        log.debug(
+            f"Filters: {sum(len(group) for groups in filter_groups.values() for group in (groups or []))} -- Distinct filters: {len(self.filters)}"
+        )
+
+        # Per-repo filter groups reduced to the filters that can be evaluated without the GitHub API.
+        # A repo has no pre-filter (None) if any of its groups has no such filter given that the
+        # group may match any request.
+        self.prefilter_groups = {}
+        for key, groups in filter_groups.items():
+            reduced = [
+                [f for f in group if f["type"] in PREFILTER_TYPES]
+                for group in (groups or [])
+            ]
+            self.prefilter_groups[key] = reduced if groups and all(reduced) else None
+
+        # payload paths read by the JSON path filters across every repo given that the repo isn't known
+        # until the payload is parsed
+        self.json_paths = [
+            json_path_prefix(f["type"])
+            for f in self.filters.values()
+            if f["type"] not in REQUEST_MAPPING_TYPES
+        ]
+        self.projections = {}
+
+    def projection(self, event: str) -> Optional[dict]:
+        """
+        Returns the projection of the payload paths that are read for the event or None if the entire
+        payload is read
+
+        :param event: GitHub event
+        """
+        if event not in self.projections:
+            self.projections[event] = build_projection(
+                [
+                    path.split(".")
+                    for path in COMMON_PAYLOAD_PATHS
+                    + EVENT_PAYLOAD_PATHS.get(event, ["action"])
+                ]
+                + self.json_paths
+            )
+
+        return self.projections[event]
+
+
+class ClientException(Exception):
+    """Wraps around client-related errors"""
+
+    pass
+
+
+class LambdaException(Exception):
+    """Wraps around all function errors"""
+
+    pass
+
+
+class ServerException(Exception):
+    """Wraps around all server-related errors"""
+
+    pass
+
+
+class DeadlineExceededException(Exception):
+    """Raised once the invocation's deadline passes before the request is decided"""
+
+    pass
+
+
+class DependencyUnavailableException(Exception):
+    """Raised when a dependency's circuit is open and the request can't be decided without it"""
+
+    pass
+
+
+# provisioned concurrency runs the initialization code ahead of any invocation
+# so the warm-up work is done before the container receives its first request
+if os.environ.get("AWS_LAMBDA_INITIALIZATION_TYPE") == "provisioned-concurrency":
+    try:
+        warm_up()
+    except Exception as e:
+        log.error(e, exc_info=True)
@@ -1,25 +1,123 @@
 locals {
   repos = [for repo in var.repos : merge(repo, {
+    # key of the repo's filter groups within the function's filter groups config
+    config_key = repo.name_pattern_type != null ? "${repo.name_pattern_type}:${repo.name}" : repo.name
+    # name used within AWS resource names. Patterns are hashed like the filter groups artifacts given that they
+    # can contain characters that aren't valid within AWS resource names.
+    resource_name = repo.name_pattern_type != null ? sha1("${repo.name_pattern_type}:${repo.name}") : replace(repo.name, "/", "-")
     filter_groups = [for filter_group in repo.filter_groups :
       defaults(filter_group, {
         exclude_matched_filter = false
       })
     ]
   })]
+  # repo patterns can only be routed via the organization webhook. Variable validations can't reference other
+  # variables so the patterns are validated here.
+  repo_patterns_valid = var.create_organization_webhook || nonsensitive(alltrue([for repo in var.repos : repo.name_pattern_type == null])) ? true : tobool("Repository patterns (`name_pattern_type`) require var.create_organization_webhook to be true.")
+  webhook_repos       = local.repo_patterns_valid && !var.create_organization_webhook ? local.repos : []
+
   private_repos = [for repo in local.repos : defaults(
     repo, {
       create_github_token_ssm_param = true
-      github_token_ssm_key          = repo.github_token_ssm_value != null ? "${var.function_name}-${repo.name}-gh-token" : null
+      github_token_ssm_key          = repo.github_token_ssm_value != null ? "${var.function_name}-${repo.resource_name}-gh-token" : null
     }
   ) if repo.is_private == true]
 
   github_secret_ssm_key = coalesce(var.github_secret_ssm_key, "${var.function_name}-secret")
 
-  create_ssm_params   = [for repo in local.private_repos : repo if repo.create_github_token_ssm_param == true]
+  # Per-repo resources use for_each keyed by the repo's filter groups key so that reordering or changing
+  # var.repos only plans the affected repos. The keys aren't secret so they're used as for_each keys
+  # even though var.repos is sensitive.
+  webhook_repos_by_key  = { for repo in local.webhook_repos : repo.config_key => repo }
+  webhook_repo_keys     = nonsensitive(toset(keys(local.webhook_repos_by_key)))
+  private_repos_by_key  = { for repo in local.private_repos : repo.config_key => repo }
+  create_ssm_param_keys = nonsensitive(toset([for repo in local.private_repos : repo.config_key if repo.create_github_token_ssm_param == true]))
+  repo_keys             = nonsensitive(toset([for repo in local.repos : repo.config_key]))
+
+  # per-repo webhook secret keys
+  repo_webhook_secret_ssm_keys = { for key, repo in local.webhook_repos_by_key : key => "${var.function_name}-${repo.resource_name}-secret" if var.create_repo_webhook_secrets }
+
+  # active secrets per repo with the current secret followed by previous secrets that remain valid while rotating
+  webhook_secret_ssm_keys = {
+    default = concat([local.github_secret_ssm_key], var.github_webhook_previous_secret_ssm_keys)
+    repos = { for key, ssm_key in local.repo_webhook_secret_ssm_keys :
+      key => concat([ssm_key], local.webhook_repos_by_key[key].previous_webhook_secret_ssm_keys != null ? local.webhook_repos_by_key[key].previous_webhook_secret_ssm_keys : [])
+    }
+  }
+
+  # events delivered by each repo's webhook
+  organization_webhook_events = distinct(flatten([for repo in local.repos : [for group in repo.filter_groups : [for filter in group :
+  filter.pattern if filter.type == "event" && filter.exclude_matched_filter != true]]]))
+  repo_webhook_events = { for repo in local.repos : repo.config_key => var.create_organization_webhook ? local.organization_webhook_events : distinct(flatten([for group in repo.filter_groups : [for filter in group :
+  filter.pattern if filter.type == "event" && filter.exclude_matched_filter != true]]))
+  }
+
+  configured_filter_groups = jsonencode({ for repo in local.repos : repo.config_key => repo.filter_groups })
+  filter_groups            = var.optimize_filter_groups ? data.external.filter_groups[0].result.filter_groups : local.configured_filter_groups
+  deployed_filter_groups   = jsondecode(local.filter_groups)
+  # each repo's filter groups are stored within their own artifact named after the hash of the repo's key
+  # so that a change to one repo only changes one artifact
+  filter_groups_artifacts = { for key in local.repo_keys : key => {
+    name    = sha1(key)
+    content = jsonencode({ key = key, filter_groups = local.deployed_filter_groups[key] })
+  } }
+  filter_groups_s3_prefix = "${var.function_name}/filter_groups/"
+  filter_groups_ssm_path  = "/${var.function_name}/filter-groups/"
+  # maps each SSM artifact to the hash of its content so the function only reads the changed artifacts
+  filter_groups_ssm_manifest = jsonencode({ for key in local.repo_keys :
+    local.filter_groups_artifacts[key].name => substr(sha1(local.filter_groups_artifacts[key].content), 0, 12)
+  })
+  # external stores are reloaded by the function without a new deployment
+  filter_groups_env_vars = {
+    package = {}
+    s3 = {
+      FILTER_GROUPS_S3_BUCKET = var.filter_groups_s3_bucket
+      FILTER_GROUPS_S3_PREFIX = local.filter_groups_s3_prefix
+      FILTER_GROUPS_TTL       = var.filter_groups_ttl
+    }
+    ssm = {
+      FILTER_GROUPS_SSM_PATH = local.filter_groups_ssm_path
+      FILTER_GROUPS_TTL      = var.filter_groups_ttl
+    }
+  }[var.filter_groups_store]
+
+  # cryptography is only installed for GitHub Apps given that it's built within Docker
+  layer_requirements = concat(
+    ["${path.module}/function/requirements.txt"],
+    length(var.github_apps) > 0 ? ["${path.module}/function/requirements-github-apps.txt"] : []
+  )
+
+  changed_files_cache_s3_prefix = "${var.function_name}/changed-files/"
+  changed_files_cache_env_vars  = {
+    local = {}
+    dynamodb = {
+      CHANGED_FILES_CACHE_TABLE = try(aws_dynamodb_table.changed_files[0].name, "")
+      CHANGED_FILES_CACHE_TTL   = var.changed_files_cache_ttl
+    }
+    s3 = {
+      CHANGED_FILES_CACHE_S3_BUCKET = var.changed_files_cache_s3_bucket
+      CHANGED_FILES_CACHE_S3_PREFIX = local.changed_files_cache_s3_prefix
+    }
+  }[var.changed_files_cache_store]
+
   load_ssm_param_arns = [for repo in local.private_repos : repo.github_token_ssm_param_arn if repo.create_github_token_ssm_param == false && repo.github_token_ssm_param_arn != null]
   load_ssm_param_keys = [for repo in local.private_repos : repo.github_token_ssm_key if repo.create_github_token_ssm_param == false && repo.github_token_ssm_key != null]
+
+  # provisioned concurrency is only used when the published version is invoked
+  provisioned_concurrency = var.lambda_provisioned_concurrent_executions > -1
+  lambda_target_arn       = local.provisioned_concurrency ? module.lambda_function.lambda_function_qualified_arn : module.lambda_function.lambda_function_arn
+  lambda_invoke_arn       = local.provisioned_concurrency ? "arn:${data.aws_partition.current.partition}:apigateway:${data.aws_region.current.name}:lambda:path/2015-03-31/functions/${module.lambda_function.lambda_function_qualified_arn}/invocations" : module.lambda_function.lambda_function_invoke_arn
+
+  # Lambda Function URLs receive the raw request without the API Gateway hop
+  webhook_url = var.create_lambda_function_url ? module.lambda_function.lambda_function_url : "${aws_api_gateway_deployment.this.invoke_url}${aws_api_gateway_stage.this.stage_name}${aws_api_gateway_resource.this.path}"
 }
 
+data "aws_region" "current" {}
+
+data "aws_partition" "current" {}
+
+data "aws_caller_identity" "current" {}
+
 data "aws_kms_key" "ssm" {
   key_id = "alias/aws/ssm"
 }
@@ -27,14 +125,19 @@ data "aws_kms_key" "ssm" {
 data "aws_iam_policy_document" "lambda" {
 
   statement {
-    sid       = "GithubWebhookSecretReadAccess"
-    effect    = "Allow"
-    actions   = ["ssm:GetParameter"]
-    resources = [aws_ssm_parameter.github_secret.arn]
+    sid     = "GithubWebhookSecretReadAccess"
+    effect  = "Allow"
+    actions = ["ssm:GetParameter", "ssm:GetParameters"]
+    resources = concat(
+      [aws_ssm_parameter.github_secret.arn],
+      [for param in aws_ssm_parameter.repo_webhook_secret : param.arn],
+      [for key in distinct(flatten(values(local.webhook_secret_ssm_keys.repos))) : "arn:${data.aws_partition.current.partition}:ssm:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:parameter/${trimprefix(key, "/")}" if !contains(values(local.repo_webhook_secret_ssm_keys), key)],
+      [for key in var.github_webhook_previous_secret_ssm_keys : "arn:${data.aws_partition.current.partition}:ssm:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:parameter/${trimprefix(key, "/")}"]
+    )
   }
 
   dynamic "statement" {
-    for_each = length(local.private_repos) > 0 ? [1] : []
+    for_each = length(local.private_repos) > 0 || length(var.github_apps) > 0 ? [1] : []
     content {
       sid       = "SSMDecryptAccess"
       effect    = "Allow"
@@ -48,10 +151,111 @@ data "aws_iam_policy_document" "lambda" {
     content {
       sid    = "GithubWebhookTokenReadAccess"
       effect = "Allow"
+      # warm-up loads the tokens in batches
       actions = [
-        "ssm:GetParameter"
+        "ssm:GetParameter",
+        "ssm:GetParameters"
+      ]
+      resources = concat(local.load_ssm_param_arns, [for param in aws_ssm_parameter.github_token : param.arn], [for param in data.aws_ssm_parameter.github_token : param.arn])
+    }
+  }
+
+  dynamic "statement" {
+    for_each = length(var.github_apps) > 0 ? [1] : []
+    content {
+      sid     = "GithubAppPrivateKeyReadAccess"
+      effect  = "Allow"
+      actions = ["ssm:GetParameter", "ssm:GetParameters"]
+      resources = [for app in var.github_apps :
+        "arn:${data.aws_partition.current.partition}:ssm:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:parameter/${trimprefix(app.private_key_ssm_key, "/")}"
       ]
-      resources = concat(local.load_ssm_param_arns, try(aws_ssm_parameter.github_token[*].arn, []), try(data.aws_ssm_parameter.github_token[*].arn, []))
+    }
+  }
+
+  dynamic "statement" {
+    for_each = var.github_rate_limit_store == "dynamodb" ? [1] : []
+    content {
+      sid       = "GithubRateLimitTableAccess"
+      effect    = "Allow"
+      actions   = ["dynamodb:GetItem", "dynamodb:PutItem"]
+      resources = [aws_dynamodb_table.github_rate_limit[0].arn]
+    }
+  }
+
+  dynamic "statement" {
+    for_each = var.push_coalescing_window > 0 ? [1] : []
+    content {
+      sid       = "PushCoalescingTableAccess"
+      effect    = "Allow"
+      actions   = ["dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:UpdateItem"]
+      resources = [aws_dynamodb_table.push_coalescing[0].arn]
+    }
+  }
+
+  dynamic "statement" {
+    for_each = var.changed_files_cache_store == "dynamodb" ? [1] : []
+    content {
+      sid       = "ChangedFilesCacheTableAccess"
+      effect    = "Allow"
+      actions   = ["dynamodb:GetItem", "dynamodb:PutItem"]
+      resources = [aws_dynamodb_table.changed_files[0].arn]
+    }
+  }
+
+  dynamic "statement" {
+    for_each = var.changed_files_cache_store == "s3" ? [1] : []
+    content {
+      sid       = "ChangedFilesCacheS3Access"
+      effect    = "Allow"
+      actions   = ["s3:GetObject", "s3:PutObject"]
+      resources = ["arn:${data.aws_partition.current.partition}:s3:::${var.changed_files_cache_s3_bucket}/${local.changed_files_cache_s3_prefix}*"]
+    }
+  }
+
+  # list access makes uncached ranges return 404 instead of 403
+  dynamic "statement" {
+    for_each = var.changed_files_cache_store == "s3" ? [1] : []
+    content {
+      sid       = "ChangedFilesCacheS3ListAccess"
+      effect    = "Allow"
+      actions   = ["s3:ListBucket"]
+      resources = ["arn:${data.aws_partition.current.partition}:s3:::${var.changed_files_cache_s3_bucket}"]
+    }
+  }
+
+  dynamic "statement" {
+    for_each = var.filter_groups_store == "s3" ? [1] : []
+    content {
+      sid       = "FilterGroupsS3ReadAccess"
+      effect    = "Allow"
+      actions   = ["s3:GetObject"]
+      resources = ["arn:${data.aws_partition.current.partition}:s3:::${var.filter_groups_s3_bucket}/${local.filter_groups_s3_prefix}*"]
+    }
+  }
+
+  # the per-repo objects are listed to find the changed objects
+  dynamic "statement" {
+    for_each = var.filter_groups_store == "s3" ? [1] : []
+    content {
+      sid       = "FilterGroupsS3ListAccess"
+      effect    = "Allow"
+      actions   = ["s3:ListBucket"]
+      resources = ["arn:${data.aws_partition.current.partition}:s3:::${var.filter_groups_s3_bucket}"]
+      condition {
+        test     = "StringLike"
+        variable = "s3:prefix"
+        values   = ["${local.filter_groups_s3_prefix}*"]
+      }
+    }
+  }
+
+  dynamic "statement" {
+    for_each = var.filter_groups_store == "ssm" ? [1] : []
+    content {
+      sid       = "FilterGroupsSSMReadAccess"
+      effect    = "Allow"
+      actions   = ["ssm:GetParameter", "ssm:GetParameters"]
+      resources = ["arn:${data.aws_partition.current.partition}:ssm:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:parameter${local.filter_groups_ssm_path}*"]
     }
   }
 }
@@ -61,10 +265,84 @@ resource "aws_iam_policy" "lambda" {
   policy = data.aws_iam_policy_document.lambda.json
 }
 
+# removes duplicate, subsumed and unreachable filter groups before the config is deployed
+data "external" "filter_groups" {
+  count   = var.optimize_filter_groups ? 1 : 0
+  program = ["python3", "${path.module}/optimizer/optimize_filter_groups.py"]
+  query = {
+    filter_groups = local.configured_filter_groups
+    events        = jsonencode(local.repo_webhook_events)
+  }
+}
+
 # using file for filter groups given lambda functions have a size limit of 4KB for env vars
 resource "local_file" "filter_groups" {
-  content  = jsonencode({ for repo in local.repos : repo.name => repo.filter_groups })
-  filename = "${path.module}/function/filter_groups.json"
+  for_each = var.filter_groups_store == "package" ? local.repo_keys : toset([])
+  content  = local.filter_groups_artifacts[each.key].content
+  filename = "${path.module}/function/filter_groups/${local.filter_groups_artifacts[each.key].name}.json"
+}
+
+resource "aws_s3_bucket_object" "filter_groups" {
+  for_each     = var.filter_groups_store == "s3" ? local.repo_keys : toset([])
+  bucket       = var.filter_groups_s3_bucket
+  key          = "${local.filter_groups_s3_prefix}${local.filter_groups_artifacts[each.key].name}.json"
+  content      = local.filter_groups_artifacts[each.key].content
+  content_type = "application/json"
+}
+
+resource "aws_ssm_parameter" "filter_groups" {
+  for_each    = var.filter_groups_store == "ssm" ? local.repo_keys : toset([])
+  name        = "${local.filter_groups_ssm_path}${local.filter_groups_artifacts[each.key].name}"
+  description = "Filter groups of the ${each.key} repo used by the ${var.function_name} Lambda Function"
+  type        = "String"
+  # standard parameters are limited to 4KB
+  tier  = length(local.filter_groups_artifacts[each.key].content) > 4096 ? "Advanced" : "Standard"
+  value = local.filter_groups_artifacts[each.key].content
+}
+
+# the manifest is written after the artifacts so that the function never reads a version that isn't stored yet
+resource "aws_ssm_parameter" "filter_groups_manifest" {
+  count       = var.filter_groups_store == "ssm" ? 1 : 0
+  name        = "${local.filter_groups_ssm_path}manifest"
+  description = "Content hash of each repo's filter groups used by the ${var.function_name} Lambda Function"
+  type        = "String"
+  tier        = length(local.filter_groups_ssm_manifest) > 4096 ? "Advanced" : "Standard"
+  value       = local.filter_groups_ssm_manifest
+
+  depends_on = [aws_ssm_parameter.filter_groups]
+}
+
+# dependencies are packaged within a separate layer so that code and filter groups changes only
+# rebuild and upload the function's own files. The layer's package is named after its content hash
+# so a new layer version is only published when the requirements change.
+module "lambda_layer" {
+  source  = "terraform-aws-modules/lambda/aws"
+  version = "3.3.1"
+
+  create_function     = false
+  create_layer        = true
+  layer_name          = "${var.function_name}-dependencies"
+  description         = "Python dependencies of the ${var.function_name} Lambda Function"
+  compatible_runtimes = ["python3.9"]
+  runtime             = "python3.9"
+
+  # GitHub Apps need cryptography to sign their JWTs. Its native code is built within the Lambda build image so
+  # that its wheel matches the Lambda runtime rather than the machine running Terraform.
+  build_in_docker = length(var.github_apps) > 0
+
+  source_path = [for requirements in local.layer_requirements : {
+    pip_requirements = requirements
+    # Lambda layers add the `python` directory to the Python path
+    prefix_in_zip = "python"
+    # files that aren't needed at runtime
+    patterns = [
+      "!.*/tests?/.*",
+      "!.*/__pycache__/.*",
+      "!.*\\.pyc",
+      "!.*\\.dist-info/(RECORD|INSTALLER|REQUESTED|WHEEL|direct_url\\.json)",
+      "!bin/.*",
+    ]
+  }]
 }
 
 module "lambda_function" {
@@ -74,28 +352,84 @@ module "lambda_function" {
   function_name = var.function_name
   handler       = "lambda_function.lambda_handler"
   runtime       = "python3.9"
+  layers        = [module.lambda_layer.lambda_layer_arn]
 
-  source_path = "${path.module}/function"
+  # requests may wait for the push coalescing window to close and for exhausted rate limit budgets to reset
+  timeout = 3 + ceil(var.push_coalescing_window) + ceil(var.github_rate_limit_max_wait)
+
+  # only the function's code and filter groups config are packaged given the dependencies are within the layer
+  source_path = [{
+    path             = "${path.module}/function"
+    pip_requirements = false
+    patterns = [
+      "!requirements.*\\.txt",
+      "!__pycache__/.*",
+    ]
+  }]
 
   # put repo github ssm key mapping within env vars rather than the Lambda function deployment
   # since the latter involves creating a new deployment when the token(s) need to be refreshed
-  environment_variables = {
-    GITHUB_WEBHOOK_SECRET_SSM_KEY = local.github_secret_ssm_key
+  environment_variables = merge(local.filter_groups_env_vars, local.changed_files_cache_env_vars, {
+    LOG_LEVEL                         = var.lambda_log_level
+    TRACE_SAMPLE_RATE                 = var.lambda_trace_sample_rate
+    TRACE_IN_RESPONSE                 = var.lambda_trace_in_response
+    PAYLOAD_PROJECTION                = var.lambda_payload_projection
+    DECISION_IN_RESPONSE              = var.lambda_decision_in_response
+    DECISION_COMPRESSION              = var.lambda_decision_compression
+    DECISION_MAX_BYTES                = var.lambda_decision_max_bytes
+    PROFILE_THRESHOLD_MS              = var.lambda_profile_threshold_ms
+    PROFILE_PERCENTILE                = var.lambda_profile_percentile
+    DEADLINE_RESERVE_MS               = var.lambda_deadline_reserve_ms
+    DEADLINE_POLICY                   = var.lambda_deadline_policy
+    METRICS_NAMESPACE                 = var.lambda_metrics_namespace != null ? var.lambda_metrics_namespace : ""
+    GITHUB_WEBHOOK_SECRET_SSM_KEY     = local.github_secret_ssm_key
+    GITHUB_WEBHOOK_SECRET_SSM_KEYS    = jsonencode(local.webhook_secret_ssm_keys)
+    GITHUB_APPS                       = jsonencode(var.github_apps)
+    PUSH_COALESCING_WINDOW            = var.push_coalescing_window
+    PUSH_COALESCING_TABLE             = var.push_coalescing_window > 0 ? aws_dynamodb_table.push_coalescing[0].name : ""
+    GITHUB_RATE_LIMIT_TABLE           = var.github_rate_limit_store == "dynamodb" ? aws_dynamodb_table.github_rate_limit[0].name : ""
+    GITHUB_RATE_LIMIT_RESERVE         = var.github_rate_limit_reserve
+    GITHUB_RATE_LIMIT_MAX_WAIT        = var.github_rate_limit_max_wait
+    GITHUB_RETRY_MAX_ATTEMPTS         = var.github_retry_max_attempts
+    GITHUB_RETRY_BASE_DELAY           = var.github_retry_base_delay
+    GITHUB_RETRY_MAX_DELAY            = var.github_retry_max_delay
+    GITHUB_HEDGE_PERCENTILE           = var.github_hedge_percentile
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = var.circuit_breaker_failure_threshold
+    CIRCUIT_BREAKER_SLOW_CALL_MS      = var.circuit_breaker_slow_call_ms
+    CIRCUIT_BREAKER_OPEN_SECONDS      = var.circuit_breaker_open_seconds
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES  = var.circuit_breaker_half_open_probes
+    CIRCUIT_BREAKER_POLICY            = var.circuit_breaker_policy
     TOKEN_SSM_KEYS = jsonencode({
-      for repo in local.private_repos : repo.name => coalesce(
+      for repo in local.private_repos : repo.config_key => coalesce(
         try(split(":parameter", repo.github_token_ssm_param_arn)[1], null),
         repo.github_token_ssm_key
       )
     })
-  }
+  })
 
-  publish = true
-  allowed_triggers = {
-    APIGatewayInvokeAccess = {
-      service    = "apigateway"
-      source_arn = "${local.execution_arn}/*/*"
-    }
-  }
+  create_lambda_function_url = var.create_lambda_function_url
+  # the URL targets the published version when provisioned concurrency is used given that provisioned
+  # concurrency only serves invocations of the version it's configured for
+  create_unqualified_alias_lambda_function_url = !local.provisioned_concurrency
+  # GitHub webhooks can't sign requests with AWS credentials so requests are authenticated via the webhook signature
+  authorization_type = "NONE"
+
+  publish                           = true
+  provisioned_concurrent_executions = var.lambda_provisioned_concurrent_executions
+  allowed_triggers = merge(
+    {
+      APIGatewayInvokeAccess = {
+        service    = "apigateway"
+        source_arn = "${local.execution_arn}/*/*"
+      }
+    },
+    var.lambda_warm_up_schedule_expression != null ? {
+      WarmUpScheduleInvokeAccess = {
+        service    = "events"
+        source_arn = aws_cloudwatch_event_rule.warm_up[0].arn
+      }
+    } : {}
+  )
   policies = [
     "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole",
     aws_iam_policy.lambda.arn
@@ -119,35 +453,118 @@ module "lambda_function" {
   ]
 }
 
+# GitHub API rate limit budgets shared across the Lambda Function's containers
+resource "aws_dynamodb_table" "github_rate_limit" {
+  count        = var.github_rate_limit_store == "dynamodb" ? 1 : 0
+  name         = "${var.function_name}-github-rate-limit"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "budget"
+
+  attribute {
+    name = "budget"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires"
+    enabled        = true
+  }
+}
+
+# file paths changed within commit ranges shared across the Lambda Function's containers
+resource "aws_dynamodb_table" "changed_files" {
+  count        = var.changed_files_cache_store == "dynamodb" ? 1 : 0
+  name         = "${var.function_name}-changed-files"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "range"
+
+  attribute {
+    name = "range"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires"
+    enabled        = true
+  }
+}
+
+# open push coalescing windows of each branch shared across the Lambda Function's containers
+resource "aws_dynamodb_table" "push_coalescing" {
+  count        = var.push_coalescing_window > 0 ? 1 : 0
+  name         = "${var.function_name}-push-coalescing"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "branch"
+
+  attribute {
+    name = "branch"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "ttl"
+    enabled        = true
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "warm_up" {
+  count               = var.lambda_warm_up_schedule_expression != null ? 1 : 0
+  name                = "${var.function_name}-warm-up"
+  description         = "Keeps the ${var.function_name} Lambda Function's containers warm"
+  schedule_expression = var.lambda_warm_up_schedule_expression
+}
+
+resource "aws_cloudwatch_event_target" "warm_up" {
+  count = var.lambda_warm_up_schedule_expression != null ? 1 : 0
+  rule  = aws_cloudwatch_event_rule.warm_up[0].name
+  arn   = local.lambda_target_arn
+  input = jsonencode({ warm_up = true })
+}
+
+# the webhook's repository is owned by the GitHub provider's owner so the owner is stripped from full names
 resource "github_repository_webhook" "this" {
-  count      = length(local.repos)
-  repository = local.repos[count.index].name
+  for_each   = local.webhook_repo_keys
+  repository = reverse(split("/", local.webhook_repos_by_key[each.key].name))[0]
 
   configuration {
-    url          = "${aws_api_gateway_deployment.this.invoke_url}${aws_api_gateway_stage.this.stage_name}${aws_api_gateway_resource.this.path}"
+    url          = local.webhook_url
     content_type = "json"
     insecure_ssl = false
-    secret       = random_password.github_webhook_secret.result
+    secret       = var.create_repo_webhook_secrets ? random_password.repo_webhook_secret[each.key].result : random_password.github_webhook_secret.result
   }
 
   active = true
   #pulls distinct filter group events
-  events = distinct(flatten([for group in local.repos[count.index].filter_groups : [for filter in group :
-  filter.pattern if filter.type == "event" && filter.exclude_matched_filter != true]]))
+  events = local.repo_webhook_events[each.key]
+}
+
+resource "github_organization_webhook" "this" {
+  count = var.create_organization_webhook ? 1 : 0
+
+  configuration {
+    url          = local.webhook_url
+    content_type = "json"
+    insecure_ssl = false
+    secret       = random_password.github_webhook_secret.result
+  }
+
+  active = true
+  #pulls distinct filter group events across all repos
+  events = local.organization_webhook_events
 }
 
 resource "aws_ssm_parameter" "github_token" {
-  count       = length(local.create_ssm_params)
-  name        = local.create_ssm_params[count.index].github_token_ssm_key
+  for_each    = local.create_ssm_param_keys
+  name        = local.private_repos_by_key[each.key].github_token_ssm_key
   description = "GitHub token used for accessing the private repo within ${var.function_name}"
   type        = "SecureString"
-  value       = local.create_ssm_params[count.index].github_token_ssm_value
-  tags        = local.create_ssm_params[count.index].github_token_ssm_tags
+  value       = local.private_repos_by_key[each.key].github_token_ssm_value
+  tags        = local.private_repos_by_key[each.key].github_token_ssm_tags
 }
 
 data "aws_ssm_parameter" "github_token" {
-  count = length(local.load_ssm_param_keys)
-  name  = local.load_ssm_param_keys[count.index]
+  for_each = nonsensitive(toset(local.load_ssm_param_keys))
+  name     = each.value
 }
 
 resource "aws_ssm_parameter" "github_secret" {
@@ -160,4 +577,21 @@ resource "aws_ssm_parameter" "github_secret" {
 
 resource "random_password" "github_webhook_secret" {
   length = 24
-}
\ No newline at end of file
+}
+
+resource "random_password" "repo_webhook_secret" {
+  for_each = nonsensitive(toset(keys(local.repo_webhook_secret_ssm_keys)))
+  length   = 24
+
+  # changing the repo's version regenerates the secret
+  keepers = { for key, value in { version = local.webhook_repos_by_key[each.key].webhook_secret_version } : key => value if value != null }
+}
+
+resource "aws_ssm_parameter" "repo_webhook_secret" {
+  for_each    = nonsensitive(toset(keys(local.repo_webhook_secret_ssm_keys)))
+  name        = local.repo_webhook_secret_ssm_keys[each.key]
+  description = "Secret value for the ${local.webhook_repos_by_key[each.key].name} GitHub webhook"
+  type        = "SecureString"
+  value       = random_password.repo_webhook_secret[each.key].result
+  tags        = var.github_secret_ssm_tags
+}
@@ -0,0 +1,175 @@
+"""
+Optimizes the filter groups config before it's deployed with the Lambda Function. Used as a Terraform
+external data source program:
+
+    stdin:  {"filter_groups": "<filter groups config JSON>", "events": "<repo key to webhook events JSON>"}
+    stdout: {"filter_groups": "<optimized filter groups config JSON>", "report": "<optimization report JSON>"}
+
+Every optimization preserves which payloads fulfill atleast one of the repo's filter groups:
+    - Duplicate filters within a group are removed
+    - `event` filters that don't change which events delivered by the repo's webhook fulfill the group are removed
+    - Groups that can't be fulfilled are removed:
+        - No event delivered by the repo's webhook fulfills the group's `event` filters
+        - The group includes and excludes the same pattern for a single-valued filter type
+    - Groups that are duplicates of a previous group are removed
+    - Groups that are subsumed by a group with a subset of their filters are removed
+"""
+import json
+import re
+import sys
+from typing import List, Optional, Tuple
+
+# GitHub sends ping events to every new webhook regardless of the webhook's events
+PING_EVENT = "ping"
+
+# filter types whose target is a single value so including and excluding the same pattern can't both match
+SINGLE_VALUE_TYPES = [
+    "event",
+    "commit_message",
+    "ref",
+    "base_ref",
+    "head_ref",
+    "head_sha",
+    "actor_account_id",
+    "action",
+    "pr_action",
+]
+
+
+def filter_key(filter_entry: dict) -> Tuple[str, str, bool]:
+    return (
+        filter_entry["type"],
+        filter_entry["pattern"],
+        bool(filter_entry.get("exclude_matched_filter")),
+    )
+
+
+def event_matches(filters: List[Tuple[str, str, bool]], event: str) -> bool:
+    """Returns True if the event fulfills all of the `event` filters"""
+    return all(
+        bool(re.search(pattern, event)) != exclude
+        for filter_type, pattern, exclude in filters
+        if filter_type == "event"
+    )
+
+
+def normalize_group(
+    group: List[dict], events: Optional[List[str]]
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Returns the group without redundant filters and the reason the group can't be fulfilled if any
+
+    :param group: Filter group
+    :param events: Events delivered by the repo's webhook. If None, events aren't used for optimizing
+    """
+    filters = {}
+    for filter_entry in group:
+        filters.setdefault(filter_key(filter_entry), filter_entry)
+    keys = list(filters.keys())
+
+    for filter_type, pattern, exclude in keys:
+        if not exclude and filter_type in SINGLE_VALUE_TYPES:
+            if (filter_type, pattern, True) in filters:
+                return [], f"includes and excludes `{filter_type}` pattern: {pattern}"
+
+    if events is not None:
+        universe = list(dict.fromkeys(events + [PING_EVENT]))
+        if not any(event_matches(keys, event) for event in universe):
+            return [], f"no webhook event fulfills the event filters: {universe}"
+
+        # event filters that don't change which webhook events fulfill the group are redundant
+        # exclude filters are checked first so that the group keeps its include filters
+        for key in sorted(keys, key=lambda key: not key[2]):
+            if key[0] != "event":
+                continue
+            remaining = [other for other in filters if other != key]
+            if all(
+                event_matches(remaining, event) == event_matches(filters, event)
+                for event in universe
+            ):
+                del filters[key]
+
+    return list(filters.values()), None
+
+
+def optimize_groups(
+    filter_groups: List[List[dict]], events: Optional[List[str]] = None
+) -> Tuple[List[List[dict]], dict]:
+    """
+    Returns the optimized filter groups and the report of the removed groups and filters
+
+    :param filter_groups: Repo's filter groups
+    :param events: Events delivered by the repo's webhook. If None, events aren't used for optimizing
+    """
+    report = {"groups": len(filter_groups), "removed_groups": [], "removed_filters": 0}
+
+    candidates = []
+    for index, group in enumerate(filter_groups):
+        normalized, unreachable = normalize_group(group, events)
+        if unreachable:
+            report["removed_groups"].append({"group": index, "reason": unreachable})
+            continue
+        report["removed_filters"] += len(group) - len(normalized)
+        candidates.append(
+            (index, normalized, frozenset(filter_key(f) for f in normalized))
+        )
+
+    kept = []
+    for index, normalized, keys in candidates:
+        reason = None
+        for other_index, _, other_keys in candidates:
+            if other_index == index:
+                continue
+            if other_keys == keys and other_index < index:
+                reason = f"duplicate of group {other_index}"
+            elif other_keys < keys:
+                reason = f"subsumed by group {other_index}"
+            if reason:
+                break
+
+        if reason:
+            report["removed_groups"].append({"group": index, "reason": reason})
+        else:
+            kept.append(normalized)
+
+    report["removed_groups"].sort(key=lambda removed: removed["group"])
+    report["optimized_groups"] = len(kept)
+
+    return kept, report
+
+
+def optimize(filter_groups: dict, events: Optional[dict] = None) -> Tuple[dict, dict]:
+    """
+    Returns the optimized filter groups config and the report for each repo
+
+    :param filter_groups: Mapping of repo keys to their filter groups
+    :param events: Mapping of repo keys to the events delivered by the repo's webhook
+    """
+    events = events or {}
+    optimized = {}
+    report = {}
+    for key, groups in filter_groups.items():
+        if not groups:
+            optimized[key] = groups
+            continue
+        optimized[key], report[key] = optimize_groups(groups, events.get(key))
+
+    return optimized, report
+
+
+def main():
+    query = json.load(sys.stdin)
+    optimized, report = optimize(
+        json.loads(query["filter_groups"]), json.loads(query.get("events") or "{}")
+    )
+    json.dump(
+        {
+            "filter_groups": json.dumps(optimized, separators=(",", ":")),
+            "report": json.dumps(report, separators=(",", ":")),
+        },
+        sys.stdout,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,11 @@ output "github_webhook_invoke_url" {
   value       = "${aws_api_gateway_deployment.this.invoke_url}${aws_api_gateway_stage.this.stage_name}${aws_api_gateway_resource.this.path}"
 }
 
+output "lambda_function_url" {
+  description = "Lambda Function URL the github webhook will ping if var.create_lambda_function_url is true"
+  value       = try(module.lambda_function.lambda_function_url, null)
+}
+
 output "webhook_urls" {
   description = "Map of repo webhook URLs"
   value       = { for repo in github_repository_webhook.this : repo.repository => repo.url }
@@ -15,6 +20,12 @@ output "webhook_ids" {
   sensitive   = true
 }
 
+output "organization_webhook_url" {
+  description = "URL of the GitHub organization webhook"
+  value       = try(github_organization_webhook.this[0].url, null)
+  sensitive   = true
+}
+
 output "function_arn" {
   description = "ARN of AWS Lambda Function used to validate Github webhook request"
   value       = module.lambda_function.lambda_function_arn
@@ -67,5 +78,11 @@ output "agw_log_group_name" {
 
 output "github_token_ssm_arns" {
   description = "ARNs of the GitHub token AWS SSM Parameter Store resources"
-  value       = try(aws_ssm_parameter.github_token[*].arn, [])
-}
\ No newline at end of file
+  value       = [for param in aws_ssm_parameter.github_token : param.arn]
+}
+
+output "filter_groups_optimization_report" {
+  description = "Filter groups and filters removed by the filter groups optimizer for each repo"
+  value       = try(jsondecode(data.external.filter_groups[0].result.report), null)
+  sensitive   = true
+}
@@ -0,0 +1,189 @@
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+class FakeGitHub:
+    """
+    Local GitHub REST API stand-in that serves the endpoints used by the Lambda Function with
+    configurable latency, error rates and rate limiting
+
+    Arguments:
+        latency_ms: Base latency added to every response
+        jitter_ms: Maximum random latency added on top of `latency_ms`
+        error_rate: Fraction of requests (0 to 1) that fail with a 502 response
+        rate_limit: Number of requests allowed before requests fail with a 403 rate limit response
+        changed_files: Number of file paths returned for compare requests
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_rate: float = 0,
+        rate_limit: int = 5000,
+        changed_files: int = 10,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.changed_files = changed_files
+
+        self.remaining = rate_limit
+        self.reset = int(time.time()) + 3600
+        self.request_count = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        log.debug(f"Fake GitHub API URL: {self.url}")
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def respond(self, path: str):
+        """Returns the response status, headers and body for the request path"""
+        with self.lock:
+            self.request_count += 1
+            limited = self.remaining <= 0 and not path.startswith("/rate_limit")
+            if not limited and not path.startswith("/rate_limit"):
+                self.remaining -= 1
+            headers = {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(max(self.remaining, 0)),
+                "X-RateLimit-Reset": str(self.reset),
+            }
+
+        time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+
+        if limited:
+            return 403, headers, {"message": "API rate limit exceeded"}
+        if random.random() < self.error_rate:
+            return 502, headers, {"message": "Server Error"}
+
+        if path.startswith("/rate_limit"):
+            resource = {
+                "limit": self.rate_limit,
+                "remaining": max(self.remaining, 0),
+                "reset": self.reset,
+            }
+            return (
+                200,
+                headers,
+                {
+                    "resources": {"core": resource, "search": resource},
+                    "rate": resource,
+                },
+            )
+
+        match = re.match(r"^/repos/([^/]+)/([^/]+)(/.*)?$", path)
+        if not match:
+            return 404, headers, {"message": "Not Found"}
+
+        full_name = f"{match.group(1)}/{match.group(2)}"
+        repo_url = f"{self.url}/repos/{full_name}"
+        resource = match.group(3) or ""
+
+        if resource == "":
+            return (
+                200,
+                headers,
+                {
+                    "id": 1,
+                    "name": match.group(2),
+                    "full_name": full_name,
+                    "url": repo_url,
+                    "private": False,
+                },
+            )
+        if resource.startswith("/compare/"):
+            return (
+                200,
+                headers,
+                {
+                    "url": f"{repo_url}{resource}",
+                    "files": [
+                        {
+                            "filename": f"src/module_{i}/file_{i}.py",
+                            "status": "modified",
+                        }
+                        for i in range(self.changed_files)
+                    ],
+                    "commits": [],
+                },
+            )
+        if resource.startswith("/commits/"):
+            sha = resource.split("/")[-1]
+            return (
+                200,
+                headers,
+                {
+                    "sha": sha,
+                    "url": f"{repo_url}{resource}",
+                    "commit": {"message": "fake commit message"},
+                    "files": [],
+                },
+            )
+
+        return 404, headers, {"message": "Not Found"}
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, headers, body = fake.respond(self.path)
+                content = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                return
+
+        return Handler
+
+
+class StubSSM:
+    """
+    AWS SSM client stand-in that returns the parameters from a local mapping
+
+    Arguments:
+        parameters: Mapping of SSM Parameter Store keys to their values
+        latency_ms: Latency added to every get_parameter() call
+    """
+
+    def __init__(self, parameters: dict, latency_ms: float = 0):
+        self.parameters = parameters
+        self.latency_ms = latency_ms
+
+    def get_parameter(self, Name, WithDecryption=False):
+        time.sleep(self.latency_ms / 1000)
+        return {
+            "Parameter": {"Name": Name, "Value": self.parameters[Name], "Version": 1}
+        }
@@ -0,0 +1,320 @@
+"""
+Local end-to-end load test for the Lambda Function.
+
+Signed GitHub deliveries are transformed into the event the API creates (see agw.tf) and passed to
+`lambda_handler()` either within the current process or within worker processes that each act as a
+separate Lambda container. GitHub is replaced with a local fake REST API with configurable latency,
+error rates and rate limiting and AWS SSM is replaced with a stub.
+
+Usage:
+    python -m tests.load.harness --deliveries 500 --concurrency 8 --latency-ms 50
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import List, Tuple
+from unittest.mock import patch
+
+from tests.load.fake_github import FakeGitHub, StubSSM
+
+log = logging.getLogger(__name__)
+stream = logging.StreamHandler(sys.stdout)
+log.addHandler(stream)
+log.setLevel(logging.INFO)
+
+SECRET_SSM_KEY = "load-test-secret"
+SECRET = "load-test-secret-value"
+
+DEFAULT_FILTER_GROUPS = {
+    "owner/load-test-repo": [
+        [
+            {"type": "event", "pattern": "push", "exclude_matched_filter": False},
+            {
+                "type": "base_ref",
+                "pattern": "^refs/heads/main$",
+                "exclude_matched_filter": False,
+            },
+            {"type": "file_path", "pattern": "^docs/", "exclude_matched_filter": False},
+        ],
+        [
+            {"type": "event", "pattern": "push", "exclude_matched_filter": False},
+            {"type": "file_path", "pattern": "\\.py$", "exclude_matched_filter": False},
+        ],
+    ]
+}
+
+
+def sign(secret: str, body: str) -> str:
+    """Returns the `X-Hub-Signature-256` header value GitHub sends for the body"""
+    return (
+        "sha256="
+        + hmac.new(
+            secret.encode("utf-8"), body.encode("utf-8"), hashlib.sha256
+        ).hexdigest()
+    )
+
+
+def push_delivery(index: int, repo_full_name: str, secret: str) -> Tuple[dict, str]:
+    """Returns the headers and raw body of a signed push delivery"""
+    body = json.dumps(
+        {
+            "ref": "refs/heads/main"
+            if index % 2 == 0
+            else f"refs/heads/feature-{index}",
+            "before": f"{index:040x}",
+            "after": f"{index + 1:040x}",
+            "repository": {
+                "name": repo_full_name.split("/")[-1],
+                "full_name": repo_full_name,
+            },
+            "head_commit": {"message": f"commit {index}"},
+            "sender": {"id": index},
+        },
+        separators=(",", ":"),
+    )
+    headers = {
+        "X-GitHub-Event": "push",
+        "X-GitHub-Delivery": str(index),
+        "X-Hub-Signature-256": sign(secret, body),
+        "Content-Type": "application/json",
+    }
+    return headers, body
+
+
+def mapping_template_event(headers: dict, body: str) -> dict:
+    """
+    Returns the event the API's non-proxy integration request mapping template creates for the request.
+    `$input.json('$')` re-serialises the body and `$util.escapeJavaScript()` escapes it within the
+    template's JSON so the function receives the re-serialised body as a string.
+    """
+    return {
+        "headers": {
+            "X-GitHub-Event": headers.get("X-GitHub-Event", ""),
+            "X-Hub-Signature-256": headers.get("X-Hub-Signature-256", ""),
+        },
+        "body": json.dumps(json.loads(body), separators=(",", ":"), ensure_ascii=False),
+    }
+
+
+def proxy_event(headers: dict, body: str) -> dict:
+    """Returns the event the API's proxy integration creates for the request"""
+    return {
+        "resource": "/github",
+        "path": "/github",
+        "httpMethod": "POST",
+        "headers": headers,
+        "body": body,
+        "isBase64Encoded": False,
+        "requestContext": {"resourcePath": "/github", "httpMethod": "POST"},
+    }
+
+
+def _function_env(github_url: str, filter_groups_path: str, log_level: str) -> dict:
+    return {
+        "AWS_DEFAULT_REGION": os.environ.get("AWS_DEFAULT_REGION", "us-west-2"),
+        "GITHUB_WEBHOOK_SECRET_SSM_KEY": SECRET_SSM_KEY,
+        "TOKEN_SSM_KEYS": json.dumps({}),
+        "FILTER_GROUPS_PATH": filter_groups_path,
+        "GITHUB_API_URL": github_url,
+        "LOG_LEVEL": log_level,
+    }
+
+
+def _init_worker(env: dict, ssm_latency_ms: float) -> None:
+    """Sets up the worker process as a Lambda container"""
+    os.environ.update(env)
+    from function import lambda_function
+
+    lambda_function.log.setLevel(env["LOG_LEVEL"])
+    lambda_function.ssm = StubSSM({SECRET_SSM_KEY: SECRET}, latency_ms=ssm_latency_ms)
+
+
+def _invoke(event: dict) -> Tuple[float, str]:
+    """Invokes the function and returns the invocation's latency in milliseconds and outcome"""
+    from function import lambda_function
+
+    start = time.perf_counter()
+    try:
+        response = lambda_function.lambda_handler(event, None)
+        if "statusCode" in response and response["statusCode"] != 200:
+            outcome = json.loads(response["body"])["type"]
+        else:
+            outcome = "success"
+    except lambda_function.LambdaException as e:
+        outcome = json.loads(str(e))["type"]
+    except Exception as e:
+        outcome = e.__class__.__name__
+
+    return (time.perf_counter() - start) * 1000, outcome
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Returns the nearest-rank percentile of the values"""
+    ordered = sorted(values)
+    rank = max(int(round(percent / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def run_load_test(
+    deliveries: int = 100,
+    concurrency: int = 4,
+    in_process: bool = False,
+    integration: str = "mapping",
+    filter_groups: dict = None,
+    repo_full_name: str = "owner/load-test-repo",
+    latency_ms: float = 0,
+    jitter_ms: float = 0,
+    error_rate: float = 0,
+    rate_limit: int = 5000,
+    changed_files: int = 10,
+    ssm_latency_ms: float = 0,
+    log_level: str = "WARNING",
+) -> dict:
+    """
+    Sends the signed deliveries to the function and returns the throughput and latency report
+
+    Arguments:
+        deliveries: Number of deliveries to send
+        concurrency: Number of worker processes. Each worker process acts as a separate Lambda container
+        in_process: Determines if the function is invoked sequentially within the current process
+        integration: API integration to emulate (`mapping` for the request mapping template or `proxy`)
+        filter_groups: Filter groups config. Defaults to `DEFAULT_FILTER_GROUPS`
+        repo_full_name: Repository the deliveries are sent for
+        latency_ms: Base latency of the fake GitHub API
+        jitter_ms: Maximum random latency added on top of `latency_ms`
+        error_rate: Fraction of fake GitHub API requests that fail
+        rate_limit: Number of fake GitHub API requests allowed before requests are rate limited
+        changed_files: Number of changed file paths returned by the fake GitHub API
+        ssm_latency_ms: Latency of the stubbed SSM client
+        log_level: Function's logging level
+    """
+    to_event = proxy_event if integration == "proxy" else mapping_template_event
+    events = [
+        to_event(*push_delivery(i, repo_full_name, SECRET)) for i in range(deliveries)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeGitHub(
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        error_rate=error_rate,
+        rate_limit=rate_limit,
+        changed_files=changed_files,
+    ) as github_api:
+        filter_groups_path = os.path.join(tmp_dir, "filter_groups.json")
+        with open(filter_groups_path, "w") as f:
+            json.dump(filter_groups or DEFAULT_FILTER_GROUPS, f)
+
+        env = _function_env(github_api.url, filter_groups_path, log_level)
+
+        start = time.perf_counter()
+        if in_process:
+            from function import lambda_function
+
+            # same per-container state the unit test fixtures reset so in-process runs don't share caches
+            state = {
+                "ssm": StubSSM({SECRET_SSM_KEY: SECRET}, ssm_latency_ms),
+                "_ssm_cache": {},
+                "_github_clients": {},
+                "_secret_registry": None,
+                "_config_store": None,
+                "_filter_config": None,
+                "_next_config_check": 0,
+                "_rate_limit_governor": None,
+                "_changed_files_cache": None,
+                "_github_apps": None,
+                "_coalescing_store": None,
+                "_durations": deque(maxlen=200),
+                "_request_policy": None,
+                "_circuit_breakers": {},
+                "_deadline": None,
+            }
+            with ExitStack() as stack:
+                stack.enter_context(patch.dict(os.environ, env))
+                for name, value in state.items():
+                    stack.enter_context(patch.object(lambda_function, name, value))
+                level = lambda_function.log.level
+                lambda_function.log.setLevel(log_level)
+                try:
+                    results = [_invoke(event) for event in events]
+                finally:
+                    lambda_function.log.setLevel(level)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=concurrency,
+                initializer=_init_worker,
+                initargs=(env, ssm_latency_ms),
+            ) as executor:
+                results = list(executor.map(_invoke, events))
+        duration = time.perf_counter() - start
+        github_requests = github_api.request_count
+
+    latencies = [latency for latency, _ in results]
+    return {
+        "deliveries": deliveries,
+        "concurrency": 1 if in_process else concurrency,
+        "duration_s": round(duration, 3),
+        "throughput_per_s": round(deliveries / duration, 2),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(max(latencies), 3),
+        "outcomes": dict(Counter(outcome for _, outcome in results)),
+        "github_requests": github_requests,
+    }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--deliveries", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--in-process", action="store_true")
+    parser.add_argument(
+        "--integration", choices=["mapping", "proxy"], default="mapping"
+    )
+    parser.add_argument(
+        "--filter-groups", help="Path to a filter groups JSON file", default=None
+    )
+    parser.add_argument("--repo", default="owner/load-test-repo")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--changed-files", type=int, default=10)
+    parser.add_argument("--ssm-latency-ms", type=float, default=0)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(args)
+
+    filter_groups = None
+    if args.filter_groups:
+        with open(args.filter_groups) as f:
+            filter_groups = json.load(f)
+
+    report = run_load_test(
+        deliveries=args.deliveries,
+        concurrency=args.concurrency,
+        in_process=args.in_process,
+        integration=args.integration,
+        filter_groups=filter_groups,
+        repo_full_name=args.repo,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        changed_files=args.changed_files,
+        ssm_latency_ms=args.ssm_latency_ms,
+        log_level=args.log_level,
+    )
+    log.info(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import pytest
+
+from tests.load import harness
+
+
+@pytest.mark.parametrize("integration", ["mapping", "proxy"])
+def test_in_process_load(integration):
+    report = harness.run_load_test(
+        deliveries=20, in_process=True, integration=integration, latency_ms=1
+    )
+
+    assert report["outcomes"] == {"success": 20}
+    assert report["p50_ms"] <= report["p95_ms"] <= report["p99_ms"] <= report["max_ms"]
+
+
+def test_concurrent_load():
+    report = harness.run_load_test(deliveries=20, concurrency=2, latency_ms=1)
+
+    assert report["outcomes"] == {"success": 20}
+
+
+def test_rate_limited_load():
+    report = harness.run_load_test(deliveries=10, in_process=True, rate_limit=3)
+
+    assert report["outcomes"].get("success", 0) < 10
+    assert sum(report["outcomes"].values()) == 10
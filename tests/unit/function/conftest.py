@@ -0,0 +1,23 @@
+from collections import deque
+
+import pytest
+from function import lambda_function
+
+
+@pytest.fixture(autouse=True)
+def reset_cache(monkeypatch):
+    """Clears the function's per-container caches so that tests don't share state"""
+    monkeypatch.setattr(lambda_function, "_ssm_cache", {})
+    monkeypatch.setattr(lambda_function, "_github_clients", {})
+    monkeypatch.setattr(lambda_function, "_secret_registry", None)
+    monkeypatch.setattr(lambda_function, "_config_store", None)
+    monkeypatch.setattr(lambda_function, "_filter_config", None)
+    monkeypatch.setattr(lambda_function, "_next_config_check", 0)
+    monkeypatch.setattr(lambda_function, "_rate_limit_governor", None)
+    monkeypatch.setattr(lambda_function, "_changed_files_cache", None)
+    monkeypatch.setattr(lambda_function, "_github_apps", None)
+    monkeypatch.setattr(lambda_function, "_coalescing_store", None)
+    monkeypatch.setattr(lambda_function, "_durations", deque(maxlen=200))
+    monkeypatch.setattr(lambda_function, "_request_policy", None)
+    monkeypatch.setattr(lambda_function, "_circuit_breakers", {})
+    monkeypatch.setattr(lambda_function, "_deadline", None)
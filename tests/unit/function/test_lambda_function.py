@@ -5,10 +5,14 @@ import sys
 import hmac
 import hashlib
 import json
+import base64
 import re
-from unittest.mock import patch, mock_open
+import time
+import datetime
+from unittest.mock import Mock, patch, mock_open
 from function import lambda_function
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 
 log = logging.getLogger(__name__)
@@ -79,6 +83,54 @@ def test_invalid_sig(mock_ssm, header_sig, payload, github_secret, expected_msg)
         lambda_function.validate_sig(header_sig, payload)
 
 
+@patch.dict(
+    os.environ,
+    {
+        "GITHUB_WEBHOOK_SECRET_SSM_KEYS": json.dumps(
+            {
+                "default": ["default-key"],
+                "repos": {"repo": ["new-key", "old-key", "deleted-key"]},
+            }
+        )
+    },
+)
+@patch("function.lambda_function.ssm")
+@pytest.mark.parametrize(
+    "secret,repo_key,expected_valid",
+    [
+        pytest.param("new", "repo", True, id="repo_current_secret"),
+        pytest.param("old", "repo", True, id="repo_previous_secret"),
+        pytest.param("default", "repo", False, id="repo_default_secret"),
+        pytest.param("default", "other-repo", True, id="default_secret"),
+        pytest.param("new", None, False, id="default_repo_secret"),
+    ],
+)
+def test_secret_registry_validate_sig(mock_ssm, secret, repo_key, expected_valid):
+    """Ensure that validate_sig() accepts any of the repo's active secrets loaded within one batch"""
+    mock_ssm.get_parameters.return_value = {
+        "Parameters": [
+            {"Name": f"{value}-key", "Value": value}
+            for value in ["default", "new", "old"]
+        ],
+        "InvalidParameters": ["deleted-key"],
+    }
+    payload = "foo"
+    header_sig = "sha256=" + create_sha256_sig(secret, payload)
+
+    for _ in range(2):
+        if expected_valid:
+            lambda_function.validate_sig(header_sig, payload, repo_key=repo_key)
+        else:
+            with pytest.raises(
+                lambda_function.ClientException,
+                match="Header signature and expected signature do not match",
+            ):
+                lambda_function.validate_sig(header_sig, payload, repo_key=repo_key)
+
+    mock_ssm.get_parameters.assert_called_once()
+    mock_ssm.get_parameter.assert_not_called()
+
+
 @patch.dict(os.environ, {"TOKEN_SSM_KEYS": json.dumps({"repo": "ssm-key"})})
 @patch("github.Github.get_repo")
 @pytest.mark.parametrize(
@@ -592,7 +644,7 @@ def test_no_matched_filter_group(
 
 @patch("function.lambda_function.validate_sig", return_value=None)
 @patch("function.lambda_function.validate_payload", return_value="success")
-@patch("json.load", return_value=defaultdict(dict))
+@patch("json.load", return_value={"": []})
 @patch("json.loads", return_value=defaultdict(lambda: defaultdict(lambda: "")))
 @patch("builtins.open", new_callable=mock_open, read_data="mock_open")
 def test_successful_lambda_handler(
@@ -629,3 +681,1522 @@ def test_error_lambda_handler(
 
     with pytest.raises(lambda_function.LambdaException):
         lambda_function.lambda_handler(event, {})
+
+
+@patch.dict(
+    os.environ,
+    {
+        "GITHUB_WEBHOOK_SECRET_SSM_KEY": "dummy-ssm-key",
+        "TOKEN_SSM_KEYS": json.dumps({"repo": "ssm-key"}),
+    },
+)
+@patch("github.Github.get_rate_limit")
+@patch("function.lambda_function.validate_payload")
+@patch("function.lambda_function.ssm")
+@patch(
+    "function.lambda_function.load_filter_config",
+    return_value=lambda_function.FilterConfig(
+        {
+            "repo": [
+                [{"type": "event", "pattern": "push", "exclude_matched_filter": False}]
+            ]
+        }
+    ),
+)
+def test_warm_up_lambda_handler(
+    mock_load_filter_config, mock_ssm, mock_validate_payload, mock_get_rate_limit
+):
+    """Ensure that lambda_handler() loads the function's dependencies without validating the warm-up event"""
+    mock_ssm.get_parameter.return_value = {"Parameter": {"Value": "bar"}}
+    mock_get_rate_limit.return_value.core = dotdict(
+        {"remaining": 60, "reset": datetime.datetime(2030, 1, 1)}
+    )
+
+    response = lambda_function.lambda_handler({"warm_up": True}, {})
+
+    assert response == {"message": "Function is warm"}
+    assert mock_ssm.get_parameter.call_count == 2
+    # one unauthenticated client and one client for the repo's token
+    assert mock_get_rate_limit.call_count == 2
+    mock_validate_payload.assert_not_called()
+
+    # cached SSM values are used within subsequent invocations
+    lambda_function.get_ssm_value("dummy-ssm-key")
+    assert mock_ssm.get_parameter.call_count == 2
+
+
+@patch.dict(
+    os.environ,
+    {
+        "GITHUB_WEBHOOK_SECRET_SSM_KEY": "dummy-ssm-key",
+        "TOKEN_SSM_KEYS": json.dumps(
+            {"repo-a": "ssm-key-a", "repo-b": "ssm-key-b", "repo-c": "ssm-key-a"}
+        ),
+    },
+)
+@patch("github.Github.get_rate_limit")
+@patch("function.lambda_function.ssm")
+@patch("function.lambda_function.load_filter_config")
+def test_warm_up_batches_tokens(mock_load_filter_config, mock_ssm, mock_get_rate_limit):
+    """Ensure that warm_up() loads the repo tokens within one batch and only warms one client per distinct token"""
+    mock_ssm.get_parameter.return_value = {"Parameter": {"Value": "secret"}}
+    mock_ssm.get_parameters.return_value = {
+        "Parameters": [
+            {"Name": "ssm-key-a", "Value": "token-a"},
+            {"Name": "ssm-key-b", "Value": "token-b"},
+        ]
+    }
+    mock_get_rate_limit.return_value.core = dotdict(
+        {"remaining": 60, "reset": datetime.datetime(2030, 1, 1)}
+    )
+
+    lambda_function.warm_up()
+
+    mock_ssm.get_parameters.assert_called_once()
+    assert sorted(mock_ssm.get_parameters.call_args[1]["Names"]) == [
+        "ssm-key-a",
+        "ssm-key-b",
+    ]
+    # one unauthenticated client and one client per distinct token
+    assert mock_get_rate_limit.call_count == 3
+    # the rate limit responses seed the container's budgets
+    assert lambda_function.get_rate_limit_governor().budget("anonymous") == (
+        60,
+        1893456000,
+    )
+
+
+@patch.dict(os.environ, {"GITHUB_WEBHOOK_SECRET_SSM_KEY": "dummy-ssm-key"})
+@patch(
+    "function.lambda_function.ssm.get_parameter",
+    return_value={"Parameter": {"Value": "bar"}},
+)
+@patch(
+    "function.lambda_function.validate_payload",
+    return_value={"message": "Payload fulfills atleast one filter group"},
+)
+@patch(
+    "function.lambda_function.load_filter_config",
+    return_value=lambda_function.FilterConfig(
+        {"dummy-repo": [[{"type": "event", "pattern": "push"}]]}
+    ),
+)
+@pytest.mark.parametrize(
+    "headers,is_base64_encoded,secret,expected_status_code",
+    [
+        pytest.param(
+            {"X-GitHub-Event": "push", "X-Hub-Signature-256": None},
+            False,
+            "bar",
+            200,
+            id="api_proxy",
+        ),
+        pytest.param(
+            {"x-github-event": "push", "x-hub-signature-256": None},
+            True,
+            "bar",
+            200,
+            id="function_url",
+        ),
+        pytest.param(
+            {"X-GitHub-Event": "push", "X-Hub-Signature-256": None},
+            False,
+            "baz",
+            400,
+            id="invalid_sig",
+        ),
+    ],
+)
+def test_proxy_lambda_handler(
+    mock_load_filter_config,
+    mock_validate_payload,
+    mock_ssm_get_parameter,
+    headers,
+    is_base64_encoded,
+    secret,
+    expected_status_code,
+):
+    """Ensure that lambda_handler() validates the raw body of proxy events and returns proxy responses"""
+    body = json.dumps(
+        {"repository": {"name": "dummy-repo"}, "ref": "refs/heads/master"}
+    )
+    headers = {
+        key: "sha256=" + create_sha256_sig(secret, body) if value is None else value
+        for key, value in headers.items()
+    }
+    event = {
+        "headers": headers,
+        "body": base64.b64encode(body.encode("utf-8")).decode("utf-8")
+        if is_base64_encoded
+        else body,
+        "isBase64Encoded": is_base64_encoded,
+        "requestContext": {},
+    }
+
+    response = lambda_function.lambda_handler(event, {})
+
+    assert response["statusCode"] == expected_status_code
+    assert json.loads(response["body"]).get("isError", False) != (
+        expected_status_code == 200
+    )
+
+
+@patch.dict(os.environ, {"TOKEN_SSM_KEYS": json.dumps({})})
+@patch("github.Github.get_repo")
+def test_trace_validate_payload(mock_repo):
+    """Ensure that validate_payload() records the filter group outcomes and data fetches within the trace"""
+    mock_repo.return_value.compare.return_value.files = [
+        dotdict({"filename": path}) for path in ["foo.sh", "bar.sh"]
+    ]
+    payload = {
+        "repository": {"full_name": "user/dummy-repo", "name": "dummy-repo"},
+        "ref": "ref/heads/master",
+        "before": "base-sha",
+        "after": "head-sha",
+        "head_commit": {"message": "dummy-head-commit-message"},
+        "sender": {"id": "dummy-sender-id"},
+    }
+    filter_groups = [
+        [
+            {
+                "type": "file_path",
+                "pattern": ".+\\.py",
+                "exclude_matched_filter": False,
+            },
+            {"type": "event", "pattern": "push", "exclude_matched_filter": False},
+        ],
+        [
+            {"type": "event", "pattern": "push", "exclude_matched_filter": False},
+            {"type": "base_ref", "pattern": "master", "exclude_matched_filter": False},
+        ],
+    ]
+    trace = lambda_function.Trace()
+
+    lambda_function.validate_payload("push", payload, filter_groups, trace=trace)
+
+    trace = trace.to_dict()
+    assert [group["matched"] for group in trace["groups"]] == [False, True]
+    # first group is decided by the file path filter that scanned all file paths
+    assert trace["groups"][0]["decided_by"] == 0
+    assert trace["groups"][0]["filters"][0]["scanned"] == 2
+    assert len(trace["groups"][0]["filters"]) == 1
+    assert trace["groups"][1]["decided_by"] == 1
+    assert [fetch["name"] for fetch in trace["fetches"]] == [
+        "changed_files_cache.get",
+        "github.credentials",
+        "github.get_repo",
+        "github.compare",
+        "changed_files_cache.put",
+    ]
+
+
+@patch.dict(os.environ, {"TOKEN_SSM_KEYS": json.dumps({})})
+@patch("github.Github.get_repo")
+def test_match_filter_groups(mock_repo):
+    """Ensure that match_filter_groups() returns every matched filter group and evaluates each distinct filter once"""
+    mock_repo.return_value.compare.return_value.files = [
+        dotdict({"filename": path}) for path in ["foo.py", "bar.sh"]
+    ]
+    payload = {
+        "repository": {"full_name": "user/dummy-repo", "name": "dummy-repo"},
+        "ref": "ref/heads/master",
+        "before": "base-sha",
+        "after": "head-sha",
+        "head_commit": {"message": "dummy-head-commit-message"},
+        "sender": {"id": "dummy-sender-id"},
+    }
+    push = {"type": "event", "pattern": "push", "exclude_matched_filter": False}
+    py = {"type": "file_path", "pattern": "\\.py$", "exclude_matched_filter": False}
+    filter_groups = [
+        [push, py],
+        [push, {"type": "base_ref", "pattern": "dev", "exclude_matched_filter": False}],
+        [dict(push), dict(py)],
+        [],
+    ]
+
+    with patch.object(
+        lambda_function.FilterEvaluator,
+        "__call__",
+        autospec=True,
+        side_effect=lambda_function.FilterEvaluator.__call__,
+    ) as mock_evaluate:
+        matched_groups = lambda_function.match_filter_groups(
+            "push", payload, filter_groups
+        )
+
+    assert matched_groups == [0, 2, 3]
+    assert mock_evaluate.call_count == 3
+
+
+def test_filter_evaluator_shared_work():
+    """Ensure that FilterEvaluator resolves each filter type once and shares scans between include and exclude filters"""
+    evaluator = lambda_function.FilterEvaluator(
+        {"event": "push", "file_path": ["foo.py", "bar.sh", "baz.py"]},
+        {"labels": [{"name": "bug"}, {"name": "docs"}]},
+    )
+
+    with patch(
+        "function.lambda_function.compile_json_path",
+        wraps=lambda_function.compile_json_path,
+    ) as mock_json_path:
+        assert evaluator(
+            {
+                "type": "$.labels[*].name",
+                "pattern": "bug",
+                "exclude_matched_filter": False,
+            }
+        ) == (True, 1)
+        assert evaluator(
+            {
+                "type": "$.labels[*].name",
+                "pattern": "docs",
+                "exclude_matched_filter": True,
+            }
+        ) == (True, 1)
+    assert mock_json_path.call_count == 1
+
+    assert evaluator(
+        {"type": "file_path", "pattern": "\\.py$", "exclude_matched_filter": True}
+    ) == (True, 2)
+    # include variant reuses the search results of the exclude variant's scan
+    assert evaluator.hits[("file_path", "\\.py$")] == [True, False]
+    assert evaluator(
+        {"type": "file_path", "pattern": "\\.py$", "exclude_matched_filter": False}
+    ) == (True, 1)
+    assert evaluator(
+        {"type": "file_path", "pattern": "\\.md$", "exclude_matched_filter": False}
+    ) == (False, 3)
+
+
+@pytest.mark.parametrize(
+    "pattern,expected",
+    [
+        pytest.param("^services/payments/", "services/payments/", id="directory"),
+        pytest.param("^infra/.*\\.tf$", "infra/", id="directory_and_suffix"),
+        pytest.param("^docs\\.d/", "docs.d/", id="escaped_literal"),
+        pytest.param("^srcs?/", "src", id="quantified_literal"),
+        pytest.param("(?i)^docs/", None, id="case_insensitive"),
+        pytest.param("^docs/|^site/", None, id="alternation"),
+        pytest.param("docs/", None, id="unanchored"),
+        pytest.param("^\\w+/", None, id="character_class"),
+    ],
+)
+def test_literal_prefix(pattern, expected):
+    """Ensure that literal_prefix() only returns text that every match of the pattern starts with"""
+    assert lambda_function.literal_prefix(pattern) == expected
+
+
+@pytest.mark.parametrize("exclude", [False, True])
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "^services/payments/",
+        "^services/pay",
+        "^infra/.*\\.tf$",
+        "^infra/modules/[a-z]+/main\\.tf$",
+        "^docs/",
+        "^services/payments/api\\.py$",
+    ],
+)
+def test_filter_evaluator_path_prefix_index(pattern, exclude):
+    """Ensure that anchored file_path filters evaluated with the path prefix index match the same as a scan of every path"""
+    paths = [
+        "services/payments/api.py",
+        "services/payments/db/models.py",
+        "services/payouts/api.py",
+        "infra/main.tf",
+        "infra/modules/vpc/main.tf",
+        "infra/modules/vpc/README.md",
+        "README.md",
+    ]
+    filter_entry = {
+        "type": "file_path",
+        "pattern": pattern,
+        "exclude_matched_filter": exclude,
+    }
+    evaluator = lambda_function.FilterEvaluator({"file_path": paths}, {})
+
+    matched, scanned = evaluator(filter_entry)
+    assert matched == any(bool(re.search(pattern, path)) != exclude for path in paths)
+    # only the paths under the pattern's prefix are searched
+    assert scanned <= len([path for path in paths if path.startswith(pattern[1:5])])
+
+
+def test_path_prefix_index():
+    """Ensure that PathPrefixIndex finds the paths under partial and complete directory prefixes"""
+    index = lambda_function.PathPrefixIndex(["a/b/c.py", "a/bc/d.py", "b/e.py", "a/b"])
+
+    def with_prefix(prefix):
+        start, end = index.with_prefix(prefix)
+        return index.paths[start:end]
+
+    assert with_prefix("a/b") == ["a/b", "a/b/c.py", "a/bc/d.py"]
+    assert with_prefix("a/b/") == ["a/b/c.py"]
+    assert with_prefix("c/") == []
+
+
+def test_filter_config_distinct_filters():
+    """Ensure that FilterConfig stores filters that are duplicated across repos once"""
+    config = lambda_function.FilterConfig(
+        {
+            "foo": [
+                [{"type": "event", "pattern": "push", "exclude_matched_filter": False}]
+            ],
+            "bar": [
+                [{"type": "event", "pattern": "push", "exclude_matched_filter": False}],
+                [{"type": "event", "pattern": "push", "exclude_matched_filter": True}],
+            ],
+        }
+    )
+
+    assert len(config.filters) == 2
+    assert config.matrices["foo"].filters[0] is config.matrices["bar"].filters[0]
+
+
+@pytest.mark.parametrize(
+    "full_name,name,expected_key",
+    [
+        pytest.param("owner/repo", "repo", "owner/repo", id="exact_full_name"),
+        pytest.param("other-owner/repo", "repo", "repo", id="exact_name"),
+        pytest.param(
+            "Owner/Service-API", "Service-API", "glob:owner/service-*", id="glob"
+        ),
+        pytest.param("owner/web-ui", "web-ui", "regex:owner/(api|web)-.+", id="regex"),
+        pytest.param("owner/web", "web", None, id="unmatched_regex"),
+        pytest.param("other-owner/foo", "foo", None, id="unknown"),
+    ],
+)
+def test_repo_index(full_name, name, expected_key):
+    """Ensure that RepoIndex resolves exact keys before glob and regex patterns"""
+    index = lambda_function.RepoIndex(
+        [
+            "glob:owner/service-*",
+            "regex:owner/(api|web)-.+",
+            "owner/repo",
+            "repo",
+        ]
+    )
+
+    assert index.lookup(full_name, name) == expected_key
+
+
+@patch("function.lambda_function.emit_metric")
+@patch("time.sleep")
+def test_request_policy_retries(mock_sleep, mock_emit_metric):
+    """Ensure that transient GitHub errors are retried after a capped and jittered backoff and that other errors aren't retried"""
+    policy = lambda_function.RequestPolicy(
+        max_attempts=3, base_delay=0.1, max_delay=0.15
+    )
+    outcomes = [
+        lambda_function.github.GithubException(502, "Bad Gateway"),
+        lambda_function.github.GithubException(503, "Service Unavailable"),
+        "repo",
+    ]
+
+    def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert policy.call("github.get_repo", call) == "repo"
+    delays = [c.args[0] for c in mock_sleep.call_args_list]
+    assert len(delays) == 2
+    assert 0 <= delays[0] <= 0.1 and 0 <= delays[1] <= 0.15
+    assert [c.args[0] for c in mock_emit_metric.call_args_list] == [
+        "GitHubRetries",
+        "GitHubRetries",
+    ]
+
+    mock_sleep.reset_mock()
+    with pytest.raises(lambda_function.github.UnknownObjectException):
+        policy.call(
+            "github.get_repo",
+            Mock(side_effect=lambda_function.github.UnknownObjectException(404, "")),
+        )
+    mock_sleep.assert_not_called()
+
+
+@patch("function.lambda_function.emit_metric")
+def test_request_policy_hedges_slow_attempts(mock_emit_metric):
+    """Ensure that attempts slower than the latency percentile are hedged and the first response is used"""
+    policy = lambda_function.RequestPolicy(hedge_percentile=95, min_samples=20)
+    policy.latencies["github.compare"] = deque([0.01] * 20)
+    delays = [1, 0]
+
+    def call():
+        delay = delays.pop(0)
+        time.sleep(delay)
+        return delay
+
+    start = time.perf_counter()
+    assert policy.call("github.compare", call) == 0
+    assert time.perf_counter() - start < 0.5
+    assert [c.args[0] for c in mock_emit_metric.call_args_list] == [
+        "GitHubHedgedRequests",
+        "GitHubHedgeWins",
+    ]
+
+
+@pytest.mark.parametrize("policy", ["fail_closed", "fail_open"])
+@patch.dict(
+    os.environ, {"TOKEN_SSM_KEYS": json.dumps({}), "DEADLINE_RESERVE_MS": "500"}
+)
+@patch("github.Github.get_repo")
+@patch("function.lambda_function.validate_sig", return_value=None)
+@patch(
+    "function.lambda_function.load_filter_config",
+    return_value=lambda_function.FilterConfig(
+        {
+            "repo": [
+                [
+                    {
+                        "type": "file_path",
+                        "pattern": "^docs/",
+                        "exclude_matched_filter": False,
+                    }
+                ]
+            ]
+        }
+    ),
+)
+def test_deadline_lambda_handler(
+    mock_load_filter_config, mock_validate_sig, mock_repo, policy
+):
+    """Ensure that lambda_handler() abandons GitHub calls that outlast the invocation's deadline and returns the deadline policy's decision"""
+    mock_repo.side_effect = lambda *args, **kwargs: time.sleep(2)
+    event = {
+        "headers": {"X-GitHub-Event": "push", "X-Hub-Signature-256": "sha256=foo"},
+        "body": json.dumps(
+            {
+                "repository": {"name": "repo", "full_name": "user/repo"},
+                "ref": "refs/heads/master",
+                "before": "base-sha",
+                "after": "head-sha",
+                "head_commit": {"message": "foo"},
+                "sender": {"id": 1},
+            }
+        ),
+    }
+    context = dotdict({"get_remaining_time_in_millis": lambda: 600})
+
+    start = time.perf_counter()
+    with patch.dict(os.environ, {"DEADLINE_POLICY": policy}):
+        if policy == "fail_open":
+            assert "message" in lambda_function.lambda_handler(event, context)
+        else:
+            with pytest.raises(
+                lambda_function.LambdaException, match="DeadlineExceededException"
+            ):
+                lambda_function.lambda_handler(event, context)
+    assert time.perf_counter() - start < 0.5
+    assert lambda_function._deadline is None
+
+
+@pytest.mark.parametrize("policy", ["fail_closed", "fail_open"])
+@patch.dict(
+    os.environ,
+    {"GITHUB_WEBHOOK_SECRET_SSM_KEY": "secret-key", "DEADLINE_RESERVE_MS": "500"},
+)
+@patch("function.lambda_function.emit_metric")
+@patch("function.lambda_function.ssm")
+@patch("function.lambda_function.validate_payload")
+@patch(
+    "function.lambda_function.load_filter_config",
+    return_value=lambda_function.FilterConfig(
+        {"repo": [[{"type": "event", "pattern": "push"}]]}
+    ),
+)
+def test_deadline_validate_sig_lambda_handler(
+    mock_load_filter_config, mock_validate_payload, mock_ssm, mock_emit_metric, policy
+):
+    """Ensure that a secret load that outlasts the invocation's deadline is returned as a deadline error regardless of the deadline policy"""
+    mock_ssm.get_parameter.side_effect = lambda *args, **kwargs: time.sleep(2)
+    event = {
+        "headers": {"X-GitHub-Event": "push", "X-Hub-Signature-256": "sha256=foo"},
+        "body": json.dumps({"repository": {"name": "repo", "full_name": "user/repo"}}),
+    }
+    context = dotdict({"get_remaining_time_in_millis": lambda: 600})
+
+    start = time.perf_counter()
+    with patch.dict(os.environ, {"DEADLINE_POLICY": policy}):
+        with pytest.raises(
+            lambda_function.LambdaException, match="DeadlineExceededException"
+        ):
+            lambda_function.lambda_handler(event, context)
+    assert time.perf_counter() - start < 0.5
+    mock_emit_metric.assert_any_call("DeadlineExceeded")
+    mock_validate_payload.assert_not_called()
+
+
+@patch("function.lambda_function.validate_sig", return_value=None)
+@patch("function.lambda_function.validate_payload")
+@patch(
+    "function.lambda_function.load_filter_config",
+    return_value=lambda_function.FilterConfig(
+        {"owner/repo": [[{"type": "event", "pattern": "push"}]]}
+    ),
+)
+def test_unknown_repo_lambda_handler(
+    mock_load_filter_config, mock_validate_payload, mock_validate_sig
+):
+    """Ensure that lambda_handler() raises a client exception for repos without filter groups"""
+    event = {
+        "headers": {"X-GitHub-Event": "push", "X-Hub-Signature-256": "sha256=foo"},
+        "body": json.dumps({"repository": {"name": "repo", "full_name": "user/repo"}}),
+    }
+
+    with pytest.raises(
+        lambda_function.ClientException,
+        match="Filter groups were not defined for repo: user/repo",
+    ):
+        lambda_function.lambda_handler(event, {})
+    mock_validate_payload.assert_not_called()
+
+
+@patch("function.lambda_function.validate_sig", return_value=None)
+@patch("function.lambda_function.validate_payload", return_value="success")
+@patch(
+    "function.lambda_function.load_filter_config",
+    return_value=lambda_function.FilterConfig(
+        {
+            "repo": [
+                [
+                    {
+                        "type": "event",
+                        "pattern": "push",
+                        "exclude_matched_filter": False,
+                    },
+                    {
+                        "type": "base_ref",
+                        "pattern": "^refs/heads/main$",
+                        "exclude_matched_filter": False,
+                    },
+                    {
+                        "type": "file_path",
+                        "pattern": "^docs/",
+                        "exclude_matched_filter": False,
+                    },
+                ],
+                [
+                    {
+                        "type": "event",
+                        "pattern": "pull_request",
+                        "exclude_matched_filter": False,
+                    },
+                    {
+                        "type": "pr_action",
+                        "pattern": "opened",
+                        "exclude_matched_filter": True,
+                    },
+                ],
+            ]
+        }
+    ),
+)
+@pytest.mark.parametrize(
+    "event_header,payload,expected_passed",
+    [
+        pytest.param(
+            "push",
+            {"ref": "refs/heads/main", "head_commit": {"message": "foo"}},
+            True,
+            id="push_main",
+        ),
+        pytest.param(
+            "push",
+            {"ref": "refs/heads/feature", "head_commit": {"message": "foo"}},
+            False,
+            id="push_feature",
+        ),
+        pytest.param(
+            "pull_request",
+            {
+                "action": "opened",
+                "pull_request": {"base": {"ref": "main"}, "head": {"ref": "foo"}},
+            },
+            False,
+            id="pr_excluded_action",
+        ),
+        pytest.param(
+            "pull_request",
+            {
+                "action": "synchronize",
+                "pull_request": {"base": {"ref": "main"}, "head": {"ref": "foo"}},
+            },
+            True,
+            id="pr_action",
+        ),
+        pytest.param("release", {}, False, id="unmatched_event"),
+        pytest.param(
+            "push", {"head_commit": {"message": "foo"}}, False, id="missing_ref"
+        ),
+    ],
+)
+def test_prefilter_lambda_handler(
+    mock_load_filter_config,
+    mock_validate_payload,
+    mock_validate_sig,
+    event_header,
+    payload,
+    expected_passed,
+):
+    """
+    Ensure that lambda_handler() rejects requests that can't fulfill any filter group before
+    validating the signature and that requests the pre-filter can't evaluate are passed on
+    """
+    payload = {
+        "repository": {"name": "repo", "full_name": "user/repo"},
+        "sender": {"id": 1},
+        **payload,
+    }
+    event = {
+        "headers": {
+            "X-GitHub-Event": event_header,
+            "X-Hub-Signature-256": "sha256=foo",
+        },
+        "body": json.dumps(payload),
+    }
+
+    if expected_passed:
+        assert lambda_function.lambda_handler(event, {}) == "success"
+        mock_validate_sig.assert_called_once()
+    else:
+        with pytest.raises(
+            lambda_function.LambdaException,
+            match="Payload does not fulfill trigger requirements",
+        ):
+            lambda_function.lambda_handler(event, {})
+        mock_validate_sig.assert_not_called()
+        mock_validate_payload.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "filter_type,pattern,expected",
+    [
+        pytest.param("commit_message", "deploy", True, id="remote_field"),
+        pytest.param("ref", "main", True, id="unmapped_field"),
+        pytest.param("pr_action", "closed", False, id="mapped_field"),
+    ],
+)
+def test_passes_prefilter_unresolved_fields(filter_type, pattern, expected):
+    """
+    Ensure that the pre-filter treats filters whose target values aren't available within the
+    request as matched
+    """
+    config = lambda_function.FilterConfig(
+        {
+            "repo": [
+                [
+                    {
+                        "type": "event",
+                        "pattern": "pull_request",
+                        "exclude_matched_filter": False,
+                    },
+                    {
+                        "type": filter_type,
+                        "pattern": pattern,
+                        "exclude_matched_filter": False,
+                    },
+                ]
+            ]
+        }
+    )
+    payload = {
+        "action": "opened",
+        "repository": {"name": "repo", "full_name": "user/repo"},
+        "sender": {"id": 1},
+        "pull_request": {"base": {"ref": "main"}, "head": {"ref": "foo"}},
+    }
+
+    assert (
+        lambda_function.passes_prefilter(
+            "pull_request", payload, config.prefilter_groups["repo"]
+        )
+        == expected
+    )
+
+
+@pytest.mark.parametrize(
+    "event,payload,expected",
+    [
+        pytest.param(
+            "release",
+            {
+                "action": "published",
+                "release": {"tag_name": "v1.0.0", "target_commitish": "main"},
+            },
+            {"ref": "v1.0.0", "base_ref": "main", "action": "published"},
+            id="release",
+        ),
+        pytest.param(
+            "workflow_run",
+            {
+                "action": "completed",
+                "workflow_run": {
+                    "head_branch": "feature",
+                    "head_sha": "head-sha",
+                    "head_commit": {"message": "foo"},
+                },
+            },
+            {
+                "ref": "feature",
+                "head_ref": "feature",
+                "head_sha": "head-sha",
+                "commit_message": "foo",
+            },
+            id="workflow_run",
+        ),
+        pytest.param(
+            "merge_group",
+            {
+                "merge_group": {
+                    "base_ref": "refs/heads/main",
+                    "head_ref": "refs/heads/gh-readonly-queue/main/pr-1",
+                    "head_sha": "head-sha",
+                    "head_commit": {"message": "foo"},
+                }
+            },
+            {"base_ref": "refs/heads/main", "head_sha": "head-sha", "action": []},
+            id="merge_group",
+        ),
+        pytest.param(
+            "delete",
+            {"ref": "feature", "ref_type": "branch"},
+            {"ref": "feature", "actor_account_id": 1},
+            id="delete",
+        ),
+        pytest.param(
+            "push",
+            {"ref": "refs/heads/main", "after": "head-sha", "head_commit": None},
+            {
+                "base_ref": "refs/heads/main",
+                "head_sha": "head-sha",
+                "commit_message": [],
+            },
+            id="push_missing_head_commit",
+        ),
+    ],
+)
+def test_payload_request_mapping(event, payload, expected):
+    """Ensure that payload_request_mapping() extracts the event's fields and maps missing fields to no values"""
+    request_mapping = lambda_function.payload_request_mapping(
+        event, {"sender": {"id": 1}, **payload}
+    )
+
+    assert request_mapping["event"] == event
+    assert {key: request_mapping[key] for key in expected} == expected
+
+
+@patch.dict(os.environ, {"TOKEN_SSM_KEYS": json.dumps({})})
+@patch("github.Github.get_repo")
+def test_match_filter_groups_skips_github(mock_repo):
+    """Ensure that match_filter_groups() only calls the GitHub API when a filter needs it"""
+    payload = {
+        "repository": {"full_name": "user/dummy-repo", "name": "dummy-repo"},
+        "action": "completed",
+        "workflow_run": {"head_branch": "main", "head_sha": "head-sha"},
+        "sender": {"id": 1},
+    }
+    filter_groups = [
+        [
+            {
+                "type": "event",
+                "pattern": "workflow_run",
+                "exclude_matched_filter": False,
+            },
+            {"type": "head_ref", "pattern": "^main$", "exclude_matched_filter": False},
+            {"type": "action", "pattern": "completed", "exclude_matched_filter": False},
+        ]
+    ]
+
+    assert lambda_function.match_filter_groups(
+        "workflow_run", payload, filter_groups
+    ) == [0]
+    mock_repo.assert_not_called()
+
+
+@patch("function.lambda_function.emit_metric")
+def test_circuit_breaker(mock_emit_metric):
+    """Ensure that the circuit opens after consecutive failures or slow calls and that half-open probes close or reopen it"""
+    breaker = lambda_function.CircuitBreaker(
+        "GitHub", failure_threshold=2, slow_call_seconds=1, open_seconds=30
+    )
+    now = [0]
+
+    with patch("time.monotonic", side_effect=lambda: now[0]):
+        breaker.record(True, 0.1)
+        breaker.record(False, 0.1)
+        breaker.record(True, 0.1)
+        assert breaker.state == "closed"
+        # slow calls count as failures
+        breaker.record(False, 2)
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+        now[0] = 31
+        assert breaker.allow()
+        # only one probe is let through while half-open
+        assert not breaker.allow()
+        breaker.record(True, 0.1)
+        assert breaker.state == "open"
+
+        now[0] = 62
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+        assert breaker.state == "closed"
+        assert breaker.allow()
+
+    assert [c.args[0] for c in mock_emit_metric.call_args_list] == [
+        "GitHubCircuitOpened",
+        "GitHubCircuitOpened",
+    ]
+
+
+@pytest.mark.parametrize(
+    "policy,head_ref,expected",
+    [
+        pytest.param("fail_fast", "main", None, id="fail_fast"),
+        pytest.param("local_only", "main", [1], id="local_only_matched"),
+        pytest.param("local_only", "feature", None, id="local_only_unmatched"),
+    ],
+)
+@patch.dict(
+    os.environ,
+    {"TOKEN_SSM_KEYS": json.dumps({}), "CIRCUIT_BREAKER_FAILURE_THRESHOLD": "1"},
+)
+@patch("github.Github.get_repo")
+def test_match_filter_groups_open_circuit(mock_repo, policy, head_ref, expected):
+    """Ensure that an open GitHub circuit fails fast or only lets filter groups without remote fields match"""
+    lambda_function.get_circuit_breaker("GitHub").open()
+    payload = {
+        "repository": {"full_name": "user/dummy-repo", "name": "dummy-repo"},
+        "ref": f"refs/heads/{head_ref}",
+        "before": "base-sha",
+        "after": "head-sha",
+        "head_commit": {"message": "foo"},
+        "sender": {"id": 1},
+    }
+    filter_groups = [
+        [{"type": "file_path", "pattern": "^docs/", "exclude_matched_filter": False}],
+        [
+            {
+                "type": "ref",
+                "pattern": "^refs/heads/main$",
+                "exclude_matched_filter": False,
+            }
+        ],
+    ]
+
+    decision = lambda_function.Decision()
+
+    with patch.dict(os.environ, {"CIRCUIT_BREAKER_POLICY": policy}):
+        if expected is None:
+            with pytest.raises(lambda_function.DependencyUnavailableException):
+                lambda_function.match_filter_groups(
+                    "push", payload, filter_groups, decision=decision
+                )
+        else:
+            assert (
+                lambda_function.match_filter_groups(
+                    "push", payload, filter_groups, decision=decision
+                )
+                == expected
+            )
+            # the changed files were never fetched so they aren't reported as empty
+            assert decision.file_paths is None
+            assert decision.to_dict()["unavailable_fields"] == ["file_path"]
+    mock_repo.assert_not_called()
+
+
+@patch.dict(
+    os.environ,
+    {
+        "GITHUB_WEBHOOK_SECRET_SSM_KEY": "secret-key",
+        "CIRCUIT_BREAKER_FAILURE_THRESHOLD": "1",
+    },
+)
+@patch("function.lambda_function.ssm")
+@patch(
+    "function.lambda_function.load_filter_config",
+    return_value=lambda_function.FilterConfig(
+        {"repo": [[{"type": "event", "pattern": "push"}]]}
+    ),
+)
+def test_open_ssm_circuit_lambda_handler(mock_load_filter_config, mock_ssm):
+    """Ensure that lambda_handler() returns an open SSM circuit as a dependency error rather than a server error"""
+    lambda_function.get_circuit_breaker("SSM").open()
+    event = {
+        "headers": {"X-GitHub-Event": "push", "X-Hub-Signature-256": "sha256=foo"},
+        "body": json.dumps({"repository": {"name": "repo", "full_name": "user/repo"}}),
+    }
+
+    with pytest.raises(
+        lambda_function.LambdaException, match="DependencyUnavailableException"
+    ):
+        lambda_function.lambda_handler(event, {})
+    mock_ssm.get_parameter.assert_not_called()
+
+
+def test_hot_reload_filter_config(tmp_path):
+    """Ensure that load_filter_config() only swaps in a new config when the store's version changes"""
+    path = tmp_path / "filter_groups.json"
+    path.write_text(json.dumps({"repo-a": [[{"type": "event", "pattern": "push"}]]}))
+
+    with patch.dict(
+        os.environ, {"FILTER_GROUPS_PATH": str(path), "FILTER_GROUPS_TTL": "0"}
+    ):
+        config = lambda_function.load_filter_config()
+        assert config.repo_index.lookup("owner/repo-a", "repo-a") == "repo-a"
+        # unchanged versions reuse the compiled config
+        assert lambda_function.load_filter_config() is config
+
+        path.write_text(
+            json.dumps({"repo-b": [[{"type": "event", "pattern": "push"}]]})
+        )
+        os.utime(path, ns=(0, 0))
+
+        reloaded = lambda_function.load_filter_config()
+        assert reloaded is not config
+        assert reloaded.repo_index.lookup("owner/repo-a", "repo-a") is None
+        assert reloaded.repo_index.lookup("owner/repo-b", "repo-b") == "repo-b"
+
+
+def test_per_repo_filter_config(tmp_path):
+    """Ensure that per-repo config stores only read the artifacts that changed"""
+    for key in ["repo-a", "glob:owner/service-*"]:
+        (tmp_path / f"{hashlib.sha1(key.encode()).hexdigest()}.json").write_text(
+            json.dumps(
+                {"key": key, "filter_groups": [[{"type": "event", "pattern": "push"}]]}
+            )
+        )
+    store = lambda_function.DirectoryConfigStore(str(tmp_path), watch=True)
+
+    filter_groups, version = store.fetch(None)
+    assert sorted(filter_groups) == ["glob:owner/service-*", "repo-a"]
+    assert store.fetch(version) is None
+
+    path = tmp_path / f"{hashlib.sha1(b'repo-a').hexdigest()}.json"
+    path.write_text(
+        json.dumps(
+            {
+                "key": "repo-a",
+                "filter_groups": [[{"type": "event", "pattern": "release"}]],
+            }
+        )
+    )
+    os.utime(path, ns=(0, 0))
+    with patch.object(store, "read", wraps=store.read) as mock_read:
+        filter_groups, _ = store.fetch(version)
+    mock_read.assert_called_once_with(str(path))
+    assert filter_groups["repo-a"] == [[{"type": "event", "pattern": "release"}]]
+    assert "glob:owner/service-*" in filter_groups
+
+
+@patch("function.lambda_function.ssm")
+def test_ssm_path_config_store(mock_ssm):
+    """Ensure that SSMPathConfigStore only reads the manifest and the values whose version changed"""
+    versions = {f"repo-{i}": "v1" for i in range(12)}
+
+    def artifact(name):
+        return {
+            "Name": f"/path/{name}",
+            "Value": json.dumps(
+                {
+                    "key": name,
+                    "filter_groups": [[{"type": "event", "pattern": versions[name]}]],
+                }
+            ),
+        }
+
+    mock_ssm.get_parameter.side_effect = lambda **kwargs: {
+        "Parameter": {"Value": json.dumps(versions)}
+    }
+    mock_ssm.get_parameters.side_effect = lambda Names, **kwargs: {
+        "Parameters": [artifact(name.split("/")[-1]) for name in Names]
+    }
+    store = lambda_function.SSMPathConfigStore("/path/")
+
+    filter_groups, version = store.fetch(None)
+    assert len(filter_groups) == 12
+    mock_ssm.get_parameter.assert_called_once_with(Name="/path/manifest")
+    # values are read within batches of 10
+    assert mock_ssm.get_parameters.call_count == 2
+
+    mock_ssm.get_parameters.reset_mock()
+    assert store.fetch(version) is None
+    mock_ssm.get_parameters.assert_not_called()
+
+    versions["repo-3"] = "v2"
+    filter_groups, _ = store.fetch(version)
+    mock_ssm.get_parameters.assert_called_once_with(
+        Names=["/path/repo-3"], WithDecryption=True
+    )
+    assert filter_groups["repo-3"] == [[{"type": "event", "pattern": "v2"}]]
+    assert filter_groups["repo-4"] == [[{"type": "event", "pattern": "v1"}]]
+
+
+@patch("boto3.client")
+def test_s3_config_store_not_modified(mock_client):
+    """Ensure that S3ConfigStore uses conditional requests and returns None for unchanged objects"""
+    mock_client.return_value.get_object.side_effect = (
+        lambda_function.botocore.exceptions.ClientError(
+            {"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject"
+        )
+    )
+    store = lambda_function.S3ConfigStore("bucket", "filter_groups.json")
+
+    assert store.fetch('"etag"') is None
+    mock_client.return_value.get_object.assert_called_once_with(
+        Bucket="bucket", Key="filter_groups.json", IfNoneMatch='"etag"'
+    )
+
+
+@pytest.mark.parametrize(
+    "delay,expected_profiled",
+    [
+        pytest.param(0.1, True, id="slow"),
+        pytest.param(0, False, id="fast"),
+    ],
+)
+def test_profiled_lambda_handler(tmp_path, delay, expected_profiled):
+    """Ensure that lambda_handler() only emits a collapsed-stack profile for invocations slower than the threshold"""
+
+    def slow_handle(event, context):
+        time.sleep(delay)
+        return "success"
+
+    with patch.dict(
+        os.environ,
+        {
+            "PROFILE_THRESHOLD_MS": "50",
+            "PROFILE_INTERVAL_MS": "1",
+            "PROFILE_OUTPUT_DIR": str(tmp_path),
+        },
+    ), patch("function.lambda_function.handle", side_effect=slow_handle):
+        assert lambda_function.lambda_handler({}, {}) == "success"
+
+    profiles = list(tmp_path.iterdir())
+    if expected_profiled:
+        assert len(profiles) == 1
+        lines = profiles[0].read_text().splitlines()
+        assert all(re.match(r"^\S.* \d+$", line) for line in lines)
+        assert any("lambda_function.py:lambda_handler;" in line for line in lines)
+    else:
+        assert profiles == []
+
+
+def test_rate_limit_governor_shares_budget():
+    """Ensure that RateLimitGovernor shares observed budgets across containers and fails fast or defers once exhausted"""
+    store = lambda_function.LocalRateLimitStore()
+    container_a = lambda_function.RateLimitGovernor(store)
+    container_b = lambda_function.RateLimitGovernor(store, max_wait=60)
+    reset = int(time.time()) + 30
+
+    gh = Mock(rate_limiting=(0, 60), rate_limiting_resettime=reset)
+    container_a.observe("anonymous", gh)
+
+    # stale observations within the same window don't replenish the budget
+    store.put("anonymous", 10, reset)
+    assert store.get("anonymous") == (0, reset)
+
+    with pytest.raises(lambda_function.ServerException):
+        container_a.acquire("anonymous")
+
+    with patch("time.sleep") as mock_sleep:
+        container_b.acquire("anonymous")
+        assert 0 < mock_sleep.call_args[0][0] <= 30
+
+    # other credentials have their own budget
+    container_a.acquire(lambda_function.rate_limit_key("token"))
+
+
+def test_rate_limit_governor_publish_step():
+    """Ensure that RateLimitGovernor only writes budgets to the store once they drop by the publish step, reset or run low"""
+    store = Mock()
+    governor = lambda_function.RateLimitGovernor(store, reserve=10, publish_step=100)
+    reset = int(time.time()) + 30
+
+    for remaining in range(5000, 4700, -1):
+        governor.observe(
+            "key", Mock(rate_limiting=(remaining, 5000), rate_limiting_resettime=reset)
+        )
+    assert [c.args[1] for c in store.put.call_args_list] == [5000, 4900, 4800]
+    # the container's own budget is kept up to date
+    assert governor.budgets["key"] == (4701, reset)
+
+    store.put.reset_mock()
+    governor.observe(
+        "key", Mock(rate_limiting=(4999, 5000), rate_limiting_resettime=reset + 3600)
+    )
+    for remaining in [105, 104]:
+        governor.observe(
+            "key",
+            Mock(rate_limiting=(remaining, 5000), rate_limiting_resettime=reset + 3600),
+        )
+    assert [c.args[1] for c in store.put.call_args_list] == [4999, 105, 104]
+
+
+@patch.dict(os.environ, {"TOKEN_SSM_KEYS": json.dumps({})})
+@patch("github.Github.get_repo")
+def test_changed_files_cache(mock_repo):
+    """Ensure that the changed files of a commit range are cached in compact form and consulted before the GitHub API"""
+    paths = ["src/app/main.py", "src/app/__init__.py", "README.md", "src/app/main.py"]
+    mock_repo.return_value.compare.return_value.files = [
+        dotdict({"filename": path}) for path in paths
+    ]
+    store = lambda_function.LocalChangedFilesStore()
+    lambda_function._changed_files_cache = lambda_function.ChangedFilesCache(store)
+    payload = {
+        "repository": {"full_name": "user/dummy-repo", "name": "dummy-repo"},
+        "ref": "refs/heads/master",
+        "before": "base-sha",
+        "after": "head-sha",
+        "sender": {"id": 1},
+    }
+    filter_groups = [
+        [{"type": "file_path", "pattern": "\\.py$", "exclude_matched_filter": False}]
+    ]
+
+    assert lambda_function.match_filter_groups("push", payload, filter_groups) == [0]
+    # redeliveries and events of the same commit range don't call the GitHub API again
+    mock_repo.reset_mock()
+    assert lambda_function.match_filter_groups("push", payload, filter_groups) == [0]
+    mock_repo.assert_not_called()
+
+    blob = store.get(
+        lambda_function.changed_files_key("user/dummy-repo", "base-sha", "head-sha")
+    )
+    assert lambda_function.decode_paths(blob) == sorted(set(paths))
+
+
+@patch("requests.request")
+@patch("github.GithubIntegration")
+def test_github_credentials_pool(mock_integration, mock_request):
+    """Ensure that GitHub App installation tokens are cached until they expire and requests use the credential with the most remaining budget"""
+    mock_integration.return_value.create_jwt.return_value = "jwt"
+    mock_request.side_effect = [
+        dotdict({"status_code": 200, "json": lambda: {"id": 1}}),
+        *[
+            dotdict(
+                {
+                    "status_code": 201,
+                    "json": lambda i=i, ttl=ttl: {
+                        "token": f"installation-token-{i}",
+                        "expires_at": time.strftime(
+                            "%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + ttl)
+                        ),
+                    },
+                }
+            )
+            for i, ttl in enumerate([60, 3600])
+        ],
+    ]
+    lambda_function._github_apps = [lambda_function.GitHubApp("app-id", "private-key")]
+    lambda_function._ssm_cache["token-ssm-key"] = ("repo-token", time.time() + 60)
+
+    credentials = lambda_function.github_credentials("owner/repo", "token-ssm-key")
+    assert [token for _, token in credentials] == [
+        "repo-token",
+        "installation-token-0",
+    ]
+    # tokens expiring within the refresh margin are replaced
+    assert [token for _, token in lambda_function.github_credentials("owner/repo")] == [
+        "installation-token-1"
+    ]
+    assert [token for _, token in lambda_function.github_credentials("owner/repo")] == [
+        "installation-token-1"
+    ]
+    # the installation is only looked up once
+    assert [call.args for call in mock_request.call_args_list] == [
+        ("GET", "https://api.github.com/repos/owner/repo/installation"),
+        ("POST", "https://api.github.com/app/installations/1/access_tokens"),
+        ("POST", "https://api.github.com/app/installations/1/access_tokens"),
+    ]
+
+    governor = lambda_function.get_rate_limit_governor()
+    reset = int(time.time()) + 600
+    governor.budgets[credentials[0][0]] = (10, reset)
+    governor.budgets[credentials[1][0]] = (4000, reset)
+    assert lambda_function.select_github_credential(credentials)[1] == (
+        "installation-token-0"
+    )
+    assert lambda_function.select_github_credential([]) == ("anonymous", None)
+
+
+@patch("requests.request")
+@patch("github.GithubIntegration")
+def test_github_app_installation_lookup_failures(mock_integration, mock_request):
+    """Ensure that only a confirmed 404 is cached as not installed and that other failures are retried"""
+    mock_request.side_effect = [
+        dotdict({"status_code": 502, "text": "Bad Gateway"}),
+        dotdict({"status_code": 404, "text": "Not Found"}),
+    ]
+    app = lambda_function.GitHubApp("app-id", "private-key")
+
+    with pytest.raises(lambda_function.github.GithubException):
+        app.installation_id("owner/repo")
+    assert app.installation_id("owner/repo") is None
+    assert app.installation_id("owner/repo") is None
+    assert mock_request.call_count == 2
+    assert mock_request.call_args.kwargs["timeout"] == 10
+
+
+@patch.dict(os.environ, {"TOKEN_SSM_KEYS": json.dumps({})})
+@patch("github.Github.get_repo")
+def test_decision(mock_repo):
+    """Ensure that the decision includes the matched groups, normalized fields and fetched file paths within the size cap"""
+    mock_repo.return_value.compare.return_value.files = [
+        dotdict({"filename": path}) for path in ["docs/index.md", "src/main.py"]
+    ]
+    payload = {
+        "repository": {"full_name": "user/dummy-repo", "name": "dummy-repo"},
+        "ref": "refs/heads/master",
+        "before": "base-sha",
+        "after": "head-sha",
+        "head_commit": {"message": "dummy-head-commit-message"},
+        "sender": {"id": 1},
+    }
+    filter_groups = [
+        [{"type": "file_path", "pattern": "\\.py$", "exclude_matched_filter": False}],
+        [{"type": "base_ref", "pattern": "main", "exclude_matched_filter": False}],
+        [{"type": "event", "pattern": "push", "exclude_matched_filter": False}],
+    ]
+    decision = lambda_function.Decision()
+
+    lambda_function.validate_payload("push", payload, filter_groups, decision=decision)
+
+    assert decision.matched_groups == [0, 2]
+    assert decision.fields == {
+        "event": "push",
+        "ref": "refs/heads/master",
+        "base_ref": "refs/heads/master",
+        "head_sha": "head-sha",
+        "actor_account_id": 1,
+        "commit_message": "dummy-head-commit-message",
+    }
+    assert decision.file_paths == ["docs/index.md", "src/main.py"]
+
+    with patch.dict(os.environ, {"DECISION_COMPRESSION": "zlib"}):
+        encoded = decision.encode()
+    assert encoded["decision_encoding"] == "zlib+base64"
+    assert (
+        json.loads(
+            lambda_function.zlib.decompress(base64.b64decode(encoded["decision"]))
+        )
+        == decision.to_dict()
+    )
+
+    with patch.dict(os.environ, {"DECISION_MAX_BYTES": "200"}):
+        encoded = decision.encode()
+    assert encoded["decision"]["file_paths"] is None
+    assert encoded["decision"]["file_paths_truncated"] is True
+
+
+@patch.dict(os.environ, {"PUSH_COALESCING_WINDOW": "0.2"})
+def test_coalesce_push():
+    """Ensure that only the newest push to a branch within the window is passed on with the union of the coalesced ranges"""
+
+    def push(before, after, delay):
+        time.sleep(delay)
+        return lambda_function.coalesce_push(
+            {
+                "repository": {"full_name": "user/dummy-repo"},
+                "ref": "refs/heads/master",
+                "before": before,
+                "after": after,
+            }
+        )
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(push, f"sha-{i}", f"sha-{i + 1}", i * 0.02)
+            for i in range(3)
+        ]
+        results = [future.result() for future in futures]
+
+    assert results[:2] == [None, None]
+    assert (results[2]["before"], results[2]["after"]) == ("sha-2", "sha-3")
+    assert results[2]["coalesced_ranges"] == [
+        ["sha-0", "sha-1"],
+        ["sha-1", "sha-2"],
+        ["sha-2", "sha-3"],
+    ]
+
+    # pushes after the window closed open a new window
+    assert "coalesced_ranges" not in push("sha-3", "sha-4", 0)
+
+
+@patch.dict(
+    os.environ, {"PUSH_COALESCING_WINDOW": "5", "PUSH_COALESCING_RESERVE_MS": "100"}
+)
+def test_coalesce_push_deadline():
+    """Ensure that coalesce_push() stops waiting for the window once only the reserve is left within the deadline"""
+    lambda_function._deadline = lambda_function.Deadline(300, 0)
+    payload = {
+        "repository": {"full_name": "user/dummy-repo"},
+        "ref": "refs/heads/master",
+        "before": "sha-0",
+        "after": "sha-1",
+    }
+
+    start = time.perf_counter()
+    assert lambda_function.coalesce_push(payload) == payload
+    assert time.perf_counter() - start < 0.3
+
+
+@patch.dict(
+    os.environ, {"TOKEN_SSM_KEYS": json.dumps({}), "PUSH_COALESCING_WINDOW": "0.2"}
+)
+@patch("github.Github.get_repo")
+@patch("function.lambda_function.validate_sig", return_value=None)
+@patch(
+    "function.lambda_function.load_filter_config",
+    return_value=lambda_function.FilterConfig(
+        {
+            "repo": [
+                [
+                    {
+                        "type": "file_path",
+                        "pattern": "^docs/",
+                        "exclude_matched_filter": False,
+                    }
+                ]
+            ]
+        }
+    ),
+)
+def test_coalesce_push_lambda_handler(
+    mock_load_filter_config, mock_validate_sig, mock_repo
+):
+    """Ensure that superseded pushes succeed without being validated and the newest push is validated with the union of every push's changed files"""
+    # only the first push changed docs and the net range of both pushes is never compared
+    files = {"sha-0...sha-1": ["docs/index.md"], "sha-1...sha-2": ["src/main.py"]}
+    mock_repo.return_value.compare.side_effect = lambda base, head: dotdict(
+        {"files": [dotdict({"filename": path}) for path in files[f"{base}...{head}"]]}
+    )
+
+    def push(before, after, delay):
+        time.sleep(delay)
+        return lambda_function.lambda_handler(
+            {
+                "headers": {
+                    "X-GitHub-Event": "push",
+                    "X-Hub-Signature-256": "sha256=foo",
+                },
+                "body": json.dumps(
+                    {
+                        "repository": {"name": "repo", "full_name": "user/repo"},
+                        "ref": "refs/heads/master",
+                        "before": before,
+                        "after": after,
+                        "head_commit": {"message": "foo"},
+                        "sender": {"id": 1},
+                    }
+                ),
+            },
+            {},
+        )
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(push, f"sha-{i}", f"sha-{i + 1}", i * 0.05)
+            for i in range(2)
+        ]
+        results = [future.result() for future in futures]
+
+    assert results[0] == {
+        "message": "Push was coalesced into a newer push",
+        "coalesced": True,
+    }
+    assert results[1] == {"message": "Payload fulfills atleast one filter group"}
+
+
+def test_project_json():
+    """Ensure that project_json() only keeps the projected paths and returns the same request fields as the full payload"""
+    config = lambda_function.FilterConfig(
+        {
+            "dummy-repo": [
+                [
+                    {
+                        "type": "$.repository.owner.login",
+                        "pattern": "user",
+                        "exclude_matched_filter": False,
+                    }
+                ]
+            ]
+        }
+    )
+    payload = {
+        "ref": "refs/heads/main",
+        "before": "base-sha",
+        "after": "head-sha",
+        "commits": [
+            {"id": i, "message": 'brackets "]}" within strings'} for i in range(100)
+        ],
+        "head_commit": {"message": "foo", "id": "head-sha"},
+        "repository": {
+            "name": "dummy-repo",
+            "full_name": "user/dummy-repo",
+            "owner": {"login": "user", "id": 1},
+        },
+        "pusher": {"name": "user"},
+        "sender": {"id": 1, "login": "user"},
+        "deleted": False,
+    }
+    body = json.dumps(payload, indent=2)
+
+    projected = lambda_function.project_json(body, config.projection("push"))
+
+    assert "commits" not in projected and "pusher" not in projected
+    assert projected["repository"] == {
+        "name": "dummy-repo",
+        "full_name": "user/dummy-repo",
+        "owner": {"login": "user"},
+    }
+    assert lambda_function.payload_request_mapping(
+        "push", projected
+    ) == lambda_function.payload_request_mapping("push", payload)
+    with pytest.raises(ValueError):
+        lambda_function.project_json(
+            '{"ref": "refs/heads/main", "commits": [', config.projection("push")
+        )
+    # JSON paths that may select any value need the entire payload
+    assert (
+        lambda_function.build_projection([lambda_function.json_path_prefix("$..id")])
+        is None
+    )
+
+
+@pytest.mark.parametrize("projection", ["false", "true"])
+@patch("function.lambda_function.validate_sig", return_value=None)
+@patch(
+    "function.lambda_function.validate_payload",
+    return_value={"message": "Payload fulfills atleast one filter group"},
+)
+def test_validate_request_loads_config_once(
+    mock_validate_payload, mock_validate_sig, projection
+):
+    """Ensure that every step of a request uses the same filter groups config version"""
+    config = lambda_function.FilterConfig(
+        {
+            "dummy-repo": [
+                [{"type": "event", "pattern": "push", "exclude_matched_filter": False}]
+            ]
+        }
+    )
+    body = json.dumps(
+        {
+            "ref": "refs/heads/main",
+            "repository": {"name": "dummy-repo", "full_name": "user/dummy-repo"},
+            "sender": {"id": 1},
+        }
+    )
+
+    with patch.dict(os.environ, {"PAYLOAD_PROJECTION": projection}), patch(
+        "function.lambda_function.load_filter_config", return_value=config
+    ) as mock_load_filter_config:
+        lambda_function.validate_request({"x-github-event": "push"}, body)
+
+    mock_load_filter_config.assert_called_once()
+    assert mock_validate_payload.call_args[1]["matrix"] is config.matrices["dummy-repo"]
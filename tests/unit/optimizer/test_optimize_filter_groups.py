@@ -0,0 +1,111 @@
+import io
+import json
+import sys
+
+import pytest
+from unittest.mock import patch
+from optimizer import optimize_filter_groups
+
+
+def f(type, pattern, exclude=False):
+    return {"type": type, "pattern": pattern, "exclude_matched_filter": exclude}
+
+
+@pytest.mark.parametrize(
+    "filter_groups,events,expected_groups,expected_removed",
+    [
+        pytest.param(
+            [
+                [f("event", "push"), f("base_ref", "main")],
+                [f("base_ref", "main"), f("event", "push")],
+            ],
+            ["push", "pull_request"],
+            [[f("event", "push"), f("base_ref", "main")]],
+            [{"group": 1, "reason": "duplicate of group 0"}],
+            id="duplicate",
+        ),
+        pytest.param(
+            [
+                [f("event", "push"), f("file_path", "\\.py$"), f("base_ref", "main")],
+                [f("event", "push"), f("base_ref", "main")],
+            ],
+            ["push", "pull_request"],
+            [[f("event", "push"), f("base_ref", "main")]],
+            [{"group": 0, "reason": "subsumed by group 1"}],
+            id="subsumed",
+        ),
+        pytest.param(
+            [
+                [f("event", "push"), f("event", "pull_request")],
+                [f("event", "release")],
+                [f("event", "push")],
+            ],
+            ["push", "pull_request"],
+            [[f("event", "push")]],
+            [
+                {
+                    "group": 0,
+                    "reason": "no webhook event fulfills the event filters: ['push', 'pull_request', 'ping']",
+                },
+                {
+                    "group": 1,
+                    "reason": "no webhook event fulfills the event filters: ['push', 'pull_request', 'ping']",
+                },
+            ],
+            id="unreachable_event",
+        ),
+        pytest.param(
+            [
+                [
+                    f("event", "push"),
+                    f("base_ref", "main"),
+                    f("base_ref", "main", True),
+                ],
+                [f("event", "push"), f("file_path", "a"), f("file_path", "a", True)],
+            ],
+            None,
+            [[f("event", "push"), f("file_path", "a"), f("file_path", "a", True)]],
+            [{"group": 0, "reason": "includes and excludes `base_ref` pattern: main"}],
+            id="contradiction",
+        ),
+        pytest.param(
+            [[f("event", "push"), f("event", "push"), f("event", "ping", True)]],
+            ["push"],
+            [[f("event", "push")]],
+            [],
+            id="redundant_filters",
+        ),
+    ],
+)
+def test_optimize_groups(filter_groups, events, expected_groups, expected_removed):
+    """Ensure that optimize_groups() removes the redundant filters and groups"""
+    groups, report = optimize_filter_groups.optimize_groups(filter_groups, events)
+
+    assert groups == expected_groups
+    assert report["removed_groups"] == expected_removed
+    assert report["optimized_groups"] == len(expected_groups)
+
+
+def test_main():
+    """Ensure that the external data source program reads and writes JSON string values"""
+    query = {
+        "filter_groups": json.dumps(
+            {"repo": [[f("event", "push")], [f("event", "push")]], "other": []}
+        ),
+        "events": json.dumps({"repo": ["push"]}),
+    }
+    stdout = io.StringIO()
+
+    with patch.object(sys, "stdin", io.StringIO(json.dumps(query))), patch.object(
+        sys, "stdout", stdout
+    ):
+        optimize_filter_groups.main()
+
+    result = json.loads(stdout.getvalue())
+    assert json.loads(result["filter_groups"]) == {
+        "repo": [[f("event", "push")]],
+        "other": [],
+    }
+    assert json.loads(result["report"])["repo"]["removed_groups"] == [
+        {"group": 1, "reason": "duplicate of group 0"}
+    ]
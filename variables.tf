@@ -65,7 +65,9 @@ The `github_token_ssm_key` and `github_token_ssm_value` only need to be defined
 The token defined under `github_token_ssm_value` needs the full `repo` permissions until github creates a repo scoped token with 
 granular permissions. See thread here: https://github.community/t/can-i-give-read-only-access-to-a-private-repo-from-a-developer-account/441/165
 Params:
-  `name`: Repository name
+  `name`: Repository name, full name (e.g. `owner/repo`) or pattern matched against the repository's full name
+  `name_pattern_type`: Set to `glob` or `regex` if `name` is a repository pattern. Repository patterns require
+    var.create_organization_webhook to be true. Exact names are matched before patterns and patterns are matched in the order they're defined.
   `is_private`: Whether the repo's visibility is set to private
   `create_github_token_ssm_param`: Determines if the module should create or load the GitHub token AWS SSM parameter (defaults to true)
   `github_token_ssm_param_arn`: GitHub token AWS SSM Parameter Store ARN
@@ -73,6 +75,11 @@ Params:
     If not defined, the module will generate one.
   `github_token_ssm_value`: Value for the AWS SSM Parameter Store GitHub token resource used for accessing the repo
   `github_token_ssm_tags`: Tags for the AWS SSM Parameter Store GitHub token resource
+  `webhook_secret_version`: Arbitrary value that regenerates the repo's webhook secret when changed. Only used when
+    var.create_repo_webhook_secrets is true.
+  `previous_webhook_secret_ssm_keys`: AWS SSM Parameter Store keys of the repo's previous webhook secrets that remain valid
+    while the repo's secret is rotated. Copy the current secret to a new parameter and add its key here before changing
+    `webhook_secret_version`. Remove the key once the webhook uses the new secret. Only used when var.create_repo_webhook_secrets is true.
   `filter_groups`: List of filter groups that the Github event has to meet. The event has to meet all filters of atleast one group in order to succeed. 
   [
     [ (Filter Group)
@@ -81,11 +88,14 @@ Params:
           (
             `event` - Github Webhook events that will invoke the API. Currently only supports: `push` and `pull_request`.
             `pr_action` - Pull request actions (e.g. opened, edited, reopened, closed). See more under the action key at: https://docs.github.com/en/developers/webhooks-and-events/webhook-events-and-payloads#pull_request
-            `base_ref` - Pull request base ref
-            `head_ref` - Pull request head ref
+            `action` - Event action (e.g. published, completed, submitted)
+            `ref` - Git ref of `push`, `create`, `delete`, `release` (tag name), `workflow_run` (head branch) and `merge_group` events
+            `base_ref` - Base ref of `pull_request`, `pull_request_review` and `merge_group` events, pushed ref of `push` events and target of `release` events
+            `head_ref` - Head ref of `pull_request`, `pull_request_review`, `workflow_run` and `merge_group` events
+            `head_sha` - Head commit SHA of `push`, `pull_request`, `pull_request_review`, `workflow_run` and `merge_group` events
             `actor_account_id` - Github user IDs
-            `commit_message` - GitHub event's commit message
-            `file_path` - File paths of new, modified, or deleted files
+            `commit_message` - Head commit message of `push`, `pull_request`, `workflow_run` and `merge_group` events
+            `file_path` - File paths of new, modified, or deleted files of `push`, `pull_request`, `pull_request_review` and `merge_group` events
             `<JSONPATH>` - Valid JSON path expression that will be used to find the filter value(s) within the GitHub webhook payload
           )
         `pattern`: Regex pattern that is matched against the `type` payload attribute. For `type` = `event`, use a single Github webhook event and not a regex pattern.
@@ -95,13 +105,16 @@ Params:
   ]
   EOF
   type = list(object({
-    name                          = string
-    is_private                    = optional(bool)
-    create_github_token_ssm_param = optional(bool)
-    github_token_ssm_param_arn    = optional(string)
-    github_token_ssm_key          = optional(string)
-    github_token_ssm_value        = optional(string)
-    github_token_ssm_tags         = optional(map(string))
+    name                             = string
+    name_pattern_type                = optional(string)
+    is_private                       = optional(bool)
+    create_github_token_ssm_param    = optional(bool)
+    github_token_ssm_param_arn       = optional(string)
+    github_token_ssm_key             = optional(string)
+    github_token_ssm_value           = optional(string)
+    github_token_ssm_tags            = optional(map(string))
+    webhook_secret_version           = optional(string)
+    previous_webhook_secret_ssm_keys = optional(list(string))
     filter_groups = list(list(object({
       type                   = string
       pattern                = string
@@ -110,6 +123,64 @@ Params:
   }))
   sensitive = true
   default   = []
+  validation {
+    condition     = alltrue([for repo in var.repos : contains(["glob", "regex"], repo.name_pattern_type) if repo.name_pattern_type != null])
+    error_message = "The `name_pattern_type` attribute must be either `glob` or `regex`."
+  }
+}
+
+variable "filter_groups_store" {
+  description = <<EOF
+Where the filter groups config is stored. Each repo's filter groups are stored within their own artifact so that a
+change to one repo only changes that repo's artifact:
+  `package` - Packaged with the Lambda Function. Any filter change requires a new function deployment.
+  `s3` - AWS S3 objects within var.filter_groups_s3_bucket
+  `ssm` - AWS SSM Parameter Store values (limited to 8KB per repo). A manifest value holds the content hash of
+    every repo's value so that it's limited to about 140 repos.
+The function checks the `s3` and `ssm` stores for a new version every var.filter_groups_ttl seconds
+so filter changes don't require a new function deployment.
+  EOF
+  type        = string
+  default     = "package"
+  validation {
+    condition     = contains(["package", "s3", "ssm"], var.filter_groups_store)
+    error_message = "The var.filter_groups_store value must be either `package`, `s3` or `ssm`."
+  }
+}
+
+variable "optimize_filter_groups" {
+  description = <<EOF
+Determines if the filter groups are optimized before they're deployed. The optimizer removes duplicate filters,
+redundant `event` filters, groups that can't be fulfilled, duplicate groups and groups that are subsumed by a group
+with a subset of their filters. The optimization doesn't change which payloads pass
+but requires `python3` on the machine running Terraform. Removed groups shift the index of the remaining groups so the
+group indexes within the function's decision (see var.lambda_decision_in_response) refer to the optimized groups.
+See the `filter_groups_optimization_report` output.
+  EOF
+  type        = bool
+  default     = false
+}
+
+variable "filter_groups_s3_bucket" {
+  description = "Name of the pre-existing AWS S3 bucket used to store the filter groups config if var.filter_groups_store is `s3`"
+  type        = string
+  default     = null
+}
+
+variable "filter_groups_ttl" {
+  description = "Number of seconds the function caches the filter groups config before checking the store for a new version"
+  type        = number
+  default     = 60
+}
+
+variable "create_organization_webhook" {
+  description = <<EOF
+Determines if a single GitHub organization webhook should be created instead of a webhook for every repo within var.repos.
+The organization is the owner configured within the GitHub provider. Events for repositories that don't match
+any var.repos entry are rejected by the Lambda Function.
+  EOF
+  type        = bool
+  default     = false
 }
 
 # SSM #
@@ -134,6 +205,25 @@ variable "github_secret_ssm_tags" {
   default     = {}
 }
 
+variable "create_repo_webhook_secrets" {
+  description = <<EOF
+Determines if each repository webhook is created with its own secret stored within AWS SSM Parameter Store.
+If false, every webhook uses the secret within var.github_secret_ssm_key.
+  EOF
+  type        = bool
+  default     = false
+}
+
+variable "github_webhook_previous_secret_ssm_keys" {
+  description = <<EOF
+AWS SSM Parameter Store keys of previous secrets that remain valid while the secret within var.github_secret_ssm_key
+is rotated. Copy the current secret to a new parameter and add its key here before rotating the secret. Remove the key
+once the webhooks use the new secret. Per-repo secrets are rotated via the repo's `previous_webhook_secret_ssm_keys`.
+  EOF
+  type        = list(string)
+  default     = []
+}
+
 # Lambda #
 
 variable "async_lambda_invocation" {
@@ -146,6 +236,25 @@ See for more info: https://docs.aws.amazon.com/apigateway/latest/developerguide/
   default     = false
 }
 
+variable "lambda_proxy_integration" {
+  description = <<EOF
+Determines if the API uses a Lambda proxy integration instead of a non-proxy integration with a request mapping template.
+If true, the Lambda Function receives GitHub's raw request body and headers unchanged.
+Proxy integrations can't be invoked asynchronously so var.async_lambda_invocation is ignored.
+  EOF
+  type        = bool
+  default     = false
+}
+
+variable "create_lambda_function_url" {
+  description = <<EOF
+Determines if a Lambda Function URL should be created. If true, the GitHub webhooks will send requests
+directly to the Lambda Function URL instead of the API.
+  EOF
+  type        = bool
+  default     = false
+}
+
 variable "lambda_destination_on_success" {
   description = "AWS ARN of the service that will be invoked if Lambda function succeeds"
   type        = string
@@ -192,4 +301,306 @@ variable "lambda_create_async_event_config" {
   description = "Determines if the Lambda Function will call the destination asynchronously"
   type        = bool
   default     = false
+}
+
+variable "lambda_provisioned_concurrent_executions" {
+  description = <<EOF
+Amount of provisioned concurrency to allocate for the Lambda Function's published version. Set to -1 to disable.
+If enabled, the API and the warm-up rule will invoke the published version so that requests are routed to the pre-initialized containers.
+  EOF
+  type        = number
+  default     = -1
+}
+
+variable "lambda_warm_up_schedule_expression" {
+  description = <<EOF
+AWS EventBridge schedule expression (e.g. rate(5 minutes)) used to send warm-up events to the Lambda Function.
+Warm-up events load the function's SSM values, filter groups and GitHub connections without validating a payload.
+If not specified, no warm-up rule will be created.
+  EOF
+  type        = string
+  default     = null
+}
+
+variable "lambda_log_level" {
+  description = "Python logging level of the Lambda Function (e.g. DEBUG, INFO, WARNING)"
+  type        = string
+  default     = "DEBUG"
+}
+
+variable "lambda_trace_sample_rate" {
+  description = <<EOF
+Fraction of requests (0 to 1) that are traced. Traced requests log a compact summary of which filter group matched or failed,
+which filter decided each group, how many values each filter scanned and the time spent per filter and per data fetch.
+  EOF
+  type        = number
+  default     = 0
+}
+
+variable "lambda_trace_in_response" {
+  description = "Determines if the trace of sampled requests is included within the Lambda Function's successful response"
+  type        = bool
+  default     = false
+}
+
+variable "lambda_decision_in_response" {
+  description = <<EOF
+Determines if the Lambda Function's successful response includes the decision: the matched filter group indices
+within the deployed filter groups config, the request's normalized fields (refs, SHAs, actor, etc.) and the
+changed file paths if a filter fetched them. Downstream consumers (e.g. var.lambda_destination_on_success)
+can use the decision instead of calling the GitHub API again. Fields that weren't fetched given that the GitHub
+circuit was open (see var.circuit_breaker_policy) are listed within `unavailable_fields`.
+  EOF
+  type        = bool
+  default     = false
+}
+
+variable "lambda_decision_compression" {
+  description = "Compression of the decision within the Lambda Function's response (`none` or `zlib` for zlib compressed and base64 encoded JSON)"
+  type        = string
+  default     = "none"
+  validation {
+    condition     = contains(["none", "zlib"], var.lambda_decision_compression)
+    error_message = "The var.lambda_decision_compression value must be either `none` or `zlib`."
+  }
+}
+
+variable "lambda_decision_max_bytes" {
+  description = "Maximum size of the encoded decision. Larger decisions leave out the changed file paths."
+  type        = number
+  default     = 200000
+}
+
+variable "lambda_payload_projection" {
+  description = <<EOF
+Determines if the Lambda Function only keeps the payload fields that it and the filter groups' JSON path filters read.
+The payload is still parsed entirely but the unused fields are released right after parsing rather than being held for
+the rest of the request. JSON path filters that may select any field (e.g. `$..id`) disable the projection.
+  EOF
+  type        = bool
+  default     = false
+}
+
+variable "lambda_profile_threshold_ms" {
+  description = <<EOF
+Invocations slower than this duration (milliseconds) log a collapsed-stack profile of where the invocation spent its time.
+Profiling is disabled if both this and `lambda_profile_percentile` are 0.
+  EOF
+  type        = number
+  default     = 0
+}
+
+variable "lambda_profile_percentile" {
+  description = <<EOF
+Invocations slower than this percentile (0 to 100) of the Lambda container's recent invocation durations log a collapsed-stack profile.
+If `lambda_profile_threshold_ms` is also defined, the greater of the two thresholds is used.
+  EOF
+  type        = number
+  default     = 0
+
+  validation {
+    condition     = var.lambda_profile_percentile >= 0 && var.lambda_profile_percentile <= 100
+    error_message = "The var.lambda_profile_percentile value must be between 0 and 100."
+  }
+}
+
+variable "github_rate_limit_store" {
+  description = <<EOF
+Where the GitHub API rate limit budgets observed by the Lambda Function are kept:
+  `local` - Within each Lambda container. Containers only fail fast once their own requests are rate limited.
+  `dynamodb` - AWS DynamoDB table shared by all Lambda containers so that a budget exhausted by one container
+    fails fast in every container. Unauthenticated budgets are limited per IP address so they're only accurate
+    across containers that share an egress IP address (e.g. a VPC NAT gateway). Containers only write a budget once
+    it drops by 100 requests, resets or is within 100 requests of var.github_rate_limit_reserve.
+  EOF
+  type        = string
+  default     = "local"
+  validation {
+    condition     = contains(["local", "dynamodb"], var.github_rate_limit_store)
+    error_message = "The var.github_rate_limit_store value must be either `local` or `dynamodb`."
+  }
+}
+
+variable "github_rate_limit_reserve" {
+  description = "Number of GitHub API requests kept back from each rate limit budget before requests fail fast or are deferred"
+  type        = number
+  default     = 0
+}
+
+variable "github_rate_limit_max_wait" {
+  description = <<EOF
+Maximum seconds a GitHub API request is deferred until its exhausted rate limit budget resets.
+Requests that would need to wait longer fail fast. Must be less than the Lambda Function's timeout.
+  EOF
+  type        = number
+  default     = 0
+}
+
+variable "changed_files_cache_store" {
+  description = <<EOF
+Where the file paths changed within a commit range are cached. Changed files of a commit range are immutable
+so redeliveries and events that don't move the head commit reuse them instead of calling the GitHub API:
+  `local` - Within each Lambda container
+  `dynamodb` - AWS DynamoDB table shared by all Lambda containers
+  `s3` - AWS S3 objects within var.changed_files_cache_s3_bucket shared by all Lambda containers
+  EOF
+  type        = string
+  default     = "local"
+  validation {
+    condition     = contains(["local", "dynamodb", "s3"], var.changed_files_cache_store)
+    error_message = "The var.changed_files_cache_store value must be either `local`, `dynamodb` or `s3`."
+  }
+}
+
+variable "changed_files_cache_s3_bucket" {
+  description = "Name of the pre-existing AWS S3 bucket used to cache changed files if var.changed_files_cache_store is `s3`. Entries can be expired via the bucket's lifecycle rules."
+  type        = string
+  default     = null
+}
+
+variable "changed_files_cache_ttl" {
+  description = "Number of seconds changed files are cached within the AWS DynamoDB table if var.changed_files_cache_store is `dynamodb`"
+  type        = number
+  default     = 604800
+}
+
+variable "github_apps" {
+  description = <<EOF
+GitHub Apps whose installation tokens are used to call the GitHub API for the repositories the apps are installed for.
+The installation tokens are minted by the Lambda Function with the app's JWT and cached until shortly before they expire.
+Requests are spread across the repository's token and the installation tokens by their remaining rate limit budget.
+The apps' dependencies are built within Docker so Docker must be available on the machine running Terraform.
+  `app_id`: GitHub App ID
+  `private_key_ssm_key`: Key of the pre-existing AWS SSM Parameter Store value containing the app's PEM private key
+  EOF
+  type = list(object({
+    app_id              = string
+    private_key_ssm_key = string
+  }))
+  default = []
+}
+
+variable "push_coalescing_window" {
+  description = <<EOF
+Number of seconds pushes to the same branch are coalesced for. Each push delivery waits for the window opened by the
+branch's first push to close. Only the newest delivery is validated and passed on, with its changed files being the
+union of every coalesced push's changed files, while the older deliveries succeed without being validated and with
+`coalesced` set to true within the response. Deliveries stop waiting once 2 seconds are left before the invocation's
+deadline (see var.lambda_deadline_reserve_ms) so that the GitHub API calls aren't cut short. The windows are shared across
+Lambda containers via an AWS DynamoDB table. Must be less than GitHub's 10 second webhook delivery timeout.
+Set to 0 to disable coalescing.
+  EOF
+  type        = number
+  default     = 0
+  validation {
+    condition     = var.push_coalescing_window >= 0 && var.push_coalescing_window < 10
+    error_message = "The var.push_coalescing_window value must be between 0 and 10."
+  }
+}
+
+variable "lambda_deadline_reserve_ms" {
+  description = <<EOF
+Milliseconds before the Lambda Function's timeout at which the function abandons pending GitHub and SSM calls and
+returns the var.lambda_deadline_policy decision instead of being stopped by the timeout
+  EOF
+  type        = number
+  default     = 500
+}
+
+variable "lambda_deadline_policy" {
+  description = <<EOF
+Decision returned when the filter groups can't be evaluated before the deadline (see var.lambda_deadline_reserve_ms):
+  `fail_closed` - The request fails with a `DeadlineExceededException` (HTTP 504)
+  `fail_open` - The request passes. Requests that are past the deadline before their signature is validated always fail.
+  EOF
+  type        = string
+  default     = "fail_closed"
+  validation {
+    condition     = contains(["fail_closed", "fail_open"], var.lambda_deadline_policy)
+    error_message = "The var.lambda_deadline_policy value must be either `fail_closed` or `fail_open`."
+  }
+}
+
+variable "lambda_metrics_namespace" {
+  description = "AWS CloudWatch namespace of the Lambda Function's metrics (e.g. `DeadlineExceeded`). If not defined, no metrics are emitted."
+  type        = string
+  default     = null
+}
+
+variable "github_retry_max_attempts" {
+  description = <<EOF
+Maximum attempts of each GitHub API call. Calls that fail with a transient error (HTTP 429, 5xx, connection errors
+and timeouts) are retried after a capped exponential backoff with full jitter within the invocation's deadline.
+  EOF
+  type        = number
+  default     = 3
+}
+
+variable "github_retry_base_delay" {
+  description = "Backoff ceiling in seconds before the first retry of a GitHub API call. The ceiling doubles per retry."
+  type        = number
+  default     = 0.1
+}
+
+variable "github_retry_max_delay" {
+  description = "Maximum backoff ceiling in seconds between retries of a GitHub API call"
+  type        = number
+  default     = 2
+}
+
+variable "github_hedge_percentile" {
+  description = <<EOF
+Latency percentile of the container's recent GitHub API calls after which a GitHub API call is hedged with a duplicate
+request and whichever response arrives first is used (e.g. 95). Only idempotent reads are hedged. Hedging is disabled if 0.
+  EOF
+  type        = number
+  default     = 0
+  validation {
+    condition     = var.github_hedge_percentile >= 0 && var.github_hedge_percentile < 100
+    error_message = "The var.github_hedge_percentile value must be at least 0 and less than 100."
+  }
+}
+
+variable "circuit_breaker_failure_threshold" {
+  description = <<EOF
+Consecutive failed or slow calls to GitHub or SSM after which the Lambda Function container opens the dependency's
+circuit. Calls aren't made to a dependency while its circuit is open (see var.circuit_breaker_policy).
+Circuit breakers are disabled if 0.
+  EOF
+  type        = number
+  default     = 0
+}
+
+variable "circuit_breaker_slow_call_ms" {
+  description = "Duration in milliseconds after which a successful GitHub or SSM call counts as a failure. Disabled if 0."
+  type        = number
+  default     = 0
+}
+
+variable "circuit_breaker_open_seconds" {
+  description = "Seconds a dependency's circuit stays open before calls are let through as probes"
+  type        = number
+  default     = 30
+}
+
+variable "circuit_breaker_half_open_probes" {
+  description = "Calls let through to a dependency after its circuit was open. The circuit closes once every probe succeeds."
+  type        = number
+  default     = 1
+}
+
+variable "circuit_breaker_policy" {
+  description = <<EOF
+Decision made while a dependency's circuit is open:
+  `fail_fast` - The request fails with a `DependencyUnavailableException` (HTTP 503)
+  `local_only` - Filters that need the GitHub API aren't matched so only filter groups without them can pass. Requests
+    that don't pass any filter group fail with a `DependencyUnavailableException`. Requests whose webhook secret can't
+    be loaded always fail.
+  EOF
+  type        = string
+  default     = "fail_fast"
+  validation {
+    condition     = contains(["fail_fast", "local_only"], var.circuit_breaker_policy)
+    error_message = "The var.circuit_breaker_policy value must be either `fail_fast` or `local_only`."
+  }
 }
\ No newline at end of file
@@ -10,5 +10,9 @@ terraform {
       source  = "integrations/github"
       version = ">=4.4.0"
     }
+    external = {
+      source  = "hashicorp/external"
+      version = ">= 2.0.0"
+    }
   }
 }
\ No newline at end of file